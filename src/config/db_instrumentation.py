@@ -0,0 +1,140 @@
+"""Per-request database instrumentation via ``connection.execute_wrapper``.
+
+A single wrapper is installed on every connection (when it is created, and on
+the ones already open when the middleware loads). It reports to the
+:class:`QueryStats` of the current request, kept in a context variable: the
+async ORM runs queries in a worker thread, and ``sync_to_async`` copies the
+context, so those queries are counted too.
+
+Per request it collects the number of queries, the total DB time (both go to
+the access line) and how many times each query *shape* ran. On top of that:
+
+- Statements slower than ``DB_SLOW_QUERY_MS`` are logged to ``db.slow`` as
+  they finish (with the request_id, like every other record).
+- Shapes repeated ``DB_N_PLUS_ONE_THRESHOLD`` times or more in one request are
+  logged to ``db.n_plus_one`` once the response is ready: the usual sign of a
+  query per row instead of a join or ``prefetch_related``.
+- With ``DB_QUERY_BUDGET`` set, requests running more queries log a warning,
+  or raise :class:`QueryBudgetExceeded` with ``DB_QUERY_STRICT`` (meant for
+  ``config.settings.test``, so the offending test fails).
+"""
+
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+slow_logger = logging.getLogger("db.slow")
+n_plus_one_logger = logging.getLogger("db.n_plus_one")
+budget_logger = logging.getLogger("db.budget")
+
+current_query_stats: contextvars.ContextVar[Optional["QueryStats"]] = (
+    contextvars.ContextVar("query_stats", default=None)
+)
+
+# IN lists of any length are the same shape
+_IN_LIST = re.compile(r"\bIN \(%s(?:, %s)*\)")
+_SQL_LOG_LIMIT = 1000
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more queries than ``DB_QUERY_BUDGET`` (strict mode)."""
+
+
+def query_shape(sql: str) -> str:
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+class QueryStats:
+    """Queries executed while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def add(self, sql: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[query_shape(sql)] += 1
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        """Shapes executed at least ``threshold`` times (N+1 suspects)."""
+        if threshold <= 0:
+            return []
+        return [(sql, n) for sql, n in self.shapes.most_common() if n >= threshold]
+
+
+def instrument(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.add(sql, duration)
+        threshold = getattr(settings, "DB_SLOW_QUERY_MS", 0)
+        if threshold > 0 and duration * 1000 >= threshold:
+            slow_logger.warning(
+                "slow query duration_ms=%.2f alias=%s sql=%s",
+                duration * 1000,
+                context["connection"].alias,
+                sql[:_SQL_LOG_LIMIT],
+                extra={"duration_ms": round(duration * 1000, 2)},
+            )
+
+
+def _install_wrapper(connection, **kwargs):
+    if instrument not in connection.execute_wrappers:
+        connection.execute_wrappers.append(instrument)
+
+
+def install():
+    """Instruments current and future connections (idempotent)."""
+    connection_created.connect(_install_wrapper, dispatch_uid="db_instrumentation")
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(connection)
+
+
+@contextmanager
+def track_queries():
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def report(stats: QueryStats, method: str, path: str) -> None:
+    """N+1 suspects and query budget, once the request is done."""
+    for sql, count in stats.repeated_shapes(
+        getattr(settings, "DB_N_PLUS_ONE_THRESHOLD", 0)
+    ):
+        n_plus_one_logger.warning(
+            "possible N+1: same query ran %s times in %s %s: %s",
+            count,
+            method,
+            path,
+            sql[:_SQL_LOG_LIMIT],
+            extra={"repeats": count, "method": method, "path": path},
+        )
+
+    budget = getattr(settings, "DB_QUERY_BUDGET", 0)
+    if budget > 0 and stats.count > budget:
+        message = f"{method} {path} ran {stats.count} queries (budget {budget})"
+        if getattr(settings, "DB_QUERY_STRICT", False):
+            raise QueryBudgetExceeded(message)
+        budget_logger.warning(message)
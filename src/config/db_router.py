@@ -0,0 +1,263 @@
+"""Read replicas: safe-method requests read from a healthy replica.
+
+``DATABASE_REPLICAS`` lists the replica aliases (built from
+``DATABASE_REPLICA_URLS``, see ``config.settings.base.database``). With the
+list empty every query goes to ``default``, as without this router.
+
+Routing is decided per request by :class:`config.middleware.ReplicaRoutingMiddleware`,
+through a context variable (so it also applies to async ORM queries, which
+run in a thread with a copy of the context):
+
+- Requests with unsafe methods, and anything outside a request (management
+  commands, the shell), use ``default`` for reads and writes.
+- Safe-method requests read from one replica, chosen once per request among
+  the healthy ones; ``default`` if none is.
+- After a successful write, the client (JWT user id, else session cookie) is
+  pinned to ``default`` for ``DATABASE_REPLICA_PIN_SECONDS``, so it never
+  reads its own writes from a lagging replica. Pins live in the cache
+  ``DATABASE_REPLICA_PIN_CACHE``, which must be shared by every worker
+  (``CACHE_URL``, e.g. Redis): with replicas configured,
+  :func:`check_pin_cache` refuses to start on a per-process cache.
+
+Replica health is checked in-line at most every
+``DATABASE_REPLICA_CHECK_INTERVAL`` seconds per worker: ``SELECT 1``, plus
+the replay lag on Postgres (unhealthy above ``DATABASE_REPLICA_MAX_LAG``).
+On Postgres the check opens its own connection, outside the pool, with a
+``DATABASE_REPLICA_CHECK_TIMEOUT`` connect timeout: the request that runs it
+waits at most that long for an unreachable replica.
+
+Responses whose data is only valid if nothing older is missing, like the
+change feed's cursor, call :func:`read_from_primary`: a replica could hand
+out a cursor past rows and tombstones it has not replayed yet, which other
+clients (not pinned) would then skip for good.
+"""
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger("db.replicas")
+
+# Postgres replica lag in seconds (0 when fully replayed; NULL on a primary)
+PG_LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def replica_aliases() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+# Client pinning
+
+
+def _pin_key(client_key: str) -> str:
+    return f"db-pin:{client_key}"
+
+
+def pin_primary(client_key: str) -> None:
+    seconds = getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5)
+    if seconds > 0:
+        cache = caches[getattr(settings, "DATABASE_REPLICA_PIN_CACHE", "default")]
+        cache.set(_pin_key(client_key), 1, seconds)
+
+
+def is_pinned(client_key: str) -> bool:
+    cache = caches[getattr(settings, "DATABASE_REPLICA_PIN_CACHE", "default")]
+    return cache.get(_pin_key(client_key)) is not None
+
+
+def check_pin_cache() -> None:
+    """Pins in a per-process cache only cover the worker that handled the
+    write: the next read may land on another one and hit a lagging replica."""
+    seconds = getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5)
+    if not replica_aliases() or seconds <= 0:
+        return
+    alias = getattr(settings, "DATABASE_REPLICA_PIN_CACHE", "default")
+    if isinstance(caches[alias], (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(
+            f"DATABASE_REPLICAS needs a cache shared by all workers for "
+            f"read-your-writes pins; DATABASE_REPLICA_PIN_CACHE={alias!r} is "
+            f"{type(caches[alias]).__name__}. Set CACHE_URL (e.g. redis://) or "
+            f"DATABASE_REPLICA_PIN_CACHE to a shared cache."
+        )
+
+
+# Health
+
+
+class ReplicaHealth:
+    """Last known health of each replica, refreshed every ``interval``."""
+
+    def __init__(self, interval: float, max_lag: float, timeout: int = 2):
+        self.interval = interval
+        self.max_lag = max_lag
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._checking: set[str] = set()
+        # alias -> {"healthy", "checked_at", "lag", "error"}
+        self._state: dict[str, dict] = {}
+
+    def healthy(self, alias: str) -> bool:
+        state = self._state.get(alias)
+        if state is None or time.monotonic() - state["checked_at"] >= self.interval:
+            with self._lock:
+                # A single thread checks; the rest use the last known state
+                checking = alias in self._checking
+                self._checking.add(alias)
+            if not checking:
+                try:
+                    state = self._state[alias] = self.check(alias)
+                finally:
+                    with self._lock:
+                        self._checking.discard(alias)
+        return state is not None and state["healthy"]
+
+    def check(self, alias: str) -> dict:
+        state = {"healthy": True, "checked_at": time.monotonic(), "lag": None}
+        try:
+            connection = connections[alias]
+            if connection.vendor == "postgresql":
+                state["lag"] = self.pg_lag(connection)
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+        except Exception as exc:
+            logger.warning("replica %s unhealthy: %s", alias, exc)
+            return {**state, "healthy": False, "error": str(exc)}
+        if state["lag"] is not None and state["lag"] > self.max_lag:
+            logger.warning("replica %s lagging %.1fs", alias, state["lag"])
+            state["healthy"] = False
+        return state
+
+    def pg_lag(self, connection) -> Optional[float]:
+        # Not connection.cursor(): the pool would wait DB_POOL_TIMEOUT and a
+        # new connection the OS TCP timeout for a replica that is down
+        params = connection.get_connection_params()
+        params["connect_timeout"] = self.timeout
+        with connection.Database.connect(**params) as probe:
+            lag = probe.execute(PG_LAG_SQL).fetchone()[0]
+        return float(lag) if lag is not None else None
+
+    def choose(self, aliases: list[str]) -> str:
+        healthy = [alias for alias in aliases if self.healthy(alias)]
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            alias: {
+                "healthy": self._state[alias]["healthy"],
+                "lag_seconds": self._state[alias]["lag"],
+                "checked_seconds_ago": round(now - self._state[alias]["checked_at"], 1),
+                **(
+                    {"error": self._state[alias]["error"]}
+                    if "error" in self._state[alias]
+                    else {}
+                ),
+            }
+            for alias in replica_aliases()
+            if alias in self._state
+        }
+
+
+_health = None
+
+
+def get_replica_health() -> ReplicaHealth:
+    global _health
+    if _health is None:
+        _health = ReplicaHealth(
+            getattr(settings, "DATABASE_REPLICA_CHECK_INTERVAL", 5),
+            getattr(settings, "DATABASE_REPLICA_MAX_LAG", 5),
+            getattr(settings, "DATABASE_REPLICA_CHECK_TIMEOUT", 2),
+        )
+    return _health
+
+
+def _reset_replica_health(setting, **kwargs):
+    global _health
+    if setting.startswith("DATABASE_REPLICA"):
+        _health = None
+
+
+setting_changed.connect(_reset_replica_health)
+
+
+# Per-request routing
+
+
+class RouteState:
+    """Routing of the current request; the replica is chosen on first read."""
+
+    def __init__(self, read_only: bool, client_key: Optional[str]):
+        self.read_only = read_only
+        self.client_key = client_key
+        # Set by read_from_primary: not even related objects of instances
+        # read from a replica go to it
+        self.primary_only = False
+        self._read_alias: Optional[str] = None
+
+    @property
+    def read_alias(self) -> str:
+        if self._read_alias is None:
+            aliases = replica_aliases()
+            if not self.read_only or not aliases:
+                self._read_alias = DEFAULT_DB_ALIAS
+            elif self.client_key and is_pinned(self.client_key):
+                self._read_alias = DEFAULT_DB_ALIAS
+            else:
+                self._read_alias = get_replica_health().choose(aliases)
+        return self._read_alias
+
+    def use_primary(self) -> None:
+        self.primary_only = True
+
+
+current_route: contextvars.ContextVar[Optional[RouteState]] = contextvars.ContextVar(
+    "db_route", default=None
+)
+
+
+def read_from_primary() -> None:
+    """Sends the rest of the current request's reads to ``default``."""
+    state = current_route.get()
+    if state is not None:
+        state.use_primary()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current_route.get()
+        if state is None or not state.read_only:
+            return None
+        if state.primary_only:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # Related objects from the same database as the instance
+            return instance._state.db
+        return state.read_alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data everywhere: replicas are copies of default
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -1,35 +1,181 @@
+"""Health endpoints.
+
+- ``/health/live/``: liveness. No I/O at all: if the worker answers, it is
+  alive.
+- ``/health/ready/``: readiness. Database reachable, no pending migrations and
+  ``SELECT 1`` under ``HEALTH_READY_MAX_DB_LATENCY_MS``. The result is cached
+  per worker for ``HEALTH_READY_CACHE_TTL`` seconds, so a stream of probes
+  (Docker, nginx, the load balancer) costs one round-trip per TTL. Answers 503
+  when not ready. Includes the live stats of the worker's connection pool
+  (``DB_POOL``, Postgres only).
+- ``/health/``: public status (versions and the cached readiness instead of
+  its own database check). Staff users also get the diagnostics: readiness
+  details, connection pool, replicas, auth user cache and logging queue.
+
+The two probes are served by :class:`config.middleware.HealthProbeMiddleware`
+before any other middleware (no sessions, auth, CSRF or access log). The URLs
+in ``config.urls`` point to the same views, in case the middleware is removed.
+"""
+
+import json
+import logging
+import threading
+import time
+
 import django
 from django.conf import settings
-from django.db import connection
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
 from django.utils.timezone import now
 from drf_spectacular.utils import extend_schema
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from users.authentication import get_user_cache
+
+from .db_router import get_replica_health
+from .logging_utils import logging_stats
+
+logger = logging.getLogger("health")
+
+LIVENESS_PATH = "/health/live/"
+READINESS_PATH = "/health/ready/"
+
+_LIVE_BODY = b'{"status":"ok"}'
+
+
+def liveness(request):
+    return HttpResponse(_LIVE_BODY, content_type="application/json")
+
+
+class ReadinessCheck:
+    """Readiness result cached for ``HEALTH_READY_CACHE_TTL`` seconds."""
+
+    def __init__(self, ttl, max_latency_ms, using=DEFAULT_DB_ALIAS):
+        self.ttl = ttl
+        self.max_latency_ms = max_latency_ms
+        self.using = using
+        self._lock = threading.Lock()
+        self._result = None
+        self._expires = 0.0
+        # Migrations only change with a deploy (new process): once applied,
+        # they are not checked again.
+        self._migrated = False
+
+    def get(self):
+        if time.monotonic() < self._expires:
+            return self._result
+        with self._lock:
+            # Concurrent probes wait for the one already checking
+            if time.monotonic() >= self._expires:
+                self._result = self.check()
+                self._expires = time.monotonic() + self.ttl
+                if not self._result["ready"]:
+                    logger.warning("not ready: %s", json.dumps(self._result))
+            return self._result
+
+    def check(self):
+        connection = connections[self.using]
+        result = {"ready": True, "checked_at": now().isoformat()}
+        try:
+            start = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            latency_ms = (time.perf_counter() - start) * 1000
+            if not self._migrated:
+                executor = MigrationExecutor(connection)
+                pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+                self._migrated = not pending
+                result["pending_migrations"] = len(pending)
+            else:
+                result["pending_migrations"] = 0
+        except Exception as exc:
+            return {**result, "ready": False, "database": {"ok": False, "error": str(exc)}}
+
+        result["database"] = {"ok": True, "latency_ms": round(latency_ms, 2)}
+        if result["pending_migrations"]:
+            result["ready"] = False
+        if self.max_latency_ms and latency_ms > self.max_latency_ms:
+            result["ready"] = False
+            result["database"]["slow"] = True
+        return result
+
+
+_readiness = None
+
+
+def get_readiness():
+    global _readiness
+    if _readiness is None:
+        _readiness = ReadinessCheck(
+            getattr(settings, "HEALTH_READY_CACHE_TTL", 5),
+            getattr(settings, "HEALTH_READY_MAX_DB_LATENCY_MS", 500),
+        )
+    return _readiness
+
+
+def _reset_readiness(setting, **kwargs):
+    global _readiness
+    if setting.startswith("HEALTH_READY_"):
+        _readiness = None
+
+
+setting_changed.connect(_reset_readiness)
+
+
+def pool_stats(using=DEFAULT_DB_ALIAS):
+    """Connection pool of this worker (``DB_POOL``), or ``None`` without one.
+
+    In-memory counters of ``psycopg_pool``: no I/O, so not cached.
+    """
+    connection = connections[using]
+    pool = getattr(connection, "pool", None)
+    return pool.get_stats() if pool is not None else None
+
+
+def readiness(request):
+    result = get_readiness().get()
+    pool = pool_stats()
+    if pool is not None:
+        result = {**result, "pool": pool}
+    response = HttpResponse(
+        json.dumps(result),
+        status=200 if result["ready"] else 503,
+        content_type="application/json",
+    )
+    response["Cache-Control"] = "no-store"
+    # Logged once per check (above), not once per probe by django.request
+    response._has_been_logged = True
+    return response
+
 
 @extend_schema(tags=["Healthcheck"])
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def healthcheck(request):
-    db_ok = True
-    db_error = None
-    try:
-        connection.ensure_connection()
-    except Exception as exc:  # pragma: no cover (only on failure)
-        db_ok = False
-        db_error = str(exc)
-
+    ready = get_readiness().get()
     payload = {
         "name": "Todo API",
-        "status": "ok" if db_ok else "degraded",
+        "status": "ok" if ready["ready"] else "degraded",
         "time": now().isoformat(),
         "version": "1.0.0",
         "django": django.get_version(),
         "debug": bool(settings.DEBUG),
-        "database": {"ok": db_ok},
+        "database": ready["database"],
     }
-    if db_error:
-        payload["database"]["error"] = db_error
-
+    # Internals (hosts, errors, queue sizes) only for staff, not anonymous probes
+    if request.user.is_staff:
+        payload.update(
+            {
+                "readiness": ready,
+                "database_pool": pool_stats(),
+                "replicas": get_replica_health().status(),
+                "auth_user_cache": get_user_cache().stats(),
+                "logging": logging_stats(),
+            }
+        )
     return Response(payload)
@@ -1,7 +1,16 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+import threading
 import time
 import uuid
+import weakref
 import contextvars
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
 # Context variables used across request lifecycle
@@ -36,3 +45,178 @@ def end_timing_ms() -> float:
     if start is None:
         return 0.0
     return (time.perf_counter() - start) * 1000.0
+
+
+# Queue-based output: records are formatted and written by a background
+# thread, so a slow stdout/pipe never blocks a request.
+
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+    "request_id",
+}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line.
+
+    Keys: ts, level, logger, request_id, message, plus any ``extra`` fields
+    (the access log passes method, path, status, ...) and exc/stack if present.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class AccessLogSampler(logging.Filter):
+    """Keeps only a fraction (``rate``) of the 2xx/3xx access lines.
+
+    Errors (4xx/5xx) and records without ``status`` are always kept.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1:
+            return True
+        status = getattr(record, "status", None)
+        if not isinstance(status, int) or status >= 400:
+            return True
+        return random.random() < self.rate
+
+
+_queue_handlers: "weakref.WeakSet[QueuedStreamHandler]" = weakref.WeakSet()
+
+
+class _Listener(QueueListener):
+    def __init__(self, handler: "QueuedStreamHandler"):
+        super().__init__(handler.queue, handler.target)
+        self.owner = handler
+        self.reported_drops = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        dropped = self.owner.dropped
+        if dropped != self.reported_drops:
+            warning = logging.LogRecord(
+                "logging", logging.WARNING, __file__, 0,
+                "log queue full: %d records dropped", (dropped - self.reported_drops,), None,
+            )
+            warning.request_id = "-"
+            self.reported_drops = dropped
+            super().handle(warning)
+        super().handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # Blocking (bounded) put: the queue may be full at shutdown.
+        try:
+            self.queue.put(self._sentinel, timeout=1)
+        except queue.Full:
+            pass
+
+
+class QueuedStreamHandler(QueueHandler):
+    """Stream handler whose I/O happens on a background listener thread.
+
+    - The caller only copies the record into a bounded queue (``maxsize``).
+    - When the queue is full the record is dropped and counted (``dropped``);
+      the listener reports drops with a warning line once it catches up.
+    - Filters (request_id) run on the caller thread; the formatter runs on the
+      listener thread.
+    - The listener is started lazily per process (safe across gunicorn forks)
+      and flushed on interpreter exit.
+    """
+
+    def __init__(self, stream=None, maxsize: int = 10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream)
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+        self._listener: Optional[_Listener] = None
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        _queue_handlers.add(self)
+
+    def setFormatter(self, fmt: Optional[logging.Formatter]) -> None:
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like QueueHandler.prepare, but without formatting: merge args and
+        # render the traceback (not picklable/thread-safe), keep extras.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # After a fork the parent's thread is gone and the queue may hold
+            # its records: start over with a fresh queue.
+            if self._pid is not None:
+                self.queue = queue.Queue(self.queue.maxsize)
+            self._listener = _Listener(self)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def flush(self) -> None:
+        self.target.flush()
+
+    def close(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None and self._pid == os.getpid():
+            listener.stop()
+        self._pid = None
+        self.target.close()
+        super().close()
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "dropped": self.dropped}
+
+
+def logging_stats() -> dict:
+    """Queue depth and dropped records of the queued handlers (this process)."""
+    queued = dropped = 0
+    for handler in list(_queue_handlers):
+        stats = handler.stats()
+        queued += stats["queued"]
+        dropped += stats["dropped"]
+    return {"queued": queued, "dropped": dropped}
+
+
+@atexit.register
+def _flush_queued_handlers() -> None:  # pragma: no cover - interpreter exit
+    for handler in list(_queue_handlers):
+        handler.close()
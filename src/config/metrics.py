@@ -0,0 +1,334 @@
+"""Request metrics shared across worker processes, exposed at ``/metrics``.
+
+Each process writes its own file in ``METRICS_DIR`` (``<pid>.db``), memory
+mapped: recording a sample is a dict lookup plus a ``struct.pack_into`` under
+a lock, with no syscalls. A scrape reads every file in the directory and sums
+the values, so the numbers cover all gunicorn workers (including the ones
+that already exited). ``gunicorn.conf.py`` empties the directory when the
+master starts.
+
+Samples are stored under their Prometheus series name
+(``name{label="value",...}``). Histograms store one non-cumulative counter per
+bucket plus ``_sum`` and ``_count``; buckets are accumulated on scrape.
+
+With ``METRICS_DIR`` empty (the default outside prod) nothing is recorded and
+``/metrics`` answers 404.
+"""
+
+import mmap
+import os
+import shutil
+import struct
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name: (type, help, buckets)
+METRICS = {
+    "http_requests_total": (
+        "counter",
+        "Requests by route (URL name), method and status class.",
+        None,
+    ),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Request latency by route and method.",
+        LATENCY_BUCKETS,
+    ),
+    "http_request_db_queries": (
+        "histogram",
+        "Database queries per request by route.",
+        QUERY_BUCKETS,
+    ),
+    "http_response_size_bytes": (
+        "histogram",
+        "Response body size by route (streaming responses excluded).",
+        SIZE_BUCKETS,
+    ),
+    "tasks_list_cache_requests_total": (
+        "counter",
+        "GET /api/tasks/ response cache lookups by result.",
+        None,
+    ),
+    "auth_user_cache_requests_total": (
+        "counter",
+        "JWT user resolutions by result (hit, miss, trusted claims).",
+        None,
+    ),
+    "http_requests_throttled_total": (
+        "counter",
+        "Requests rejected with 429 by throttle scope.",
+        None,
+    ),
+}
+
+
+# Storage
+
+
+class MmapValues:
+    """float64 values by key in a memory-mapped file (one writer process).
+
+    Layout: 8-byte header with the used size, then entries of
+    ``uint32 key length | key (utf-8, padded to 8) | float64 value``. A new
+    entry is fully written before the header is updated, so readers never see
+    a partial one.
+    """
+
+    header = struct.Struct("<Q")
+    initial_size = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.initial_size:
+            self._file.truncate(self.initial_size)
+            size = self.initial_size
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._used = self.header.unpack_from(self._map)[0] or self.header.size
+        self._positions = {
+            key: offset for key, offset in _entries(self._map, self._used)
+        }
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            offset = self._positions.get(key)
+            if offset is None:
+                offset = self._append(key)
+            value = struct.unpack_from("<d", self._map, offset)[0]
+            struct.pack_into("<d", self._map, offset, value + amount)
+
+    def _append(self, key):
+        data = key.encode()
+        head = 4 + len(data)
+        head += -head % 8
+        end = self._used + head + 8
+        if end > len(self._map):
+            self._grow(end)
+        struct.pack_into(f"<I{len(data)}s", self._map, self._used, len(data), data)
+        offset = self._used + head
+        struct.pack_into("<d", self._map, offset, 0.0)
+        self._used = end
+        self.header.pack_into(self._map, 0, end)
+        self._positions[key] = offset
+        return offset
+
+    def _grow(self, needed):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _entries(buffer, used):
+    """``(key, value offset)`` of each entry up to ``used``."""
+    offset = MmapValues.header.size
+    used = min(used, len(buffer))
+    while offset + 4 <= used:
+        (length,) = struct.unpack_from("<I", buffer, offset)
+        head = 4 + length
+        head += -head % 8
+        if offset + head + 8 > used:
+            break
+        key = bytes(buffer[offset + 4 : offset + 4 + length]).decode()
+        yield key, offset + head
+        offset += head + 8
+
+
+def read_values(path):
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if len(data) < MmapValues.header.size:
+        return {}
+    used = MmapValues.header.unpack_from(data)[0]
+    return {
+        key: struct.unpack_from("<d", data, offset)[0]
+        for key, offset in _entries(data, used)
+    }
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """This process' file, or ``None`` if metrics are disabled."""
+    global _store, _store_pid
+    directory = getattr(settings, "METRICS_DIR", "")
+    if not directory:
+        return None
+    if _store_pid != os.getpid():
+        with _store_lock:
+            if _store_pid != os.getpid():
+                # First use, or first use after a fork: own file per process.
+                os.makedirs(directory, exist_ok=True)
+                _store = MmapValues(os.path.join(directory, f"{os.getpid()}.db"))
+                _store_pid = os.getpid()
+    return _store
+
+
+def _reset_store(setting, **kwargs):
+    global _store, _store_pid
+    if setting == "METRICS_DIR":
+        if _store is not None and _store_pid == os.getpid():
+            _store.close()
+        _store = _store_pid = None
+
+
+setting_changed.connect(_reset_store)
+
+
+def clear_metrics_dir(directory):
+    """Removes the samples of a previous run (gunicorn master startup)."""
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+# Recording
+
+
+def _series(name, labels, le=None):
+    pairs = [f'{k}="{_escape(v)}"' for k, v in sorted((labels or {}).items())]
+    if le is not None:
+        # Always last: the scrape groups buckets by the other labels
+        pairs.append(f'le="{le}"')
+    return f"{name}{{{','.join(pairs)}}}" if pairs else name
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def inc(name, labels=None, amount=1):
+    store = get_store()
+    if store is not None:
+        store.inc(_series(name, labels), amount)
+
+
+def observe(name, value, labels=None):
+    store = get_store()
+    if store is None:
+        return
+    buckets = METRICS[name][2]
+    index = bisect_left(buckets, value)
+    le = _format(buckets[index]) if index < len(buckets) else "+Inf"
+    store.inc(_series(f"{name}_bucket", labels, le))
+    store.inc(_series(f"{name}_sum", labels), value)
+    store.inc(_series(f"{name}_count", labels))
+
+
+def record_request(request, response, duration, queries):
+    """Called by ``RequestIDAndAccessLogMiddleware`` for every response."""
+    if get_store() is None:
+        return
+    match = getattr(request, "resolver_match", None)
+    route = match.view_name if match is not None else "<unmatched>"
+    method = request.method
+    inc(
+        "http_requests_total",
+        {"route": route, "method": method, "status": f"{response.status_code // 100}xx"},
+    )
+    labels = {"route": route, "method": method}
+    observe("http_request_duration_seconds", duration, labels)
+    observe("http_request_db_queries", queries, {"route": route})
+    if not response.streaming:
+        observe("http_response_size_bytes", len(response.content), {"route": route})
+
+
+# Exposition
+
+
+def _format(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def collect(directory):
+    """Sum of every process file in ``directory``, by series."""
+    totals = defaultdict(float)
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        if name.endswith(".db"):
+            try:
+                values = read_values(os.path.join(directory, name))
+            except OSError:
+                continue
+            for key, value in values.items():
+                totals[key] += value
+    return totals
+
+
+def render(totals):
+    """Prometheus text format (0.0.4)."""
+    by_metric = defaultdict(dict)
+    for series, value in totals.items():
+        name, _, labels = series.partition("{")
+        by_metric[name][labels.rstrip("}")] = value
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        if kind == "histogram":
+            samples = _histogram_lines(name, buckets, by_metric)
+        else:
+            samples = [
+                f"{name}{{{labels}}} {_format(value)}" if labels else f"{name} {_format(value)}"
+                for labels, value in sorted(by_metric.get(name, {}).items())
+            ]
+        if samples:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *samples]
+    return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name, buckets, by_metric):
+    counts = by_metric.get(f"{name}_count", {})
+    sums = by_metric.get(f"{name}_sum", {})
+    raw = by_metric.get(f"{name}_bucket", {})
+    lines = []
+    for labels in sorted(counts):
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0.0
+        for bound in [*map(_format, buckets), "+Inf"]:
+            cumulative += raw.get(f'{prefix}le="{bound}"', 0.0)
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {_format(cumulative)}')
+        lines.append(f"{name}_sum{{{labels}}} {_format(sums.get(labels, 0.0))}")
+        lines.append(f"{name}_count{{{labels}}} {_format(counts[labels])}")
+    return lines
+
+
+@require_GET
+def metrics_view(request):
+    """``GET /metrics``. With ``METRICS_TOKEN`` set, requires
+    ``Authorization: Bearer <token>``."""
+    directory = getattr(settings, "METRICS_DIR", "")
+    if not directory:
+        raise Http404("Metrics are disabled.")
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(render(collect(directory)), content_type=CONTENT_TYPE)
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import logging
-from django.utils.deprecation import MiddlewareMixin
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
+from . import db_instrumentation, db_router, health, metrics
 from .logging_utils import (
     request_id_var,
+    start_time_var,
     new_request_id,
     begin_timing,
     end_timing_ms,
@@ -15,25 +20,257 @@ from .logging_utils import (
 access_logger = logging.getLogger("access")
 
 
-class RequestIDAndAccessLogMiddleware(MiddlewareMixin):
+def stream_in_context(response, values, on_close=None):
+    """Sets the context variables in ``values`` around every step of a
+    streaming ``response`` and calls ``on_close`` (with them set) when the
+    stream ends.
+
+    The server iterates the body after the middleware has returned, outside
+    the context it set up: without this, queries run by the body (e.g. the
+    export cursor) would skip the request's routing and instrumentation.
+    """
+    content = response.streaming_content
+
+    def enter():
+        return [(var, var.set(value)) for var, value in values.items()]
+
+    def leave(tokens):
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+    def close():
+        if on_close is not None:
+            tokens = enter()
+            try:
+                on_close()
+            finally:
+                leave(tokens)
+
+    def sync_content():
+        try:
+            while True:
+                tokens = enter()
+                try:
+                    chunk = next(content)
+                except StopIteration:
+                    return
+                finally:
+                    leave(tokens)
+                yield chunk
+        finally:
+            close()
+
+    async def async_content():
+        try:
+            while True:
+                tokens = enter()
+                try:
+                    chunk = await anext(content)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    leave(tokens)
+                yield chunk
+        finally:
+            close()
+
+    if response.is_async:
+        response.streaming_content = async_content()
+    else:
+        response.streaming_content = sync_content()
+
+
+class HealthProbeMiddleware:
+    """Answers liveness/readiness probes before the rest of the stack.
+
+    Must be first in ``MIDDLEWARE``: probes skip security redirects, sessions,
+    auth, CSRF, the access log and metrics. Readiness is cached per worker
+    (see ``config.health``), so most probes do no I/O at all.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.path == health.LIVENESS_PATH:
+            return health.liveness(request)
+        if request.path == health.READINESS_PATH:
+            return health.readiness(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest):
+        if request.path == health.LIVENESS_PATH:
+            return health.liveness(request)
+        if request.path == health.READINESS_PATH:
+            return await sync_to_async(health.readiness)(request)
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """Routes the request's reads to a replica or to the primary.
+
+    Safe methods read from a healthy replica unless the client wrote in the
+    last ``DATABASE_REPLICA_PIN_SECONDS``; successful writes pin the client to
+    the primary (see ``config.db_router``). The client is identified by the
+    JWT user id (read without verifying the token: it only picks the database,
+    authentication happens later as usual) or by the session cookie.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Fail at startup rather than serve stale reads after writes
+        db_router.check_pin_cache()
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self.route(request)
+        token = db_router.current_route.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router.current_route.reset(token)
+        if self.should_pin(state, response):
+            db_router.pin_primary(state.client_key)
+        if response.streaming:
+            stream_in_context(response, {db_router.current_route: state})
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        state = self.route(request)
+        token = db_router.current_route.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_router.current_route.reset(token)
+        if self.should_pin(state, response):
+            await sync_to_async(db_router.pin_primary)(state.client_key)
+        if response.streaming:
+            stream_in_context(response, {db_router.current_route: state})
+        return response
+
+    def route(self, request: HttpRequest) -> db_router.RouteState:
+        return db_router.RouteState(
+            read_only=request.method in self.safe_methods,
+            client_key=self.client_key(request),
+        )
+
+    @staticmethod
+    def client_key(request: HttpRequest) -> str | None:
+        parts = request.META.get(jwt_settings.AUTH_HEADER_NAME, "").split()
+        if len(parts) == 2 and parts[0] in jwt_settings.AUTH_HEADER_TYPES:
+            try:
+                claims = jwt.decode(parts[1], options={"verify_signature": False})
+                return f"user:{claims[jwt_settings.USER_ID_CLAIM]}"
+            except (jwt.InvalidTokenError, KeyError):
+                return None
+        session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        return f"session:{session}" if session else None
+
+    @staticmethod
+    def should_pin(state: db_router.RouteState, response: HttpResponse) -> bool:
+        return bool(
+            not state.read_only
+            and state.client_key
+            and response.status_code < 400
+            and db_router.replica_aliases()
+        )
+
+
+class RequestIDAndAccessLogMiddleware:
     """Assigns a request_id and logs access line with timing, user and status.
 
     - Accepts inbound X-Request-ID if present, otherwise generates one.
     - Exposes request_id in response header for correlation.
     - Logs a single access line on response.
+    - Counts DB queries and DB time per request for the access line, and
+      reports slow queries, N+1 suspects and the query budget (see
+      ``config.db_instrumentation``).
+    - Feeds the per-route metrics served at ``/metrics`` (see ``config.metrics``).
+    - For streaming responses the body's queries are counted too, and the
+      access line (with the duration of the whole stream) is logged once the
+      body has been sent.
+
+    Sync and async capable: under ASGI it runs on the event loop instead of
+    hopping to a thread twice per request like ``MiddlewareMixin`` does.
     """
 
+    sync_capable = True
+    async_capable = True
+
     header_name = "HTTP_X_REQUEST_ID"
     response_header = "X-Request-ID"
 
-    def process_request(self, request: HttpRequest):  # type: ignore[override]
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        db_instrumentation.install()
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        self.process_request(request)
+        with db_instrumentation.track_queries() as queries:
+            response = self.get_response(request)
+        return self.finish(request, response, queries)
+
+    async def __acall__(self, request: HttpRequest):
+        self.process_request(request)
+        with db_instrumentation.track_queries() as queries:
+            response = await self.get_response(request)
+        return self.finish(request, response, queries)
+
+    def process_request(self, request: HttpRequest):
         rid = new_request_id(request.META.get(self.header_name))
         request_id_var.set(rid)
         begin_timing()
         # attach to request for app usage if needed
         setattr(request, "request_id", rid)
 
-    def process_response(self, request: HttpRequest, response: HttpResponse):  # type: ignore[override]
+    def finish(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        queries: db_instrumentation.QueryStats,
+    ):
+        if not response.streaming:
+            return self.process_response(request, response, queries)
+        response[self.response_header] = request_id_var.get()
+        stream_in_context(
+            response,
+            {
+                request_id_var: request_id_var.get(),
+                start_time_var: start_time_var.get(),
+                db_instrumentation.current_query_stats: queries,
+            },
+            on_close=lambda: self.process_response(request, response, queries),
+        )
+        return response
+
+    def process_response(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        queries: db_instrumentation.QueryStats | None = None,
+    ):
         try:
             rid = request_id_var.get()
         except Exception:
@@ -49,15 +286,33 @@ class RequestIDAndAccessLogMiddleware(MiddlewareMixin):
         user_repr = str(user) if user else "anon"
         ip = request.META.get("HTTP_X_FORWARDED_FOR") or request.META.get("REMOTE_ADDR") or "-"
         duration = end_timing_ms()
+        if queries is None:
+            queries = db_instrumentation.QueryStats()
 
         access_logger.info(
-            "method=%s path=%s status=%s user=%s ip=%s duration_ms=%.2f request_id=%s",
+            "method=%s path=%s status=%s user=%s ip=%s duration_ms=%.2f "
+            "db_queries=%s db_ms=%.2f request_id=%s",
             method,
             path,
             status,
             user_repr,
             ip,
             duration,
+            queries.count,
+            queries.duration_ms,
             rid,
+            # Same fields, structured, for the JSON formatter and the sampler
+            extra={
+                "method": method,
+                "path": path,
+                "status": status,
+                "user": user,
+                "ip": ip,
+                "duration_ms": round(duration, 2),
+                "db_queries": queries.count,
+                "db_ms": round(queries.duration_ms, 2),
+            },
         )
+        metrics.record_request(request, response, duration / 1000, queries.count)
+        db_instrumentation.report(queries, method, path)
         return response
@@ -0,0 +1,104 @@
+"""Renderer y parser JSON basados en ``msgspec`` (C).
+
+``msgspec`` codifica ``datetime``, ``date``, ``UUID`` y ``Decimal`` de forma
+nativa y escribe directamente a ``bytes``, sin pasar por ``str``. La salida es
+la del ``JSONRenderer`` de DRF (compacta, UTF-8, ``Z`` para UTC y ``\\u2028`` /
+``\\u2029`` escapados), con estas diferencias:
+
+* ``Decimal`` se emite como número exacto en lugar de pasar por ``float``.
+* Fechas y horas: ``DATETIME_FORMAT`` / ``DATE_FORMAT`` / ``TIME_FORMAT`` los
+  aplican los campos del serializer, que entregan texto, así que esa salida es
+  idéntica. Los objetos ``datetime``, ``date`` y ``time`` que llegan sin
+  formatear (un ``Response`` armado a mano) salen en ISO 8601 con los
+  microsegundos, igual que el encoder de DRF 3.16 (versiones anteriores
+  truncaban a milisegundos), pero los offsets con segundos (zonas históricas)
+  se redondean al minuto, un ``time`` con zona se codifica en lugar de fallar
+  y ``timedelta`` sale como duración ISO 8601 (``"PT90S"``) en lugar de los
+  segundos como texto (``"90.0"``). ``msgspec`` no permite cambiar cómo
+  codifica estos tipos: para el formato de DRF, formatearlos antes de
+  responder.
+
+Si ``msgspec`` no está instalado, o se pide algo que solo soporta la
+implementación de DRF (``indent``, ``UNICODE_JSON = False``, otro charset), se
+usa la implementación estándar.
+"""
+
+import json
+
+from django.conf import settings
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:  # pragma: no cover - depende del entorno
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+_fallback_encoder = JSONEncoder()
+
+
+def _enc_hook(obj):
+    """Tipos que ``msgspec`` no conoce (``ErrorDetail``, textos lazy,
+    querysets, generadores, ...): mismo tratamiento que el encoder de DRF."""
+    if isinstance(obj, (str, Promise)):
+        return str(obj)
+    return _fallback_encoder.default(obj)
+
+
+if msgspec is not None:
+    _encoder = msgspec.json.Encoder(enc_hook=_enc_hook, decimal_format="number")
+    _decoder = msgspec.json.Decoder()
+else:  # pragma: no cover
+    _encoder = _decoder = None
+
+
+def loads(data):
+    """Decodifica un documento JSON (``bytes`` o ``str``).
+
+    Los errores se informan como ``ValueError``, igual que ``json.loads``.
+    """
+    if _decoder is None:  # pragma: no cover
+        return json.loads(data)
+    try:
+        return _decoder.decode(data)
+    except msgspec.DecodeError as exc:
+        raise ValueError(str(exc)) from None
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            _encoder is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = _encoder.encode(data)
+        # Igual que DRF: JSON que sea un subconjunto estricto de JavaScript.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if _decoder is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return _decoder.decode(stream.read())
+        except msgspec.DecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -19,6 +19,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Liveness/readiness sin pasar por el resto del stack (ver config.health)
+    "config.middleware.HealthProbeMiddleware",
+    # Lecturas a réplicas (si hay) salvo tras una escritura (ver config.db_router)
+    "config.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
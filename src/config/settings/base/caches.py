@@ -0,0 +1,5 @@
+from .paths import env
+
+# CACHE_URL con el formato de django-environ: locmemcache:// (por defecto, por
+# proceso), redis://host:6379/1, filecache:///ruta, dbcache://tabla, ...
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
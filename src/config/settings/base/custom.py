@@ -1,11 +1,36 @@
+from .paths import env
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
+    # JSON con msgspec (ver config.renderers); los renderers van en dev/prod/test
+    "DEFAULT_PARSER_CLASSES": (
+        "config.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "config.settings.base.schema.CustomAutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    # Token bucket por usuario (o IP) y scope, ver config.throttling
+    "DEFAULT_THROTTLE_CLASSES": ("config.throttling.TokenBucketThrottle",),
+    "DEFAULT_THROTTLE_RATES": {
+        "read": env.str("THROTTLE_RATE_READ", default="1200/min"),
+        "write": env.str("THROTTLE_RATE_WRITE", default="300/min"),
+        "search": env.str("THROTTLE_RATE_SEARCH", default="120/min"),
+        "auth": env.str("THROTTLE_RATE_AUTH", default="10/min"),
+        "bulk": env.str("THROTTLE_RATE_BULK", default="20/min"),
+    },
+    # Proxies delante de la app (nginx = 1, el default en prod): la IP de los
+    # anónimos es la que agregó el último proxy a X-Forwarded-For. Con 0 se usa
+    # REMOTE_ADDR; nunca el header completo, que lo elige el cliente.
+    "NUM_PROXIES": env.int("NUM_PROXIES", default=0),
+}
+
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.TokenObtainPairSerializer",
 }
 
 DJOSER = {
@@ -36,3 +61,71 @@ SPECTACULAR_SETTINGS = {
         "config.settings.base.schema.retag_endpoints",
     ],
 }
+
+# Health: /health/ready/ se cachea por worker estos segundos y falla si
+# SELECT 1 tarda más que esto (ms; 0 = sin límite). Ver config.health.
+HEALTH_READY_CACHE_TTL = env.float("HEALTH_READY_CACHE_TTL", default=5)
+HEALTH_READY_MAX_DB_LATENCY_MS = env.int("HEALTH_READY_MAX_DB_LATENCY_MS", default=500)
+
+# Base de datos: instrumentación por petición (ver config.db_instrumentation).
+# Consultas más lentas que esto (ms) se loguean en "db.slow"; 0 = no.
+DB_SLOW_QUERY_MS = env.int("DB_SLOW_QUERY_MS", default=200)
+# La misma consulta repetida estas veces en una petición se loguea como
+# posible N+1 en "db.n_plus_one"; 0 = no.
+DB_N_PLUS_ONE_THRESHOLD = env.int("DB_N_PLUS_ONE_THRESHOLD", default=10)
+# Máximo de consultas por petición; 0 = sin límite. Excederlo loguea un
+# warning, o lanza QueryBudgetExceeded con DB_QUERY_STRICT (ver settings.test).
+DB_QUERY_BUDGET = env.int("DB_QUERY_BUDGET", default=0)
+DB_QUERY_STRICT = env.bool("DB_QUERY_STRICT", default=False)
+
+# Métricas Prometheus en /metrics (ver config.metrics): directorio con un
+# archivo por worker. Vacío = desactivadas (activadas por defecto en prod).
+METRICS_DIR = env.str("METRICS_DIR", default="")
+# Si se define, /metrics exige "Authorization: Bearer <token>"
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")
+
+# Throttling (ver config.throttling): desactivado por defecto (activado en
+# prod). Los buckets viven en un archivo mapeado en memoria compartido por los
+# workers; vacío = memoria de cada proceso.
+THROTTLE_ENABLED = env.bool("THROTTLE_ENABLED", default=False)
+THROTTLE_STORE_PATH = env.str("THROTTLE_STORE_PATH", default="")
+THROTTLE_STORE_SLOTS = env.int("THROTTLE_STORE_SLOTS", default=65536)
+
+# Usuarios: cache de usuarios autenticados por JWT (ver users.authentication).
+# 0 = desactivada (activada por defecto en prod). El TTL es la demora máxima
+# en ver un cambio de usuario desde procesos que no comparten el archivo de
+# sellos (vacío = memoria de cada proceso): mantenerlo corto.
+AUTH_USER_CACHE_SIZE = env.int("AUTH_USER_CACHE_SIZE", default=0)
+AUTH_USER_CACHE_TIMEOUT = env.int("AUTH_USER_CACHE_TIMEOUT", default=60)
+AUTH_USER_CACHE_STAMPS_PATH = env.str("AUTH_USER_CACHE_STAMPS_PATH", default="")
+AUTH_USER_CACHE_STAMPS_SLOTS = env.int("AUTH_USER_CACHE_STAMPS_SLOTS", default=65536)
+AUTH_TRUST_TOKEN_CLAIMS = env.bool("AUTH_TRUST_TOKEN_CLAIMS", default=False)
+
+# Tareas: paginación (ver tasks.pagination)
+TASKS_MAX_PAGE_SIZE = env.int("TASKS_MAX_PAGE_SIZE", default=1000)
+TASKS_ESTIMATED_COUNT_CAP = env.int("TASKS_ESTIMATED_COUNT_CAP", default=10000)
+
+# Tareas: operaciones en lote (POST /api/tasks/bulk/)
+TASKS_BULK_MAX_BATCH_SIZE = env.int("TASKS_BULK_MAX_BATCH_SIZE", default=500)
+
+# Tareas: listado y detalle con vistas async nativas (tasks.async_views). Solo
+# tiene sentido bajo ASGI (ver README, "Despliegue ASGI").
+TASKS_ASYNC_VIEWS = env.bool("TASKS_ASYNC_VIEWS", default=False)
+
+# Tareas: exportación en streaming (GET /api/tasks/export/), filas por bloque
+TASKS_EXPORT_CHUNK_SIZE = env.int("TASKS_EXPORT_CHUNK_SIZE", default=2000)
+
+# Tareas: importación masiva (POST /api/tasks/import/, manage.py import_tasks)
+TASKS_IMPORT_BATCH_SIZE = env.int("TASKS_IMPORT_BATCH_SIZE", default=1000)
+TASKS_IMPORT_USE_COPY = env.bool("TASKS_IMPORT_USE_COPY", default=True)
+TASKS_IMPORT_MAX_ERRORS = env.int("TASKS_IMPORT_MAX_ERRORS", default=100)
+
+# Tareas: cache de respuestas del listado (ver tasks.cache). Vacío = desactivada
+# (activada por defecto en prod).
+TASKS_LIST_CACHE_BACKEND = env.str("TASKS_LIST_CACHE_BACKEND", default="")
+TASKS_LIST_CACHE_TIMEOUT = env.int("TASKS_LIST_CACHE_TIMEOUT", default=300)
+TASKS_LIST_CACHE_MAX_BYTES = env.int("TASKS_LIST_CACHE_MAX_BYTES", default=32 * 2**20)
+TASKS_LIST_CACHE_ALIAS = env.str("TASKS_LIST_CACHE_ALIAS", default="default")
+
+# Tareas: feed de cambios (GET /api/tasks/changes/)
+TASKS_TOMBSTONE_RETENTION_DAYS = env.int("TASKS_TOMBSTONE_RETENTION_DAYS", default=30)
@@ -1,3 +1,5 @@
+import copy
+
 from .paths import BASE_DIR, env
 
 # DATABASE_URL or fallback to SQLite
@@ -13,6 +15,7 @@ is_pg = engine.endswith(("postgresql", "postgresql_psycopg2"))
 
 # Simple, sensible defaults; override via env if needed
 db["ATOMIC_REQUESTS"] = env.bool("DB_ATOMIC_REQUESTS", default=is_pg)
+# No effect on Postgres with DB_POOL (the pool reuses connections)
 db["CONN_MAX_AGE"] = env.int("DB_CONN_MAX_AGE", default=60 if is_pg else 0)
 
 if is_pg:
@@ -33,8 +36,64 @@ if is_pg:
     if statement_timeout_ms:
         options["options"] = f"-c statement_timeout={statement_timeout_ms}"
 
+    # Django's native pool (psycopg 3 + psycopg_pool), one per worker: total
+    # connections are workers * DB_POOL_MAX_SIZE. Replaces persistent
+    # connections (Django requires CONN_MAX_AGE=0 with a pool).
+    if env.bool("DB_POOL", default=True):
+        options["pool"] = {
+            "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DB_POOL_MAX_SIZE", default=10),
+            # Seconds to wait for a free connection before failing
+            "timeout": env.float("DB_POOL_TIMEOUT", default=10),
+            # Connections are replaced after this long (s)...
+            "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=3600),
+            # ...and the ones above min_size once idle this long
+            "max_idle": env.float("DB_POOL_MAX_IDLE", default=600),
+        }
+        db["CONN_MAX_AGE"] = 0
+
+    # Server-side parameter binding: psycopg prepares every query repeated
+    # DB_PREPARE_THRESHOLD times on a connection (in practice the task list,
+    # detail and version queries) and reuses its plan. Not compatible with
+    # PgBouncer in transaction mode: use DB_SERVER_SIDE_BINDING=false there.
+    if env.bool("DB_SERVER_SIDE_BINDING", default=True):
+        options["server_side_binding"] = True
+        options["prepare_threshold"] = env.int("DB_PREPARE_THRESHOLD", default=5)
+
     if options:
         db.setdefault("OPTIONS", {}).update(options)
 
 
+# Read replicas (see config.db_router): DATABASE_REPLICA_URLS holds one or
+# more comma-separated URLs. Aliases replica_1, replica_2, ...; mirrors of
+# default in tests.
+DATABASE_REPLICAS = []
+for _i, _url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), start=1):
+    _replica = env.db_url_config(_url)
+    if _replica.get("ENGINE") == engine:
+        # Same pool, SSL and prepared statements as default
+        _replica["OPTIONS"] = {
+            **copy.deepcopy(db.get("OPTIONS", {})),
+            **_replica.get("OPTIONS", {}),
+        }
+    _replica["CONN_MAX_AGE"] = db["CONN_MAX_AGE"]
+    _replica["TEST"] = {"MIRROR": "default"}
+    DATABASES[f"replica_{_i}"] = _replica
+    DATABASE_REPLICAS.append(f"replica_{_i}")
+
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+# Seconds a client reads from default after writing. Pins are stored in this
+# cache, which must be shared by all workers (CACHE_URL): with replicas
+# configured, a per-process cache refuses to start (see config.db_router).
+DATABASE_REPLICA_PIN_SECONDS = env.int("DATABASE_REPLICA_PIN_SECONDS", default=5)
+DATABASE_REPLICA_PIN_CACHE = env.str("DATABASE_REPLICA_PIN_CACHE", default="default")
+# Per-worker health check interval for each replica (seconds) and max lag
+DATABASE_REPLICA_CHECK_INTERVAL = env.float(
+    "DATABASE_REPLICA_CHECK_INTERVAL", default=5
+)
+DATABASE_REPLICA_MAX_LAG = env.float("DATABASE_REPLICA_MAX_LAG", default=5)
+# Connect timeout of the Postgres health check (seconds, whole): the request
+# that runs it waits at most this long for a replica that is down
+DATABASE_REPLICA_CHECK_TIMEOUT = env.int("DATABASE_REPLICA_CHECK_TIMEOUT", default=2)
+
 AUTH_USER_MODEL = "users.User"
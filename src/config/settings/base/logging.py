@@ -2,12 +2,22 @@ from .paths import env
 
 LOG_LEVEL = env("LOG_LEVEL", default="INFO").upper()
 ACCESS_LOG_LEVEL = env("ACCESS_LOG_LEVEL", default="INFO").upper()
+LOG_FORMATTER = env("LOG_FORMATTER", default="simple")
+# Los logs se escriben desde un hilo por worker (config.logging_utils): si la
+# cola se llena se descartan registros y se cuentan (ver /health/).
+LOG_QUEUE_SIZE = env.int("LOG_QUEUE_SIZE", default=10000)
+# Fracción de líneas de acceso 2xx/3xx que se escriben (los errores, siempre)
+ACCESS_LOG_SAMPLE_RATE = env.float("ACCESS_LOG_SAMPLE_RATE", default=1.0)
 
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "filters": {
         "request_id": {"()": "config.logging_utils.RequestIDFilter"},
+        "access_sampler": {
+            "()": "config.logging_utils.AccessLogSampler",
+            "rate": ACCESS_LOG_SAMPLE_RATE,
+        },
     },
     "formatters": {
         # Simple para desarrollo local
@@ -15,11 +25,9 @@ LOGGING = {
             "format": "%(levelname)s %(asctime)s %(name)s [req=%(request_id)s]: %(message)s",
             "style": "%",
         },
-        # Formato tipo JSON (una línea) adecuado para agregadores
-        "json_line": {
-            "format": "level=%(levelname)s ts=%(asctime)s logger=%(name)s req=%(request_id)s message=%(message)s",
-            "style": "%",
-        },
+        # JSON (un objeto por línea) para agregadores; incluye request_id y
+        # los campos del access log (method, path, status, duration_ms, ...)
+        "json_line": {"()": "config.logging_utils.JSONFormatter"},
         # Access log uniforme
         "access": {
             "format": "%(message)s",
@@ -27,13 +35,17 @@ LOGGING = {
     },
     "handlers": {
         "console": {
-            "class": "logging.StreamHandler",
-            "formatter": env("LOG_FORMATTER", default="simple"),
+            "class": "config.logging_utils.QueuedStreamHandler",
+            "maxsize": LOG_QUEUE_SIZE,
+            "formatter": LOG_FORMATTER,
             "filters": ["request_id"],
         },
         "access_console": {
-            "class": "logging.StreamHandler",
-            "formatter": "access",
+            "class": "config.logging_utils.QueuedStreamHandler",
+            "maxsize": LOG_QUEUE_SIZE,
+            # Con LOG_FORMATTER=json_line el access log también sale en JSON
+            "formatter": "json_line" if LOG_FORMATTER == "json_line" else "access",
+            "filters": ["request_id"],
         },
     },
     "root": {
@@ -44,6 +56,7 @@ LOGGING = {
         # Access log separado, útil para Nginx/ELB o dashboards
         "access": {
             "handlers": ["access_console"],
+            "filters": ["access_sampler"],
             "level": ACCESS_LOG_LEVEL,
             "propagate": False,
         },
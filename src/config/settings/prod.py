@@ -1,4 +1,6 @@
 import importlib as _importlib
+import os
+import tempfile
 
 _base = _importlib.import_module("config.settings.base")
 # Export all uppercase base settings
@@ -23,7 +25,38 @@ SECURE_HSTS_INCLUDE_SUBDOMAINS = env.bool(
 )
 SECURE_HSTS_PRELOAD = env.bool("SECURE_HSTS_PRELOAD", default=False)
 
+# Task list response cache (bounded in-process LRU unless overridden)
+TASKS_LIST_CACHE_BACKEND = env.str(
+    "TASKS_LIST_CACHE_BACKEND", default="tasks.cache.LocalLRUListCache"
+)
+
+# JWT user cache (bounded in-process LRU; 0 disables it)
+AUTH_USER_CACHE_SIZE = env.int("AUTH_USER_CACHE_SIZE", default=10000)
+# Per-user change stamps in a file mapped by every worker, so that saving a
+# user evicts it everywhere on this host
+AUTH_USER_CACHE_STAMPS_PATH = env.str(
+    "AUTH_USER_CACHE_STAMPS_PATH",
+    default=os.path.join(tempfile.gettempdir(), "todo-api-user-stamps.bin"),
+)
+
+# Prometheus metrics, one mmap'd file per worker (emptied by gunicorn.conf.py)
+METRICS_DIR = env.str(
+    "METRICS_DIR",
+    default=os.path.join(tempfile.gettempdir(), "todo-api-metrics"),
+)
+
+# Throttling, buckets in a file mapped by every worker
+THROTTLE_ENABLED = env.bool("THROTTLE_ENABLED", default=True)
+THROTTLE_STORE_PATH = env.str(
+    "THROTTLE_STORE_PATH",
+    default=os.path.join(tempfile.gettempdir(), "todo-api-throttle.bin"),
+)
+
+# nginx sits in front: anonymous clients are keyed on the address it appends
+# to X-Forwarded-For, not on what the client sent
+REST_FRAMEWORK["NUM_PROXIES"] = env.int("NUM_PROXIES", default=1)
+
 # Browsable API disabled in production
 REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
-    "rest_framework.renderers.JSONRenderer",
+    "config.renderers.FastJSONRenderer",
 ]
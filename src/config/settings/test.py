@@ -1,3 +1,4 @@
+import copy
 import importlib as _importlib
 
 _base = _importlib.import_module("config.settings.base")
@@ -6,6 +7,8 @@ for _k, _v in _base.__dict__.items():
         globals()[_k] = _v
 
 REST_FRAMEWORK = globals()["REST_FRAMEWORK"]
+DATABASES = globals()["DATABASES"]
+env = getattr(_base, "env")
 
 # Testing overrides
 DEBUG = False
@@ -14,6 +17,26 @@ PASSWORD_HASHERS = [
 ]
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
+# Strict query budget (opt-in): with DB_QUERY_STRICT=true a request running
+# more than DB_QUERY_BUDGET queries raises QueryBudgetExceeded and the test
+# fails. Tests that need more can use override_settings(DB_QUERY_BUDGET=...).
+DB_QUERY_STRICT = env.bool("DB_QUERY_STRICT", default=False)
+DB_QUERY_BUDGET = env.int("DB_QUERY_BUDGET", default=15) if DB_QUERY_STRICT else 0
+
 REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
-    "rest_framework.renderers.JSONRenderer",
+    "config.renderers.FastJSONRenderer",
 ]
+
+# Stand-in replica for the config.db_router tests: a second, independent
+# SQLite database (not a mirror), so tests can tell which one answered.
+# Routing stays off unless a test sets DATABASE_REPLICAS=["replica"].
+# New dict: DATABASES is shared with config.settings.base, and test discovery
+# imports this module under the dev settings too.
+DATABASES = {
+    **copy.deepcopy(DATABASES),
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
+}
+DATABASE_REPLICAS = []
@@ -0,0 +1,60 @@
+"""Test helpers shared by the apps' test suites.
+
+With Postgres, ``ATOMIC_REQUESTS`` is on by default (``DB_ATOMIC_REQUESTS``).
+Inside a ``TestCase`` each request's transaction is then a savepoint whose
+``SAVEPOINT``/``RELEASE SAVEPOINT`` land in ``connection.queries``. In
+production the same transaction is a ``BEGIN``/``COMMIT`` that psycopg sends
+on its own, outside any cursor, so it never counts as a query. The helpers
+here drop savepoints from the counts, so query budgets hold on every backend.
+"""
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework import test
+
+SAVEPOINT_SQL = ("SAVEPOINT ", "RELEASE SAVEPOINT ", "ROLLBACK TO SAVEPOINT ")
+
+
+class CaptureStatementsContext(CaptureQueriesContext):
+    """``CaptureQueriesContext`` without savepoint statements."""
+
+    @property
+    def captured_queries(self):
+        return [
+            query
+            for query in super().captured_queries
+            if not query["sql"].startswith(SAVEPOINT_SQL)
+        ]
+
+
+class _AssertNumStatementsContext(CaptureStatementsContext):
+    def __init__(self, test_case, num, connection):
+        self.test_case = test_case
+        self.num = num
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        queries = "\n".join(
+            f"{i}. {query['sql']}" for i, query in enumerate(self.captured_queries, start=1)
+        )
+        self.test_case.assertEqual(
+            executed,
+            self.num,
+            f"{executed} queries executed, {self.num} expected\n"
+            f"Captured queries were:\n{queries}",
+        )
+
+
+class APITestCase(test.APITestCase):
+    """``APITestCase`` whose ``assertNumQueries`` leaves savepoints out."""
+
+    def assertNumQueries(self, num, func=None, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+        context = _AssertNumStatementsContext(self, num, connections[using])
+        if func is None:
+            return context
+        with context:
+            func(*args, **kwargs)
@@ -0,0 +1,211 @@
+"""Token-bucket throttling per client and scope, shared across workers.
+
+Every request takes a token from the bucket of its client (user id, or IP for
+anonymous requests) in its scope:
+
+- ``auth``: token endpoints (``jwt/create``, ``refresh``, ``verify``) and
+  djoser writes (registration, activation, password reset), by IP.
+- ``bulk``: views or actions with ``throttle_scope = "bulk"`` (import, export,
+  ``bulk``, ``bulk-action``).
+- ``search``: safe methods with the search query param.
+- ``read`` / ``write``: every other safe / unsafe request.
+
+Rates come from ``REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]`` in DRF's
+``"<n>/<period>"`` format: a bucket holds ``n`` tokens (the burst) and refills
+at ``n`` per period. A scope without a rate is not throttled, and nothing is
+with ``THROTTLE_ENABLED`` off (the default outside prod).
+
+Buckets live in :class:`TokenBucketStore`, a hash table memory-mapped from
+``THROTTLE_STORE_PATH`` that every worker maps: a check is a hash plus two
+``struct`` calls on shared memory, with no locks and no syscalls. Concurrent
+updates of the same bucket from two workers may lose one of them (the client
+gets an extra token); that is the price of not locking and is fine for rate
+limiting. With the path empty the table is anonymous memory, per process.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class TokenBucketStore:
+    """Token buckets by key in a fixed-size, memory-mapped hash table.
+
+    Layout: 16-byte header (magic, slot count), then one slot per bucket of
+    ``uint64 key hash | float64 tokens | float64 updated at``. A key probes
+    ``probe`` consecutive slots; when all of them belong to other keys it takes
+    the one idle the longest (an idle bucket refills, so evicting it only
+    forgets a full bucket).
+    """
+
+    header = struct.Struct("<8sQ")
+    slot = struct.Struct("<Qdd")
+    magic = b"TKBUCKT1"
+    probe = 8
+
+    def __init__(self, path: str, slots: int):
+        self.path = path
+        self.slots = slots
+        if not path:
+            self._map = mmap.mmap(-1, self._size(slots))
+            self.header.pack_into(self._map, 0, self.magic, slots)
+            return
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            existing = os.pread(fd, self.header.size, 0)
+            if len(existing) == self.header.size:
+                magic, file_slots = self.header.unpack(existing)
+                if magic == self.magic and file_slots:
+                    # Created by another worker: its size wins
+                    self.slots = file_slots
+            if os.fstat(fd).st_size < self._size(self.slots):
+                os.ftruncate(fd, self._size(self.slots))
+            self._map = mmap.mmap(fd, self._size(self.slots))
+        finally:
+            os.close(fd)
+        # Idempotent: every worker writes the same header
+        self.header.pack_into(self._map, 0, self.magic, self.slots)
+
+    @classmethod
+    def _size(cls, slots: int) -> int:
+        return cls.header.size + slots * cls.slot.size
+
+    @staticmethod
+    def key_hash(key: str) -> int:
+        # Not hash(): it is randomized per process. 0 marks a free slot.
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1
+
+    def _find(self, key_hash: int) -> int:
+        start = key_hash % self.slots
+        victim, oldest = None, float("inf")
+        for i in range(self.probe):
+            offset = self.header.size + (start + i) % self.slots * self.slot.size
+            stored, _, updated = self.slot.unpack_from(self._map, offset)
+            if stored in (key_hash, 0):
+                return offset
+            if updated < oldest:
+                victim, oldest = offset, updated
+        return victim
+
+    def consume(
+        self, key: str, capacity: float, rate: float, now: Optional[float] = None
+    ) -> float:
+        """Takes a token from ``key``'s bucket (``capacity`` tokens, refilled
+        at ``rate`` per second). Returns 0 if there was one, otherwise the
+        seconds until there will be."""
+        now = time.time() if now is None else now
+        key_hash = self.key_hash(key)
+        offset = self._find(key_hash)
+        stored, tokens, updated = self.slot.unpack_from(self._map, offset)
+        if stored != key_hash:
+            tokens, updated = capacity, now
+        # Wall clock, shared by every process; ignore it going backwards
+        tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / rate
+        self.slot.pack_into(self._map, offset, key_hash, tokens, now)
+        return wait
+
+    def close(self):
+        self._map.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> TokenBucketStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TokenBucketStore(
+                    getattr(settings, "THROTTLE_STORE_PATH", ""),
+                    getattr(settings, "THROTTLE_STORE_SLOTS", 65536),
+                )
+    return _store
+
+
+def _reset_store(setting, **kwargs):
+    global _store
+    if setting.startswith("THROTTLE_STORE"):
+        if _store is not None:
+            _store.close()
+        _store = None
+
+
+setting_changed.connect(_reset_store)
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """``"100/min"`` -> ``(100, 60)``: tokens and refill period in seconds."""
+    num, period = rate.split("/")
+    return int(num), PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle over :class:`TokenBucketStore` (see the module docstring)."""
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_scope(self, request, view) -> str:
+        # Imported here: APIView loads the throttle classes when it is defined
+        from djoser.views import UserViewSet
+        from rest_framework_simplejwt.views import TokenViewBase
+
+        if isinstance(view, TokenViewBase):
+            return "auth"
+        if isinstance(view, UserViewSet) and request.method not in SAFE_METHODS:
+            return "auth"
+        scope = getattr(view, "throttle_scope", None)
+        if scope:
+            return scope
+        if request.method in SAFE_METHODS:
+            if request.query_params.get(api_settings.SEARCH_PARAM):
+                return "search"
+            return "read"
+        return "write"
+
+    def get_client(self, request) -> str:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view) -> bool:
+        if not getattr(settings, "THROTTLE_ENABLED", False):
+            return True
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if not rate:
+            return True
+        capacity, period = parse_rate(rate)
+        self.wait_seconds = get_store().consume(
+            f"{scope}:{self.get_client(request)}", capacity, capacity / period
+        )
+        if self.wait_seconds:
+            metrics.inc("http_requests_throttled_total", {"scope": scope})
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
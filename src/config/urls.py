@@ -19,10 +19,14 @@ from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
-from .health import healthcheck
+from .health import healthcheck, liveness, readiness
+from .metrics import metrics_view
 
 urlpatterns = [
     path("health/", healthcheck, name="healthcheck"),
+    path("health/live/", liveness, name="health-live"),
+    path("health/ready/", readiness, name="health-ready"),
+    path("metrics", metrics_view, name="metrics"),
     path("admin/", admin.site.urls),
     # Ahora apuntamos a nuestro nuevo archivo de URLs para la autenticación
     path("api/auth/", include("users.urls")),
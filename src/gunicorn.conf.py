@@ -0,0 +1,18 @@
+"""Configuración de gunicorn (se carga sola desde ``/app/src``).
+
+Los workers escriben sus métricas en ``METRICS_DIR`` (ver ``config.metrics``);
+al arrancar el master se vacía el directorio para no sumar las de la
+ejecución anterior.
+"""
+
+import os
+
+
+def on_starting(server):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.prod")
+
+    from django.conf import settings
+
+    from config.metrics import clear_metrics_dir
+
+    clear_metrics_dir(settings.METRICS_DIR)
@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.db import transaction
 
+from .changes import delete_tasks, next_change_seq
 from .models import Task
+from .signals import notify_tasks_changed
+from .stats import StatsDelta
 
 
 @admin.register(Task)
@@ -17,3 +21,31 @@ class TaskAdmin(admin.ModelAdmin):
     list_filter = ("priority", "status", "due_date", "created_at")
     search_fields = ("title", "description", "owner__email")
     ordering = ("-created_at",)
+
+    # Las escrituras del admin también invalidan la cache del listado,
+    # actualizan las estadísticas y los borrados dejan tombstone para el feed
+    # de cambios.
+
+    def save_model(self, request, obj, form, change):
+        owners = {obj.owner_id}
+        if change and "owner" in form.changed_data:
+            owners.add(form.initial.get("owner"))
+        delta = StatsDelta()
+        with transaction.atomic():
+            obj.change_seq = next_change_seq(owners)[obj.owner_id]
+            if change:
+                # `obj` ya trae los valores del formulario
+                delta.add_task(Task.objects.select_for_update().get(pk=obj.pk), -1)
+            super().save_model(request, obj, form, change)
+            delta.add_task(obj)
+            delta.apply()
+        notify_tasks_changed(owners)
+
+    def delete_model(self, request, obj):
+        delete_tasks(Task.objects.filter(pk=obj.pk), owner_ids={obj.owner_id})
+        notify_tasks_changed({obj.owner_id})
+
+    def delete_queryset(self, request, queryset):
+        owners = set(queryset.values_list("owner_id", flat=True).distinct())
+        delete_tasks(queryset, owner_ids=owners)
+        notify_tasks_changed(owners)
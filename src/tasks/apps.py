@@ -1,6 +1,28 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_migrate, pre_delete
+
+
+def _ensure_search_triggers(sender, using, **kwargs):
+    # Las migraciones que reconstruyen tasks_task en SQLite borran los triggers
+    # de FTS5; se reponen al terminar cada `migrate`.
+    from .search import ensure_sqlite_search_triggers
+
+    connection = connections[using]
+    if connection.vendor == "sqlite":
+        ensure_sqlite_search_triggers(connection)
 
 
 class TasksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tasks"
+
+    def ready(self):
+        from .cache import bump_list_versions
+        from .changes import record_owner_tombstones
+        from .signals import tasks_changed
+
+        post_migrate.connect(_ensure_search_triggers, sender=self)
+        tasks_changed.connect(bump_list_versions)
+        pre_delete.connect(record_owner_tombstones, sender=settings.AUTH_USER_MODEL)
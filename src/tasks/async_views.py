@@ -0,0 +1,349 @@
+"""Listado, alta, detalle, modificación y baja de tareas como vistas ``async``.
+
+Bajo ASGI Django ejecuta cada vista síncrona (todas las de DRF) con
+``sync_to_async``: la petición entera (autenticación, validación,
+serialización y render) ocupa un hilo aparte y paga los saltos entre ese hilo
+y el event loop. Con ``TASKS_ASYNC_VIEWS`` (ver ``tasks.urls``)
+``/api/tasks/`` y ``/api/tasks/<id>/`` se resuelven con estas vistas, que
+corren en el event loop:
+
+* Autenticación con :meth:`CachedJWTAuthentication.aauthenticate` y los
+  mismos throttles del viewset.
+* Lecturas con el ORM async (``afirst``, ``aaggregate``, ``async for``); los
+  filtros, la búsqueda, el orden, la paginación por keyset, los ``ETag`` y la
+  cache del listado son los mismos del viewset.
+* Escrituras: el cuerpo se valida en el event loop y la transacción
+  (tarea + contadores, ver ``tasks.stats``) se ejecuta con un único
+  ``sync_to_async``, porque el ORM async no soporta transacciones.
+
+El ORM async de Django todavía ejecuta cada consulta en un hilo; lo que se
+ahorra es el resto de la petición (autenticación con la cache de usuarios,
+validación, serialización y render), que ya no ocupa ese hilo.
+
+Lo que solo resuelve el viewset (``?pagination=page``, ``?count=estimate``,
+``If-Match`` en escrituras, formatos distintos de JSON, cuerpos que no son
+JSON, ``OPTIONS``) se delega en :class:`TaskViewSet`, con las mismas
+respuestas.
+"""
+
+from asgiref.sync import sync_to_async
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from config.renderers import FastJSONRenderer, loads
+from users.authentication import CachedJWTAuthentication
+
+from .cache import (
+    CACHE_HEADER,
+    aget_list_version,
+    cache_entry,
+    cached_response,
+    get_list_cache,
+    list_cache_key,
+)
+from .conditional import (
+    detail_validators,
+    evaluate_preconditions,
+    has_preconditions,
+    list_validators,
+    set_validator_headers,
+)
+from .models import Task
+from .pagination import KeysetPagination, TaskPagination
+from .search import aget_search_backend
+from .serializers import TaskRowSerializer, TaskSerializer
+from .views import TaskViewSet, create_task, destroy_task, update_task
+
+JSON_MEDIA_RANGES = ("*/*", "application/*", "application/json")
+
+
+class AsyncTaskView(View):
+    """Base: autenticación, errores con el formato de DRF y delegación en el
+    viewset."""
+
+    authentication_class = CachedJWTAuthentication
+    trust_token_claims = TaskViewSet.trust_token_claims
+    renderer_class = FastJSONRenderer
+    # Acciones de TaskViewSet por método
+    viewset_actions = {}
+    viewset_view = None
+
+    # Mismos filtros, búsqueda y orden que el viewset
+    filter_backends = TaskViewSet.filter_backends
+    filterset_class = TaskViewSet.filterset_class
+    search_fields = TaskViewSet.search_fields
+    ordering_fields = TaskViewSet.ordering_fields
+    ordering = TaskViewSet.ordering
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Autenticación por token, sin cookies: como en DRF, sin CSRF.
+        view = csrf_exempt(super().as_view(**initkwargs))
+        # Django rechaza ATOMIC_REQUESTS (activo por defecto en Postgres) en
+        # vistas async: las escrituras nativas ya usan su propia transacción y
+        # las delegadas se envuelven en delegate().
+        for alias in connections:
+            view = transaction.non_atomic_requests(using=alias)(view)
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        if not self.is_native(request):
+            return await sync_to_async(self.delegate)(request, *args, **kwargs)
+        authenticator = self.authentication_class()
+        try:
+            result = await authenticator.aauthenticate(request, self)
+            if result is None:
+                raise exceptions.NotAuthenticated()
+            self.request = self.drf_request(request, result[0])
+            self.check_throttles(self.request)
+            handler = getattr(self, request.method.lower())
+            return await handler(self.request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc, authenticator, request)
+
+    def delegate(self, request, *args, **kwargs):
+        """Atiende la petición con el viewset, en una transacción por base con
+        ``ATOMIC_REQUESTS`` como haría Django con la vista síncrona."""
+        view = self.viewset_view
+        for alias, settings_dict in connections.settings.items():
+            if settings_dict["ATOMIC_REQUESTS"]:
+                view = transaction.atomic(using=alias)(view)
+        return view(request, *args, **kwargs)
+
+    def is_native(self, request):
+        """``True`` si la petición se atiende aquí; si no, va al viewset."""
+        if request.method.lower() not in self.viewset_actions:
+            return False
+        fmt = request.GET.get(api_settings.URL_FORMAT_OVERRIDE)
+        if fmt not in (None, "json"):
+            return False
+        accept = [
+            media.split(";")[0].strip()
+            for media in request.headers.get("Accept", "*/*").split(",")
+        ]
+        return "text/html" not in accept and any(
+            media in JSON_MEDIA_RANGES for media in accept
+        )
+
+    def drf_request(self, request, user):
+        """``Request`` de DRF para reutilizar filtros, paginación, validadores
+        y serializers; no vuelve a autenticar."""
+        drf_request = Request(request, parsers=[], authenticators=[])
+        drf_request.user = user
+        drf_request.accepted_renderer = self.renderer_class()
+        drf_request.accepted_media_type = drf_request.accepted_renderer.media_type
+        return drf_request
+
+    def check_throttles(self, request):
+        """Mismos throttles que el viewset (``config.throttling`` no hace I/O)."""
+        durations = [
+            throttle.wait()
+            for throttle in (cls() for cls in api_settings.DEFAULT_THROTTLE_CLASSES)
+            if not throttle.allow_request(request, self)
+        ]
+        durations = [duration for duration in durations if duration is not None]
+        if durations:
+            raise exceptions.Throttled(max(durations))
+
+    def get_queryset(self):
+        return self.request.user.tasks.all()
+
+    def get_serializer_context(self):
+        return {"request": self.request, "format": None, "view": self}
+
+    async def get_object(self, pk):
+        task = await self.get_queryset().filter(pk=pk).afirst()
+        if task is None:
+            raise exceptions.NotFound(
+                f"No {Task._meta.object_name} matches the given query."
+            )
+        return task
+
+    # Cuerpo y respuestas
+
+    @staticmethod
+    def has_json_body(request):
+        return request.content_type == "application/json"
+
+    @staticmethod
+    def parse_body(request):
+        if not request.body:
+            return {}
+        try:
+            return loads(request.body)
+        except ValueError as exc:
+            raise exceptions.ParseError(f"JSON parse error - {exc}")
+
+    def render(self, data, status_code=status.HTTP_200_OK, headers=None):
+        renderer = self.renderer_class()
+        response = HttpResponse(
+            renderer.render(data),
+            status=status_code,
+            content_type=renderer.media_type,
+            headers=headers,
+        )
+        self.finalize_response(response)
+        return response
+
+    def finalize_response(self, response):
+        """Headers que agrega ``APIView`` a cada respuesta."""
+        allowed = [
+            method.upper()
+            for method in self.http_method_names
+            if method in self.viewset_actions or method in ("head", "options")
+        ]
+        response.headers.setdefault("Allow", ", ".join(allowed))
+        if len(api_settings.DEFAULT_RENDERER_CLASSES) > 1:
+            patch_vary_headers(response, ("Accept",))
+
+    def handle_exception(self, exc, authenticator, request):
+        """Mismo formato que ``rest_framework.views.exception_handler``."""
+        headers = {}
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            headers["WWW-Authenticate"] = authenticator.authenticate_header(request)
+        if getattr(exc, "wait", None):
+            headers["Retry-After"] = "%d" % exc.wait
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {"detail": exc.detail}
+        return self.render(data, exc.status_code, headers)
+
+
+class TaskListAsyncView(AsyncTaskView):
+    """``GET``/``POST /api/tasks/``."""
+
+    viewset_actions = {"get": "list", "post": "create"}
+    viewset_view = staticmethod(
+        TaskViewSet.as_view(viewset_actions, basename="task", detail=False)
+    )
+
+    def is_native(self, request):
+        if not super().is_native(request):
+            return False
+        if request.method == "POST":
+            return self.has_json_body(request)
+        try:
+            paginator = TaskPagination().get_paginator(Request(request))
+        except exceptions.ValidationError:
+            return False
+        return (
+            isinstance(paginator, KeysetPagination)
+            and request.GET.get(KeysetPagination.count_query_param) != "estimate"
+        )
+
+    async def filter_queryset(self, queryset):
+        if self.request.query_params.get(api_settings.SEARCH_PARAM):
+            # Detectar el backend de búsqueda consulta la base (una vez).
+            await aget_search_backend(queryset.db)
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def get(self, request):
+        version, modified_at = await aget_list_version(request.user.pk)
+        validators = list_validators(request, version, modified_at)
+        not_modified = evaluate_preconditions(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        cache_key = list_cache_key(request, version)
+        if cache_key is not None:
+            entry = await get_list_cache().aget(cache_key)
+            if entry is not None:
+                response = cached_response(entry)
+                self.finalize_response(response)
+                set_validator_headers(response, *validators)
+                response[CACHE_HEADER] = "HIT"
+                return response
+
+        queryset = await self.filter_queryset(self.get_queryset())
+
+        # Las filas son todas del usuario autenticado: serialize() no consulta
+        # emails de otros owners.
+        rows = TaskRowSerializer(context=self.get_serializer_context())
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(rows.prepare(queryset), request, self)
+        response = self.render(paginator.get_paginated_data(rows.serialize(page)))
+        set_validator_headers(response, *validators)
+        if cache_key is not None:
+            response[CACHE_HEADER] = "MISS"
+            await get_list_cache().aset(cache_key, cache_entry(response))
+        return response
+
+    async def post(self, request):
+        serializer = TaskSerializer(
+            data=self.parse_body(request), context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(create_task)(serializer, request.user)
+        return self.render(serializer.data, status.HTTP_201_CREATED)
+
+
+class TaskDetailAsyncView(AsyncTaskView):
+    """``GET``/``PUT``/``PATCH``/``DELETE /api/tasks/<id>/``."""
+
+    viewset_actions = {
+        "get": "retrieve",
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    }
+    viewset_view = staticmethod(
+        TaskViewSet.as_view(viewset_actions, basename="task", detail=True)
+    )
+
+    def is_native(self, request):
+        # Con query params el viewset aplica los filtros también al detalle.
+        if not super().is_native(request) or request.GET:
+            return False
+        if request.method in ("PUT", "PATCH"):
+            return self.has_json_body(request) and not has_preconditions(request)
+        return True
+
+    async def get(self, request, pk):
+        task = await self.get_object(pk)
+        validators = detail_validators(request, pk, task.updated_at)
+        response = evaluate_preconditions(request, *validators)
+        if response is None:
+            serializer = TaskSerializer(task, context=self.get_serializer_context())
+            response = self.render(serializer.data)
+            set_validator_headers(response, *validators)
+        return response
+
+    async def put(self, request, pk):
+        return await self.update(request, pk, partial=False)
+
+    async def patch(self, request, pk):
+        return await self.update(request, pk, partial=True)
+
+    async def update(self, request, pk, partial):
+        task = await self.get_object(pk)
+        serializer = TaskSerializer(
+            task,
+            data=self.parse_body(request),
+            partial=partial,
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(update_task)(serializer)
+        response = self.render(serializer.data)
+        set_validator_headers(
+            response, *detail_validators(request, pk, task.updated_at)
+        )
+        return response
+
+    async def delete(self, request, pk):
+        task = await self.get_object(pk)
+        await sync_to_async(destroy_task)(task)
+        response = HttpResponse(status=status.HTTP_204_NO_CONTENT)
+        del response["Content-Type"]
+        self.finalize_response(response)
+        return response
@@ -0,0 +1,160 @@
+"""Escrituras en lote sobre las tareas de un usuario.
+
+* :func:`bulk_write`: un lote explícito de altas, modificaciones y bajas.
+  Cada ítem se valida con ``TaskSerializer``; los válidos se escriben con
+  ``bulk_create`` / ``bulk_update`` / un único ``DELETE`` (con sus
+  tombstones, ver ``tasks.changes``) dentro de una sola
+  transacción y los inválidos se informan sin afectar al resto.
+* :func:`apply_filtered_action`: una modificación o baja sobre todas las
+  tareas que coinciden con los filtros del listado, sin traerlas como
+  objetos: se bloquean sus filas y se escriben con un único
+  ``UPDATE``/``DELETE``.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from .changes import delete_tasks, next_change_seq
+from .models import Task
+from .serializers import TaskSerializer
+from .stats import StatsDelta, lock_groups, lock_rows
+
+NOT_FOUND = {"detail": "No encontrado."}
+
+
+def bulk_write(queryset, owner, operations, context):
+    """Aplica ``operations`` (ya validadas por ``TaskBulkSerializer``).
+
+    ``queryset`` son las tareas visibles para el usuario: las modificaciones y
+    bajas sobre ids fuera de él se informan como 404.
+    """
+    results = {"create": [], "update": [], "delete": []}
+    delta = StatsDelta()
+    with transaction.atomic(using=queryset.db):
+        seq = next_change_seq({owner.pk}, queryset.db)[owner.pk]
+        results["create"] = _create(owner, operations["create"], context, delta, seq)
+        results["update"] = _update(
+            queryset, operations["update"], context, delta, seq
+        )
+        results["delete"] = _delete(queryset, operations["delete"], delta)
+        delta.apply(queryset.db)
+    return results
+
+
+def _create(owner, items, context, delta, seq):
+    results, objs = [], []
+    for item in items:
+        serializer = TaskSerializer(data=item, context=context)
+        if serializer.is_valid():
+            obj = Task(owner=owner, change_seq=seq, **serializer.validated_data)
+            delta.add_task(obj)
+            objs.append(obj)
+            results.append({"status": status.HTTP_201_CREATED, "data": obj})
+        else:
+            results.append(
+                {"status": status.HTTP_400_BAD_REQUEST, "errors": serializer.errors}
+            )
+    Task.objects.bulk_create(objs)
+    return _render(results, context)
+
+
+def _update(queryset, items, context, delta, seq):
+    # Filas bloqueadas: la diferencia parte de sus valores actuales
+    instances = queryset.select_for_update(of=("self",)).in_bulk(
+        [item["id"] for item in items]
+    )
+    results, objs, fields = [], [], set()
+    for item in items:
+        pk = item["id"]
+        instance = instances.get(pk)
+        if instance is None:
+            results.append(
+                {"id": pk, "status": status.HTTP_404_NOT_FOUND, "errors": NOT_FOUND}
+            )
+            continue
+        data = {k: v for k, v in item.items() if k != "id"}
+        serializer = TaskSerializer(instance, data=data, partial=True, context=context)
+        if not serializer.is_valid():
+            results.append(
+                {
+                    "id": pk,
+                    "status": status.HTTP_400_BAD_REQUEST,
+                    "errors": serializer.errors,
+                }
+            )
+            continue
+        delta.add_task(instance, -1)
+        for attr, value in serializer.validated_data.items():
+            setattr(instance, attr, value)
+        delta.add_task(instance)
+        fields.update(serializer.validated_data)
+        objs.append(instance)
+        results.append({"id": pk, "status": status.HTTP_200_OK, "data": instance})
+
+    if objs:
+        # bulk_update no aplica auto_now
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+            obj.change_seq = seq
+        Task.objects.bulk_update(objs, [*fields, "updated_at", "change_seq"])
+    return _render(results, context)
+
+
+def _delete(queryset, ids, delta):
+    rows = lock_rows(queryset.filter(pk__in=ids))
+    existing = set()
+    for pk, *group in rows:
+        existing.add(pk)
+        delta.add(*group, -1)
+    if existing:
+        delete_tasks(queryset.filter(pk__in=existing), delta)
+    return [
+        {"id": pk, "status": status.HTTP_204_NO_CONTENT}
+        if pk in existing
+        else {"id": pk, "status": status.HTTP_404_NOT_FOUND, "errors": NOT_FOUND}
+        for pk in ids
+    ]
+
+
+def _render(results, context):
+    objs = [r["data"] for r in results if "data" in r]
+    rendered = iter(TaskSerializer(objs, many=True, context=context).data)
+    for result in results:
+        if "data" in result:
+            result["data"] = next(rendered)
+    return results
+
+
+def has_errors(results):
+    return any("errors" in item for items in results.values() for item in items)
+
+
+def apply_filtered_action(queryset, owner, action, values=None, dry_run=False):
+    """Ejecuta ``action`` sobre todo ``queryset``, con sus filas bloqueadas.
+
+    ``queryset`` son tareas de ``owner`` con los filtros del listado
+    (``TaskFilter``, ``search``).
+    Devuelve la cantidad de filas afectadas (o que se afectarían si
+    ``dry_run``).
+    """
+    if dry_run:
+        return queryset.count()
+    with transaction.atomic(using=queryset.db):
+        seq = next_change_seq({owner.pk}, queryset.db)[owner.pk]
+        # La diferencia sale de las filas bloqueadas; se escriben con una sola
+        # sentencia sobre el mismo queryset
+        groups = lock_groups(queryset)
+        delta = StatsDelta()
+        if action == "delete":
+            delta.add_groups(groups, -1)
+            affected = delete_tasks(queryset, delta)
+        else:
+            delta.add_groups(groups, changes=values)
+            # QuerySet.update no aplica auto_now
+            affected = queryset.update(
+                **values, updated_at=timezone.now(), change_seq=seq
+            )
+        delta.apply(queryset.db)
+    return affected
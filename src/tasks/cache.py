@@ -0,0 +1,268 @@
+"""Cache de respuestas de ``GET /api/tasks/``.
+
+La clave combina el usuario, la versión de su listado (``TaskListVersion``),
+el formato de la respuesta, el esquema y host de la petición (los enlaces
+``next``/``previous`` son absolutos) y la query string normalizada (filtros,
+búsqueda, orden, página o cursor). Cada escritura incrementa la versión del usuario
+(señal ``tasks_changed``), así que nunca hace falta borrar entradas: las
+anteriores quedan inaccesibles y salen por LRU o por TTL.
+
+Backends (``TASKS_LIST_CACHE_BACKEND``):
+
+* :class:`LocalLRUListCache` (por defecto): memoria del proceso, acotada por
+  ``TASKS_LIST_CACHE_MAX_BYTES``.
+* :class:`SharedListCache`: una cache de Django (``TASKS_LIST_CACHE_ALIAS``),
+  compartida entre workers (p. ej. Redis con ``CACHE_URL``).
+
+Con ``TASKS_LIST_CACHE_BACKEND`` vacío la cache queda desactivada.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from config import metrics
+
+from .models import TaskListVersion
+
+CACHEABLE_FORMATS = ("json",)
+CACHE_HEADER = "X-Cache"
+
+
+class BaseListCache:
+    """Interfaz común con contadores de aciertos y fallos (por proceso)."""
+
+    def __init__(self):
+        self.timeout = getattr(settings, "TASKS_LIST_CACHE_TIMEOUT", 300)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        return self._count(self._get(key))
+
+    async def aget(self, key):
+        return self._count(await self._aget(key))
+
+    def _count(self, entry):
+        with self._stats_lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.inc(
+            "tasks_list_cache_requests_total",
+            {"result": "miss" if entry is None else "hit"},
+        )
+        return entry
+
+    def set(self, key, entry):
+        raise NotImplementedError
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    # Las versiones async delegan por defecto en las síncronas, que en la LRU
+    # local solo tocan memoria.
+
+    async def aset(self, key, entry):
+        self.set(key, entry)
+
+    async def _aget(self, key):
+        return self._get(key)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class LocalLRUListCache(BaseListCache):
+    """LRU en memoria con TTL, acotada por el tamaño total de las respuestas."""
+
+    def __init__(self):
+        super().__init__()
+        self.max_bytes = getattr(settings, "TASKS_LIST_CACHE_MAX_BYTES", 32 * 2**20)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, entry = item
+            if expires <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        size = len(entry["content"])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.timeout, entry)
+            self._size += size
+            while self._size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._size -= len(item[1]["content"])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        return {**super().stats(), "entries": len(self._entries), "bytes": self._size}
+
+
+class SharedListCache(BaseListCache):
+    """Entradas en una cache de Django, compartidas entre procesos."""
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[getattr(settings, "TASKS_LIST_CACHE_ALIAS", "default")]
+
+    def _get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, entry):
+        self.cache.set(key, entry, self.timeout)
+
+    async def _aget(self, key):
+        return await self.cache.aget(key)
+
+    async def aset(self, key, entry):
+        await self.cache.aset(key, entry, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_list_cache = None
+_list_cache_loaded = False
+
+
+def get_list_cache():
+    """Backend configurado (uno por proceso) o ``None`` si está desactivado."""
+    global _list_cache, _list_cache_loaded
+    if not _list_cache_loaded:
+        path = getattr(
+            settings, "TASKS_LIST_CACHE_BACKEND", "tasks.cache.LocalLRUListCache"
+        )
+        _list_cache = import_string(path)() if path else None
+        _list_cache_loaded = True
+    return _list_cache
+
+
+def _reset_list_cache(setting, **kwargs):
+    global _list_cache, _list_cache_loaded
+    if setting.startswith("TASKS_LIST_CACHE_"):
+        _list_cache, _list_cache_loaded = None, False
+
+
+setting_changed.connect(_reset_list_cache)
+
+
+# Versiones
+
+
+def _list_version_queryset(user_id):
+    return TaskListVersion.objects.filter(owner_id=user_id).values_list(
+        "version", "modified_at"
+    )
+
+
+def get_list_version(user_id):
+    """``(versión, último cambio)`` del listado de ``user_id``; ``(0, None)``
+    si nunca escribió."""
+    return _list_version_queryset(user_id).first() or (0, None)
+
+
+async def aget_list_version(user_id):
+    return await _list_version_queryset(user_id).afirst() or (0, None)
+
+
+def bump_list_versions(sender, owner_ids, using="default", **kwargs):
+    """Receptor de ``tasks_changed``: invalida el listado de ``owner_ids``."""
+    versions = TaskListVersion.objects.using(using).filter(owner_id__in=owner_ids)
+    changes = {"version": F("version") + 1, "modified_at": timezone.now()}
+    if versions.update(**changes) < len(owner_ids):
+        # Primera escritura de algún usuario: se crean las filas que falten.
+        TaskListVersion.objects.using(using).bulk_create(
+            [TaskListVersion(owner_id=pk) for pk in owner_ids],
+            ignore_conflicts=True,
+        )
+        versions.update(**changes)
+
+
+# Claves y respuestas
+
+
+def list_cache_key(request, version):
+    """Clave para el listado pedido (``version``: la de
+    :func:`get_list_version`) o ``None`` si no se debe cachear."""
+    digest = _list_digest(request)
+    if digest is None:
+        return None
+    return f"tasks:list:{request.user.pk}:{version}:{digest}"
+
+
+def _list_digest(request):
+    fmt = getattr(getattr(request, "accepted_renderer", None), "format", None)
+    if request.method != "GET" or fmt not in CACHEABLE_FORMATS:
+        return None
+    if get_list_cache() is None:
+        return None
+    query = urlencode(
+        sorted((k, v) for k, values in request.query_params.lists() for v in values)
+    )
+    origin = f"{request.scheme}://{request.get_host()}"
+    return hashlib.blake2b(
+        f"{request.user.email}|{fmt}|{origin}|{query}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def cached_response(entry):
+    return HttpResponse(entry["content"], content_type=entry["content_type"])
+
+
+def cache_entry(response):
+    return {
+        "content": response.content,
+        "content_type": response["Content-Type"],
+    }
+
+
+def store_on_render(response, key):
+    """Guarda la respuesta en la cache una vez renderizada."""
+    response[CACHE_HEADER] = "MISS"
+    cache = get_list_cache()
+
+    def store(rendered):
+        if rendered.status_code == 200:
+            cache.set(key, cache_entry(rendered))
+
+    response.add_post_render_callback(store)
+    return response
@@ -0,0 +1,250 @@
+"""Feed de cambios (``GET /api/tasks/changes/``) y tombstones de borrado.
+
+Un cliente sincroniza pidiendo lo que cambió desde su último cursor:
+
+* ``changed``: tareas creadas o modificadas, en orden ``(change_seq, id)``
+  (índice ``task_owner_change_seq_idx``).
+* ``deleted``: ids de tareas borradas, leídos de :class:`TaskTombstone` en
+  el mismo orden (índice ``tombstone_owner_seq_idx``).
+
+El orden no sale del reloj sino de :class:`TaskChangeSeq`: cada transacción
+que escribe tareas toma el próximo número de cambio de cada dueño
+(:func:`next_change_seq`), con su fila bloqueada hasta confirmar, y lo guarda
+en las tareas y tombstones que escribe. Dos escrituras de un mismo usuario
+confirman entonces en el orden de sus números, así que una transacción
+lenta (un lote grande, una importación, una petición bajo
+``ATOMIC_REQUESTS``) no queda detrás de un cursor que ya la pasó, sin
+importar cuánto tarde ni el reloj de cada worker.
+
+El cursor es opaco y guarda la posición de cada flujo, así que cada página
+cuesta solo el tamaño del delta.
+
+Los caminos de escritura de la API, el admin y la importación toman su
+número de cambio; los borrados pasan por :func:`delete_tasks` /
+:func:`record_tombstones`. Un ``Task.save()`` o ``Task.delete()`` hecho por
+fuera de esos caminos no aparece en el feed.
+"""
+
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import Task, TaskChangeSeq, TaskTombstone
+from .stats import StatsDelta, lock_groups
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = _(
+        "El cursor es anterior a la retención de borrados; "
+        "sincronizá de nuevo sin `since`."
+    )
+    default_code = "cursor_expired"
+
+
+# Números de cambio
+
+
+def next_change_seq(owner_ids, using="default"):
+    """Incrementa el número de cambio de cada usuario de ``owner_ids`` y
+    devuelve ``{owner_id: número}``.
+
+    Va dentro de la transacción de la escritura y antes de tocar las tareas:
+    las filas de :class:`TaskChangeSeq` quedan bloqueadas hasta que confirma,
+    y se toman en orden de id para que dos escrituras no se bloqueen en
+    cruz.
+    """
+    owner_ids = sorted({pk for pk in owner_ids if pk is not None})
+    if not owner_ids:
+        return {}
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    table, value = qn(TaskChangeSeq._meta.db_table), qn("value")
+    with transaction.atomic(using=using, savepoint=False):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({qn('owner_id')}, {value}) "
+                f"VALUES {', '.join(['(%s, 1)'] * len(owner_ids))} "
+                f"ON CONFLICT ({qn('owner_id')}) "
+                f"DO UPDATE SET {value} = {table}.{value} + 1 "
+                f"RETURNING {qn('owner_id')}, {value}",
+                owner_ids,
+            )
+            return dict(cursor.fetchall())
+
+
+# Tombstones
+
+
+def record_tombstones(queryset):
+    """Inserta un tombstone por cada tarea de ``queryset`` con un solo
+    ``INSERT ... SELECT``, sin traer los ids a memoria, con el número de
+    cambio actual de su dueño."""
+    connection = connections[queryset.db]
+    qn = connection.ops.quote_name
+    sql, params = (
+        queryset.order_by()
+        .values_list("owner_id", "id")
+        .query.get_compiler(queryset.db)
+        .as_sql()
+    )
+    table = qn(TaskTombstone._meta.db_table)
+    seq_table = qn(TaskChangeSeq._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (owner_id, task_id, deleted_at, change_seq) "
+            f"SELECT d.owner_id, d.id, %s, COALESCE(s.{qn('value')}, 0) "
+            f"FROM ({sql}) AS d LEFT JOIN {seq_table} AS s "
+            f"ON s.{qn('owner_id')} = d.owner_id",
+            (now, *params),
+        )
+
+
+def delete_tasks(queryset, delta=None, owner_ids=None):
+    """Borra ``queryset`` dejando sus tombstones y descontándolo de las
+    estadísticas (``tasks.stats``) en la misma transacción.
+
+    Sin ``delta`` se toman los números de cambio de ``owner_ids`` (los
+    dueños de las tareas; si el llamador no los sabe se consultan) y las
+    filas se bloquean (:func:`tasks.stats.lock_groups`) y se descuentan antes
+    de borrarlas. Si el llamador ya tomó los números de cambio y registró las
+    bajas en su propio ``delta`` (desde filas que bloqueó), se lo pasa y lo
+    aplica él junto con el resto de sus cambios.
+
+    Devuelve la cantidad de tareas borradas.
+    """
+    with transaction.atomic(using=queryset.db, savepoint=False):
+        if delta is None:
+            if owner_ids is None:
+                owner_ids = queryset.order_by().values_list("owner_id", flat=True)
+                owner_ids = owner_ids.distinct()
+            next_change_seq(owner_ids, queryset.db)
+            stats = StatsDelta()
+            stats.add_groups(lock_groups(queryset), -1)
+        record_tombstones(queryset)
+        _, per_model = queryset.delete()
+        if delta is None:
+            stats.apply(queryset.db)
+    return per_model.get(Task._meta.label, 0)
+
+
+def record_owner_tombstones(sender, instance, using, **kwargs):
+    """``pre_delete`` de User: las tareas se borran en cascada."""
+    record_tombstones(Task.objects.using(using).filter(owner_id=instance.pk))
+
+
+def prune_tombstones(older_than):
+    """Elimina los tombstones anteriores a ``older_than``."""
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=older_than).delete()
+    return deleted
+
+
+def retention_cutoff():
+    days = getattr(settings, "TASKS_TOMBSTONE_RETENTION_DAYS", 30)
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+# Feed
+
+
+def get_changes(queryset, owner_id, since, page_size):
+    """Cambios de ``queryset`` (las tareas del usuario) posteriores a ``since``.
+
+    Devuelve ``(changed, deleted_ids, next_cursor, has_more)``; ``changed``
+    son instancias de ``Task`` listas para serializar.
+    """
+    now = timezone.now()
+    if since:
+        task_position, tombstone_position, synced_at = decode_cursor(since)
+        if synced_at < retention_cutoff():
+            raise CursorExpired()
+    else:
+        # Sincronización inicial: todas las tareas y ningún borrado ya
+        # confirmado (sus tareas tampoco están).
+        task_position = None
+        seq = (
+            TaskChangeSeq.objects.filter(owner_id=owner_id)
+            .values_list("value", flat=True)
+            .first()
+        )
+        tombstone_position = (seq or 0, None)
+
+    tasks = _after(queryset, task_position)
+    changed = list(tasks.order_by("change_seq", "id")[: page_size + 1])
+    tasks_more = len(changed) > page_size
+    changed = changed[:page_size]
+    if changed:
+        task_position = (changed[-1].change_seq, changed[-1].pk)
+
+    tombstones = _after(
+        TaskTombstone.objects.filter(owner_id=owner_id), tombstone_position
+    )
+    rows = list(
+        tombstones.order_by("change_seq", "id").values_list(
+            "change_seq", "id", "task_id", "deleted_at"
+        )[: page_size + 1]
+    )
+    tombstones_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if rows:
+        tombstone_position = rows[-1][:2]
+    # Si quedan borrados, el cursor vence con el último entregado
+    synced_at = rows[-1][3] if tombstones_more else now
+
+    cursor = encode_cursor(task_position, tombstone_position, synced_at)
+    deleted = [row[2] for row in rows]
+    return changed, deleted, cursor, tasks_more or tombstones_more
+
+
+def _after(queryset, position):
+    """Filas de ``queryset`` posteriores a ``position``: ``(change_seq, id)``,
+    ``(change_seq, None)`` para saltear todo ese número, o ``None``."""
+    if position is None:
+        return queryset
+    seq, pk = position
+    if pk is None:
+        return queryset.filter(change_seq__gt=seq)
+    return queryset.filter(
+        Q(change_seq__gt=seq) | Q(change_seq=seq, pk__gt=pk), change_seq__gte=seq
+    )
+
+
+def encode_cursor(task_position, tombstone_position, synced_at):
+    token = {
+        "t": list(task_position) if task_position else None,
+        "d": list(tombstone_position),
+        "s": synced_at.isoformat(),
+    }
+    raw = json.dumps(token, separators=(",", ":")).encode()
+    return urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value):
+    try:
+        raw = urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        token = json.loads(raw)
+        task_position = token["t"]
+        if task_position is not None:
+            task_position = (int(task_position[0]), int(task_position[1]))
+        seq, pk = token["d"]
+        tombstone_position = (int(seq), None if pk is None else int(pk))
+        return task_position, tombstone_position, _parse_datetime(token["s"])
+    except (TypeError, ValueError, KeyError, IndexError):
+        raise ValidationError({"since": ["Cursor inválido."]})
+
+
+def _parse_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
@@ -0,0 +1,121 @@
+"""Peticiones condicionales (``ETag`` / ``Last-Modified``) sobre las tareas.
+
+* Listado: la versión del listado del usuario (``TaskListVersion``, la misma
+  de la clave de la cache de respuestas), que cambia con cada alta,
+  modificación o baja; junto con la URL (filtros, orden, cursor) y el formato
+  identifica la página sin consultar ninguna tarea. ``Last-Modified`` es el
+  momento de ese último cambio. Cuesta una lectura por clave primaria, sin
+  ``COUNT`` sobre el conjunto filtrado, y cualquier escritura del usuario
+  invalida todas sus páginas (aunque no afecte a la pedida).
+* Detalle: ``updated_at`` de la tarea.
+
+``Last-Modified`` tiene resolución de segundos: no se envía mientras el cambio
+sea del segundo en curso, porque otro cambio en ese mismo segundo tendría la
+misma fecha y un cliente que solo manda ``If-Modified-Since`` recibiría un 304
+con el cuerpo viejo. El ``ETag`` (fuerte) va siempre y, como en Django, con
+``If-None-Match`` la fecha no se compara.
+
+``If-Match`` / ``If-Unmodified-Since`` en ``PUT``/``PATCH`` se evalúan con la
+fila bloqueada (``select_for_update``) para que la comprobación y la escritura
+sean atómicas.
+"""
+
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+PRECONDITION_HEADERS = (
+    "HTTP_IF_MATCH",
+    "HTTP_IF_UNMODIFIED_SINCE",
+    "HTTP_IF_NONE_MATCH",
+)
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = _("La tarea fue modificada por otra petición.")
+    default_code = "precondition_failed"
+
+
+def _etag(request, *parts):
+    user = request.user
+    fmt = getattr(getattr(request, "accepted_renderer", None), "format", "")
+    raw = "|".join(map(str, (user.pk, user.email, fmt, *parts)))
+    return quote_etag(hashlib.blake2b(raw.encode(), digest_size=16).hexdigest())
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else None
+
+
+def list_validators(request, version, modified_at):
+    """``(etag, last_modified)`` del listado, de :func:`tasks.cache.get_list_version`."""
+    # Query string normalizada, como la clave de la cache de respuestas
+    query = urlencode(sorted((k, v) for k in request.GET for v in request.GET.getlist(k)))
+    etag = _etag(request, "list", request.path, query, version)
+    return etag, _timestamp(modified_at)
+
+
+def detail_validators(request, pk, updated_at):
+    """``(etag, last_modified)`` de una tarea a partir de su ``updated_at``."""
+    return _etag(request, "task", pk, updated_at.isoformat()), _timestamp(updated_at)
+
+
+def has_preconditions(request):
+    return any(request.META.get(header) for header in PRECONDITION_HEADERS)
+
+
+def evaluate_preconditions(request, etag, last_modified):
+    """Respuesta 304 si corresponde, ``None`` para seguir con la vista.
+
+    Una precondición fallida (``If-Match``, ``If-Unmodified-Since``) se
+    informa como :class:`PreconditionFailed` para mantener el formato de
+    errores de la API. Se comprueba antes que ``get_conditional_response``,
+    que loguearía su propio 412 además del de la respuesta de la API.
+    """
+    if not _preconditions_pass(request, etag, last_modified):
+        raise PreconditionFailed()
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        return None
+    set_validator_headers(response, etag, last_modified)
+    return response
+
+
+def _preconditions_pass(request, etag, last_modified):
+    """``If-Match`` / ``If-Unmodified-Since`` con las reglas de
+    ``get_conditional_response`` (RFC 9110, sección 13.2.2)."""
+    if_match = parse_etags(request.META.get("HTTP_IF_MATCH", ""))
+    if if_match:
+        if not etag:
+            return False
+        return if_match == ["*"] or (not etag.startswith("W/") and etag in if_match)
+    if_unmodified_since = parse_http_date_safe(
+        request.META.get("HTTP_IF_UNMODIFIED_SINCE", "")
+    )
+    if if_unmodified_since:
+        return last_modified is not None and last_modified <= if_unmodified_since
+    return True
+
+
+def set_validator_headers(response, etag, last_modified):
+    if etag:
+        response.headers.setdefault("ETag", etag)
+        # Solo junto al ETag y de un segundo ya cerrado (ver el docstring)
+        if last_modified is not None and last_modified < int(time.time()):
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+    # Respuestas por usuario: sin caches compartidas y revalidando siempre.
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Authorization",))
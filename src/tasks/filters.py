@@ -1,6 +1,16 @@
 import django_filters as filters
+from django.core.validators import EMPTY_VALUES
+from rest_framework import filters as drf_filters
+from rest_framework.exceptions import ValidationError
 
 from .models import Task
+from .search import (
+    DEFAULT_SEARCH_MODE,
+    RANK_ANNOTATION,
+    SEARCH_MODES,
+    get_search_backend,
+    search_terms,
+)
 
 
 class TaskFilter(filters.FilterSet):
@@ -12,3 +22,87 @@ class TaskFilter(filters.FilterSet):
     class Meta:
         model = Task
         fields = ["priority", "status", "due_date", "created_at"]
+
+    def has_values(self):
+        """Si algún filtro llegó con valor (los parámetros vacíos no cuentan)."""
+        form = self.form
+        for name, field in form.fields.items():
+            value = field.widget.value_from_datadict(
+                form.data, form.files, form.add_prefix(name)
+            )
+            values = value if isinstance(value, (list, tuple)) else [value]
+            if any(v not in EMPTY_VALUES for v in values):
+                return True
+        return False
+
+
+class TaskOrderingFilter(drf_filters.OrderingFilter):
+    """``OrderingFilter`` con alias hacia columnas internas.
+
+    ``?ordering=priority`` ordena por la prioridad real (``priority_rank``,
+    con ``created_at`` como desempate, ver ``task_owner_priority_rank_idx``)
+    en lugar del texto de las choices. El signo se aplica a todo el alias.
+    """
+
+    ordering_aliases = {"priority": ("priority_rank", "created_at")}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        expanded = {}
+        for term in ordering:
+            sign, name = ("-", term[1:]) if term.startswith("-") else ("", term)
+            for field in self.ordering_aliases.get(name, (name,)):
+                expanded.setdefault(field, f"{sign}{field}")
+        return list(expanded.values())
+
+
+class TaskSearchFilter(drf_filters.SearchFilter):
+    """``?search=`` sobre el índice de texto completo (ver tasks.search).
+
+    ``?search_mode=`` elige cómo se interpretan los términos:
+
+    * ``prefix`` (por defecto): todos los términos, como prefijo.
+    * ``phrase``: la frase exacta.
+    * ``ranked``: cualquiera de los términos, ordenado por relevancia salvo
+      que se pida otro ``?ordering=``.
+
+    Debe ir después de ``OrderingFilter`` para poder imponer el orden por
+    relevancia.
+    """
+
+    search_mode_param = "search_mode"
+    ordering_param = TaskOrderingFilter.ordering_param
+
+    def get_search_mode(self, request):
+        mode = request.query_params.get(self.search_mode_param) or DEFAULT_SEARCH_MODE
+        if mode not in SEARCH_MODES:
+            raise ValidationError(
+                {self.search_mode_param: [f"Valores válidos: {', '.join(SEARCH_MODES)}."]}
+            )
+        return mode
+
+    def filter_queryset(self, request, queryset, view):
+        mode = self.get_search_mode(request)
+        terms = search_terms(request.query_params.get(self.search_param, ""))
+        if not terms:
+            return queryset
+
+        queryset, ranked = get_search_backend(queryset.db).search(queryset, terms, mode)
+        if ranked and self.ordering_param not in request.query_params:
+            queryset = queryset.order_by(f"-{RANK_ANNOTATION}", "-id")
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.search_mode_param,
+                "required": False,
+                "in": "query",
+                "description": "Modo de búsqueda: prefix (por defecto), phrase o ranked.",
+                "schema": {"type": "string", "enum": list(SEARCH_MODES)},
+            }
+        )
+        return parameters
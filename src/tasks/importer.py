@@ -0,0 +1,269 @@
+"""Importación masiva de tareas desde NDJSON o CSV.
+
+La usan ``POST /api/tasks/import/`` y ``manage.py import_tasks``:
+
+* El origen se lee línea a línea (cuerpo de la petición o archivo), sin
+  cargarlo entero en memoria.
+* Cada fila se valida con los campos de ``TaskSerializer`` (choices de
+  ``Priority``/``Status``, largos máximos, formato de fecha). Los campos se
+  construyen una sola vez y se reutilizan en todas las filas.
+* Las filas válidas se insertan en lotes de ``TASKS_IMPORT_BATCH_SIZE``, cada
+  uno en su propia transacción (la acción de la API queda fuera de
+  ``ATOMIC_REQUESTS``): con ``COPY`` en Postgres (``TASKS_IMPORT_USE_COPY``)
+  y con ``bulk_create`` en el resto.
+* Las filas inválidas se informan (línea y errores) sin cortar la carga.
+"""
+
+import csv
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import SkipField, get_error_detail
+from rest_framework.settings import api_settings
+
+from config.renderers import loads
+
+from .changes import next_change_seq
+from .models import Task
+from .serializers import TaskSerializer
+from .signals import notify_tasks_changed
+from .stats import StatsDelta
+
+IMPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+DEFAULT_IMPORT_FORMAT = "ndjson"
+
+
+# Lectura
+
+
+def iter_ndjson(stream):
+    """``(línea, registro)`` por cada línea no vacía de ``stream`` (binario).
+
+    Si la línea no es un objeto JSON, ``registro`` es el mensaje de error.
+    """
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except ValueError as exc:
+            yield line_no, f"JSON inválido: {exc}"
+            continue
+        if not isinstance(record, dict):
+            record = "Se esperaba un objeto JSON."
+        yield line_no, record
+
+
+def iter_csv(stream):
+    """``(línea, registro)`` por cada fila de un CSV con encabezado.
+
+    Las celdas vacías se tratan como campos ausentes, salvo en los campos de
+    texto que admiten vacío. Las filas ilegibles (no UTF-8, o que el módulo
+    ``csv`` rechaza) se informan como error y la lectura sigue.
+    """
+    undecodable = []
+
+    def lines():
+        for line_no, line in enumerate(iter(stream.readline, b""), start=1):
+            try:
+                yield line.decode("utf-8-sig" if line_no == 1 else "utf-8")
+            except UnicodeDecodeError as exc:
+                undecodable.append((line_no, f"CSV inválido: {exc}"))
+                # Fila vacía: DictReader la saltea
+                yield "\n"
+
+    reader = csv.DictReader(lines())
+    blank_ok = {
+        name
+        for name, field in TaskSerializer().fields.items()
+        if getattr(field, "allow_blank", False)
+    }
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as exc:
+            # El lector queda en la línea siguiente: se informa y se sigue
+            yield from undecodable
+            undecodable.clear()
+            yield reader.reader.line_num, f"CSV inválido: {exc}"
+            continue
+        yield from undecodable
+        undecodable.clear()
+        yield reader.line_num, {
+            key: value
+            for key, value in record.items()
+            if key is not None and (value or key in blank_ok)
+        }
+    yield from undecodable
+
+
+READERS = {"ndjson": iter_ndjson, "csv": iter_csv}
+
+
+# Validación
+
+
+class TaskRowValidator:
+    """Valida un registro con los campos escribibles de ``TaskSerializer``.
+
+    Equivale a ``TaskSerializer(data=record).is_valid()`` (sin
+    ``validate_<campo>`` ni ``validate()``, que el serializer no define) pero
+    sin construir el serializer por fila.
+    """
+
+    serializer_class = TaskSerializer
+
+    def __init__(self):
+        self.fields = [
+            field
+            for field in self.serializer_class().fields.values()
+            if not field.read_only
+        ]
+
+    def validate(self, record):
+        """``(datos_validados, None)`` o ``(None, errores)``."""
+        validated, errors = {}, {}
+        for field in self.fields:
+            try:
+                value = field.run_validation(field.get_value(record))
+            except ValidationError as exc:
+                errors[field.field_name] = exc.detail
+            except DjangoValidationError as exc:
+                errors[field.field_name] = get_error_detail(exc)
+            except SkipField:
+                pass
+            else:
+                validated[field.source] = value
+        if errors:
+            return None, errors
+        return validated, None
+
+
+# Escritura
+
+
+def copy_fields():
+    return [
+        f for f in Task._meta.concrete_fields if not (f.primary_key or f.generated)
+    ]
+
+
+def copy_data(tasks, fields):
+    """Filas CSV para ``COPY``: cada valor entre comillas y ``NULL`` como
+    campo vacío sin comillas, el único que Postgres lee como ``NULL`` en
+    formato CSV (un texto como ``\\N`` o ``""`` llega tal cual)."""
+    return "".join(
+        ",".join(_copy_value(getattr(task, f.attname)) for f in fields) + "\n"
+        for task in tasks
+    )
+
+
+def copy_tasks(tasks, using):
+    """Inserta ``tasks`` con un único ``COPY ... FROM STDIN`` (Postgres)."""
+    connection = connections[using]
+    fields = copy_fields()
+    data = copy_data(tasks, fields)
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(f.column) for f in fields)
+    sql = f"COPY {qn(Task._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    with connection.cursor() as cursor, cursor.cursor.copy(sql) as copy:
+        copy.write(data)
+
+
+def _copy_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class TaskImporter:
+    """Valida e inserta los registros de un origen para ``owner``.
+
+    ``progress(importer)`` se llama después de cada lote.
+    """
+
+    def __init__(
+        self, owner, batch_size=None, use_copy=None, using="default", progress=None
+    ):
+        self.owner = owner
+        self.batch_size = batch_size or settings.TASKS_IMPORT_BATCH_SIZE
+        if use_copy is None:
+            use_copy = settings.TASKS_IMPORT_USE_COPY
+        self.use_copy = use_copy and connections[using].vendor == "postgresql"
+        self.using = using
+        self.progress = progress
+        self.max_errors = settings.TASKS_IMPORT_MAX_ERRORS
+        self.validator = TaskRowValidator()
+        self.processed = self.created = self.failed = 0
+        self.errors = []
+
+    def run(self, records):
+        """Procesa ``records`` (pares ``(línea, registro)``) y devuelve el
+        resumen."""
+        batch = []
+        for line_no, record in records:
+            self.processed += 1
+            if isinstance(record, dict):
+                data, errors = self.validator.validate(record)
+            else:
+                data, errors = None, {api_settings.NON_FIELD_ERRORS_KEY: [record]}
+            if errors:
+                self._add_error(line_no, errors)
+                continue
+            batch.append(Task(owner=self.owner, **data))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        self._flush(batch)
+        return self.summary()
+
+    def summary(self):
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+    def _add_error(self, line_no, errors):
+        self.failed += 1
+        # Solo se guarda el detalle de los primeros errores
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line_no, "errors": errors})
+
+    def _flush(self, batch):
+        if batch:
+            with transaction.atomic(using=self.using):
+                seq = next_change_seq({self.owner.pk}, self.using)[self.owner.pk]
+                delta = StatsDelta()
+                for task in batch:
+                    task.change_seq = seq
+                    delta.add_task(task)
+                delta.apply(self.using)
+                if self.use_copy:
+                    now = timezone.now()
+                    for task in batch:
+                        task.created_at = task.updated_at = now
+                    copy_tasks(batch, self.using)
+                else:
+                    Task.objects.using(self.using).bulk_create(batch)
+            self.created += len(batch)
+            notify_tasks_changed({self.owner.pk}, using=self.using)
+        if self.progress is not None:
+            self.progress(self)
+
+
+def import_tasks(stream, owner, import_format, **kwargs):
+    """Importa las tareas de ``stream`` (binario) para ``owner``."""
+    return TaskImporter(owner, **kwargs).run(READERS[import_format](stream))
@@ -0,0 +1,359 @@
+import datetime
+import json
+import logging
+import random
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from config import db_instrumentation
+from tasks.models import Priority, Status, Task
+from tasks.stats import rebuild_stats
+from tasks.views import TaskViewSet
+from users.serializers import TokenObtainPairSerializer
+
+PASSWORD = "BenchPassword123!"
+
+# Distribuciones aproximadas de una base real
+PRIORITY_WEIGHTS = {Priority.LOW: 30, Priority.MEDIUM: 50, Priority.HIGH: 20}
+STATUS_WEIGHTS = {Status.PENDING: 45, Status.IN_PROGRESS: 20, Status.COMPLETED: 35}
+NO_DUE_DATE = 0.3
+NO_DESCRIPTION = 0.4
+
+WORDS = (
+    "revisar enviar informe reunión cliente presupuesto factura proyecto "
+    "llamar comprar preparar actualizar documentación servidor base datos "
+    "diseño prueba entrega equipo semana mensual correo contrato pago "
+    "migración backup despliegue error soporte agenda viaje médico banco "
+    "curso lectura jardín auto casa alquiler impuestos compras regalo"
+).split()
+SEARCH_TERM = "presupuesto"
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra usuarios y tareas sintéticos y mide latencia (p50/p95/p99) y "
+        "consultas por petición de los endpoints principales, pasando por "
+        "todo el stack (middleware, autenticación JWT, vistas). Los datos se "
+        "crean dentro de una transacción que se revierte al terminar. Con "
+        "--baseline compara contra una corrida anterior y falla si algún "
+        "escenario empeora más que --tolerance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument(
+            "--tasks",
+            type=int,
+            default=20000,
+            help="Total de tareas, repartidas entre los usuarios con sesgo "
+            "(pocos usuarios con muchas tareas).",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Peticiones por escenario."
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=10, help="Peticiones previas sin medir."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            help="Medir solo estos escenarios (repetible).",
+        )
+        parser.add_argument("--output", help="Archivo JSON con los resultados.")
+        parser.add_argument(
+            "--baseline", help="Resultados de referencia (JSON de --output)."
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Empeoramiento de latencia admitido frente a --baseline "
+            "(0.2 = 20%%). Las consultas por petición no admiten aumento.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"]) as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"No se pudo leer --baseline: {exc}")
+
+        self.rng = random.Random(options["seed"])
+        # Sin una línea de access log por petición medida
+        access_logger = logging.getLogger("access")
+        access_level = access_logger.level
+        access_logger.setLevel(logging.WARNING)
+        try:
+            # El Client de pruebas usa el host "testserver"; sin throttling
+            # (se mide la API, no el límite por usuario)
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                THROTTLE_ENABLED=False,
+            ), transaction.atomic():
+                start = time.perf_counter()
+                users, task_ids = self._seed(options["users"], options["tasks"])
+                self.stdout.write(
+                    f"Sembradas {options['tasks']} tareas de {len(users)} "
+                    f"usuarios en {time.perf_counter() - start:.1f} s"
+                )
+                results = self._run(users, task_ids, options)
+                transaction.set_rollback(True)
+        finally:
+            access_logger.setLevel(access_level)
+
+        report = {
+            "meta": {
+                "users": options["users"],
+                "tasks": options["tasks"],
+                "requests": options["requests"],
+                "seed": options["seed"],
+                "database": connection.vendor,
+                "settings": settings.SETTINGS_MODULE,
+                "created": timezone.now().isoformat(),
+            },
+            "scenarios": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+        if baseline is not None:
+            self._compare(results, baseline, options["tolerance"], report["meta"])
+
+    # Datos
+
+    def _seed(self, user_count, task_count):
+        tag = uuid.uuid4().hex[:8]
+        password = make_password(PASSWORD)
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(
+                email=f"bench-{tag}-{i}@example.com",
+                username=f"bench-{tag}-{i}",
+                password=password,
+            )
+            for i in range(user_count)
+        )
+        # Ley de Zipf: el usuario i tiene ~1/(i+1) de las tareas del primero
+        weights = [1 / (i + 1) for i in range(user_count)]
+        owners = self.rng.choices(users, weights=weights, k=task_count)
+        Task.objects.bulk_create(
+            (self._task(owner) for owner in owners), batch_size=2000
+        )
+        rebuild_stats(owner_ids=[user.pk for user in users])
+        task_ids = {}
+        for owner_id, pk in Task.objects.filter(owner__in=users).values_list(
+            "owner_id", "pk"
+        ):
+            task_ids.setdefault(owner_id, []).append(pk)
+        # Solo usuarios con tareas, para que detalle y edición tengan ids
+        return [user for user in users if user.pk in task_ids], task_ids
+
+    def _task(self, owner):
+        return Task(
+            owner=owner,
+            **self._fields(),
+            priority=self._pick(PRIORITY_WEIGHTS),
+            status=self._pick(STATUS_WEIGHTS),
+            due_date=self._due_date(),
+        )
+
+    def _pick(self, weights):
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _fields(self):
+        """Título de 1 a 8 palabras; descripción vacía o de largo variable."""
+        rng = self.rng
+        title = " ".join(rng.choices(WORDS, k=rng.randint(1, 8))).capitalize()
+        description = ""
+        if rng.random() >= NO_DESCRIPTION:
+            words = min(int(rng.lognormvariate(3, 0.8)) + 1, 120)
+            description = " ".join(rng.choices(WORDS, k=words))[:1000]
+        return {"title": title[:200], "description": description}
+
+    def _due_date(self):
+        if self.rng.random() < NO_DUE_DATE:
+            return None
+        # Mayormente próximas, algunas vencidas
+        offset = int(self.rng.gauss(15, 30))
+        return timezone.localdate() + datetime.timedelta(days=offset)
+
+    # Escenarios
+
+    def _scenarios(self, task_ids):
+        today = timezone.localdate()
+
+        def task_id(user):
+            return self.rng.choice(task_ids[user.pk])
+
+        scenarios = {
+            "list": lambda user: ("get", "/api/tasks/", None),
+            "list_filtered": lambda user: (
+                "get",
+                "/api/tasks/?status=PENDING&priority=HIGH",
+                None,
+            ),
+            "list_due_range": lambda user: (
+                "get",
+                f"/api/tasks/?due_date_after={today}"
+                f"&due_date_before={today + datetime.timedelta(days=30)}",
+                None,
+            ),
+            "search": lambda user: ("get", f"/api/tasks/?search={SEARCH_TERM}", None),
+        }
+        for field in TaskViewSet.ordering_fields:
+            scenarios[f"ordering_{field}"] = lambda user, field=field: (
+                "get",
+                f"/api/tasks/?ordering=-{field}",
+                None,
+            )
+        scenarios.update(
+            retrieve=lambda user: ("get", f"/api/tasks/{task_id(user)}/", None),
+            create=lambda user: (
+                "post",
+                "/api/tasks/",
+                {**self._fields(), "priority": Priority.MEDIUM},
+            ),
+            update=lambda user: (
+                "patch",
+                f"/api/tasks/{task_id(user)}/",
+                {"status": self.rng.choice(Status.values)},
+            ),
+            login=lambda user: (
+                "post",
+                "/api/auth/jwt/create/",
+                {"email": user.email, "password": PASSWORD},
+            ),
+        )
+        return scenarios
+
+    def _run(self, users, task_ids, options):
+        scenarios = self._scenarios(task_ids)
+        selected = options["scenario"] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(
+                f"Escenarios desconocidos: {', '.join(sorted(unknown))}. "
+                f"Disponibles: {', '.join(scenarios)}."
+            )
+        client = Client()
+        tokens = {
+            user.pk: str(TokenObtainPairSerializer.get_token(user).access_token)
+            for user in users
+        }
+        queries = 0
+        # execute_wrapper() saca el último wrapper al salir: el del middleware
+        # tiene que estar instalado antes que este.
+        db_instrumentation.install()
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        self.stdout.write(
+            f"{'escenario':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'consultas':>10} {'errores':>8}"
+        )
+        results = {}
+        for name in selected:
+            build = scenarios[name]
+            latencies, query_counts, errors = [], [], 0
+            for i in range(options["warmup"] + options["requests"]):
+                user = self.rng.choice(users)
+                method, path, body = build(user)
+                headers = {}
+                if name != "login":
+                    headers["HTTP_AUTHORIZATION"] = f"Bearer {tokens[user.pk]}"
+                queries = 0
+                with connection.execute_wrapper(count_queries):
+                    start = time.perf_counter()
+                    response = getattr(client, method)(
+                        path,
+                        data=body,
+                        content_type="application/json",
+                        HTTP_ACCEPT="application/json",
+                        **headers,
+                    )
+                    elapsed = time.perf_counter() - start
+                if i < options["warmup"]:
+                    continue
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+                latencies.append(elapsed)
+                query_counts.append(queries)
+            result = self._summary(latencies, query_counts, errors)
+            results[name] = result
+            self.stdout.write(
+                f"{name:<22} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} {result['queries_per_request']:>10.1f} "
+                f"{errors:>8}"
+            )
+        return results
+
+    @staticmethod
+    def _summary(latencies, query_counts, errors):
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = latencies[0] if latencies else 0.0
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "p50_ms": round(p50 * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "p99_ms": round(p99 * 1000, 3),
+            "queries_per_request": (
+                round(statistics.mean(query_counts), 2) if query_counts else 0.0
+            ),
+        }
+
+    # Comparación
+
+    def _compare(self, results, baseline, tolerance, meta):
+        # Con los mismos parámetros y semilla las consultas son deterministas
+        reference_meta = baseline.get("meta", {})
+        for key in ("users", "tasks", "requests", "seed", "database"):
+            if reference_meta.get(key) != meta[key]:
+                self.stderr.write(
+                    f"Aviso: la línea base usa {key}={reference_meta.get(key)!r} "
+                    f"y esta corrida {meta[key]!r}."
+                )
+        regressions = []
+        for name, result in results.items():
+            reference = baseline.get("scenarios", {}).get(name)
+            if reference is None:
+                continue
+            for metric in METRICS:
+                limit = reference[metric] * (1 + tolerance)
+                if result[metric] > limit:
+                    regressions.append(
+                        f"{name}: {metric} {result[metric]:.2f} > "
+                        f"{reference[metric]:.2f} (+{tolerance:.0%})"
+                    )
+            if result["queries_per_request"] > reference["queries_per_request"]:
+                regressions.append(
+                    f"{name}: consultas {result['queries_per_request']} > "
+                    f"{reference['queries_per_request']}"
+                )
+            if result["errors"] > reference.get("errors", 0):
+                regressions.append(f"{name}: {result['errors']} errores")
+        if regressions:
+            raise CommandError(
+                "Regresiones frente a la línea base:\n  " + "\n  ".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("Sin regresiones frente a la línea base."))
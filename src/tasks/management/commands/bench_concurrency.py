@@ -0,0 +1,182 @@
+import asyncio
+import json
+import ssl
+import statistics
+import time
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide throughput y latencia de un endpoint bajo distintos niveles de "
+        "concurrencia contra uno o más servidores ya levantados (p. ej. "
+        "gunicorn WSGI con --workers 3 y gunicorn + UvicornWorker con la misma "
+        "cantidad de workers y TASKS_ASYNC_VIEWS=true)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            required=True,
+            metavar="NOMBRE=URL",
+            help="Servidor a medir, p. ej. wsgi=http://localhost:8001 (repetible).",
+        )
+        parser.add_argument("--email", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument(
+            "--path", default="/api/tasks/", help="Endpoint a medir (GET)."
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 10, 50, 100, 200],
+            help="Clientes simultáneos (una conexión keep-alive cada uno).",
+        )
+        parser.add_argument(
+            "--seconds", type=float, default=10, help="Duración de cada medición."
+        )
+        parser.add_argument(
+            "--output", help="Archivo JSON donde guardar los resultados."
+        )
+
+    def handle(self, *args, target, email, password, path, concurrency, seconds,
+               output, **options):
+        targets = []
+        for item in target:
+            name, sep, url = item.partition("=")
+            if not sep or not url.startswith(("http://", "https://")):
+                raise CommandError(f"--target inválido: {item!r} (NOMBRE=URL).")
+            targets.append((name, url.rstrip("/")))
+
+        self.stdout.write(
+            f"{'servidor':<10} {'conc.':>6} {'req/s':>9} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'errores':>8}"
+        )
+        results = []
+        for name, base_url in targets:
+            token = self._login(base_url, email, password)
+            for clients in concurrency:
+                result = asyncio.run(
+                    self._measure(base_url + path, token, clients, seconds)
+                )
+                result.update(server=name, concurrency=clients)
+                results.append(result)
+                self.stdout.write(
+                    f"{name:<10} {clients:>6} {result['rps']:>9.1f} "
+                    f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                    f"{result['p99_ms']:>8.1f} {result['errors']:>8}"
+                )
+        if output:
+            with open(output, "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    @staticmethod
+    def _login(base_url, email, password):
+        request = Request(
+            f"{base_url}/api/auth/jwt/create/",
+            data=json.dumps({"email": email, "password": password}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urlopen(request, timeout=10) as response:
+                return json.load(response)["access"]
+        except OSError as exc:
+            raise CommandError(f"No se pudo obtener un token de {base_url}: {exc}")
+
+    async def _measure(self, url, token, clients, seconds):
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + seconds
+
+        async def client():
+            nonlocal errors
+            connection = None
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    if connection is None:
+                        connection = await _Connection.open(url)
+                    status = await connection.get(token)
+                except (OSError, asyncio.IncompleteReadError, IndexError, ValueError):
+                    errors += 1
+                    connection = None
+                    continue
+                if connection.closed:
+                    connection.close()
+                    connection = None
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+            if connection is not None:
+                connection.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = latencies[0] if latencies else 0.0
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed,
+            "p50_ms": p50 * 1000,
+            "p95_ms": p95 * 1000,
+            "p99_ms": p99 * 1000,
+        }
+
+
+class _Connection:
+    """Conexión HTTP/1.1 keep-alive mínima sobre ``asyncio`` (solo ``GET``)."""
+
+    def __init__(self, url, reader, writer):
+        self.url = url
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    @classmethod
+    async def open(cls, url):
+        parts = urlsplit(url)
+        https = parts.scheme == "https"
+        reader, writer = await asyncio.open_connection(
+            parts.hostname,
+            parts.port or (443 if https else 80),
+            ssl=ssl.create_default_context() if https else None,
+        )
+        return cls(parts, reader, writer)
+
+    async def get(self, token):
+        target = self.url.path + (f"?{self.url.query}" if self.url.query else "")
+        self.writer.write(
+            f"GET {target} HTTP/1.1\r\n"
+            f"Host: {self.url.netloc}\r\n"
+            f"Authorization: Bearer {token}\r\n"
+            "Accept: application/json\r\n"
+            "\r\n".encode()
+        )
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            while size := int((await self.reader.readline()).split(b";")[0], 16):
+                await self.reader.readexactly(size + 2)
+            await self.reader.readline()
+        else:
+            await self.reader.readexactly(int(headers.get("content-length", 0)))
+        self.closed = headers.get("connection", "").lower() == "close"
+        return status
+
+    def close(self):
+        self.writer.close()
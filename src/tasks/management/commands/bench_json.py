@@ -0,0 +1,91 @@
+import datetime
+import io
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import FastJSONParser, FastJSONRenderer, msgspec
+from tasks.models import Priority, Status
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el throughput de codificación/decodificación JSON de DRF "
+        "(stdlib) y de config.renderers (msgspec) sobre páginas de tareas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[10, 100, 1000]
+        )
+        parser.add_argument(
+            "--seconds",
+            type=float,
+            default=0.5,
+            help="Tiempo de medición por caso.",
+        )
+
+    def handle(self, *args, rows, seconds, **options):
+        if msgspec is None:
+            self.stderr.write("msgspec no está instalado: se mide el respaldo.")
+        cases = [
+            ("encode", JSONRenderer(), FastJSONRenderer(), self._encode),
+            ("decode", JSONParser(), FastJSONParser(), self._decode),
+        ]
+        self.stdout.write(
+            f"{'op':<7} {'filas':>6} {'stdlib ops/s':>13} {'msgspec ops/s':>14} "
+            f"{'MB/s':>8} {'mejora':>7}"
+        )
+        for size in rows:
+            page = self._page(size)
+            body = JSONRenderer().render(page)
+            for name, slow, fast, run in cases:
+                slow_ops = self._throughput(lambda: run(slow, page, body), seconds)
+                fast_ops = self._throughput(lambda: run(fast, page, body), seconds)
+                self.stdout.write(
+                    f"{name:<7} {size:>6} {slow_ops:>13.0f} {fast_ops:>14.0f} "
+                    f"{fast_ops * len(body) / 2**20:>8.1f} "
+                    f"{fast_ops / slow_ops:>6.1f}x"
+                )
+
+    @staticmethod
+    def _encode(renderer, page, body):
+        return renderer.render(page)
+
+    @staticmethod
+    def _decode(parser, page, body):
+        return parser.parse(io.BytesIO(body))
+
+    @staticmethod
+    def _throughput(run, seconds):
+        count, start = 0, time.perf_counter()
+        while (elapsed := time.perf_counter() - start) < seconds:
+            run()
+            count += 1
+        return count / elapsed
+
+    @staticmethod
+    def _page(size):
+        """Página con la forma de la respuesta de ``GET /api/tasks/``."""
+        rng = random.Random(0)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        results = [
+            {
+                "id": i,
+                "title": f"Tarea {i}",
+                "description": "descripción " * rng.randint(0, 20),
+                "priority": rng.choice(Priority.values),
+                "status": rng.choice(Status.values),
+                "due_date": (now.date() + datetime.timedelta(days=i % 30)).isoformat(),
+                "created_at": now - datetime.timedelta(minutes=i),
+                "updated_at": now,
+                "owner_id": 1,
+                "owner_email": "owner@example.com",
+            }
+            for i in range(size)
+        ]
+        return {"next": "http://testserver/api/tasks/?cursor=abc", "previous": None,
+                "results": results}
@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from tasks.models import Priority, Status, Task
+from tasks.serializers import TaskRowSerializer, TaskSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el costo por fila del listado con TaskSerializer (instancias) "
+        "y con TaskRowSerializer (tuplas). Los datos se crean dentro de una "
+        "transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[10, 100, 500, 1000],
+            help="Tamaños de página a medir.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Repeticiones por medición."
+        )
+
+    def handle(self, *args, rows, repeat, **options):
+        with transaction.atomic():
+            user = self._seed(max(rows))
+            request = APIRequestFactory().get("/api/tasks/")
+            request.user = user
+            context = {"request": request}
+            queryset = Task.objects.filter(owner=user).order_by("-created_at", "-id")
+
+            def model_path(size):
+                tasks = list(queryset[:size])
+                return TaskSerializer(tasks, many=True, context=context).data
+
+            def row_path(size):
+                serializer = TaskRowSerializer(context=context)
+                return serializer.serialize(serializer.prepare(queryset)[:size])
+
+            self.stdout.write(
+                f"{'filas':>6} {'instancias µs/fila':>20} {'tuplas µs/fila':>16} "
+                f"{'mejora':>8}"
+            )
+            for size in rows:
+                if [dict(r) for r in model_path(size)] != row_path(size):
+                    raise AssertionError("Las salidas no coinciden")
+                slow = self._measure(model_path, size, repeat)
+                fast = self._measure(row_path, size, repeat)
+                self.stdout.write(
+                    f"{size:>6} {slow:>20.2f} {fast:>16.2f} {slow / fast:>7.1f}x"
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _measure(path, size, repeat):
+        """Mediana del costo por fila (lectura + serialización) en µs."""
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            path(size)
+            samples.append((time.perf_counter() - start) / size * 1e6)
+        return statistics.median(samples)
+
+    @staticmethod
+    def _seed(count):
+        tag = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create_user(
+            email=f"bench-{tag}@example.com", username=f"bench-{tag}"
+        )
+        rng = random.Random(0)
+
+        def due_date():
+            if rng.random() < 0.3:
+                return None
+            return f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+        Task.objects.bulk_create(
+            Task(
+                owner=user,
+                title=f"Tarea {i}",
+                description="x" * rng.randint(0, 300),
+                priority=rng.choice(Priority.values),
+                status=rng.choice(Status.values),
+                due_date=due_date(),
+            )
+            for i in range(count)
+        )
+        return user
@@ -0,0 +1,82 @@
+import sys
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importer import IMPORT_FORMATS, import_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa tareas desde un archivo NDJSON o CSV para un usuario. Las "
+        "filas válidas se insertan en lotes (COPY en Postgres) y las inválidas "
+        "se informan sin detener la carga."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo a importar ('-' para stdin).")
+        parser.add_argument(
+            "--owner", required=True, help="Email del dueño de las tareas."
+        )
+        parser.add_argument(
+            "--format",
+            dest="import_format",
+            choices=tuple(IMPORT_FORMATS),
+            help="Formato del archivo (por defecto, según la extensión).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Filas por lote (por defecto TASKS_IMPORT_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Usar bulk_create también en Postgres.",
+        )
+
+    def handle(self, *args, path, owner, import_format, batch_size, no_copy, **options):
+        try:
+            user = get_user_model().objects.get(email=owner)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No existe un usuario con email {owner}.")
+        if import_format is None:
+            import_format = Path(path).suffix.lstrip(".").lower()
+            if import_format not in IMPORT_FORMATS:
+                raise CommandError("No se pudo deducir el formato; usá --format.")
+
+        self.started = time.perf_counter()
+        try:
+            stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        except OSError as exc:
+            raise CommandError(exc)
+        with stream:
+            summary = import_tasks(
+                stream,
+                user,
+                import_format,
+                batch_size=batch_size,
+                use_copy=False if no_copy else None,
+                progress=self.report,
+            )
+
+        for error in summary["errors"]:
+            self.stderr.write(f"línea {error['line']}: {error['errors']}")
+        if summary["errors_truncated"]:
+            self.stderr.write("(solo se muestran los primeros errores)")
+        style = self.style.WARNING if summary["failed"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"{summary['created']} tareas creadas, {summary['failed']} filas "
+                f"con errores de {summary['processed']}."
+            )
+        )
+
+    def report(self, importer):
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f"{importer.processed} filas procesadas, {importer.created} creadas, "
+            f"{importer.failed} con errores ({importer.processed / elapsed:.0f} filas/s)"
+        )
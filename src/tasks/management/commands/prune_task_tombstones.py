@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from tasks.changes import prune_tombstones, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina los tombstones del feed de cambios más viejos que "
+        "TASKS_TOMBSTONE_RETENTION_DAYS. Los cursores anteriores a esa fecha "
+        "reciben 410 y deben sincronizar desde cero."
+    )
+
+    def handle(self, *args, **options):
+        older_than = retention_cutoff()
+        deleted = prune_tombstones(older_than)
+        self.stdout.write(
+            f"{deleted} tombstones eliminados (anteriores a {older_than:%Y-%m-%d %H:%M})."
+        )
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde cero los contadores de GET /api/tasks/stats/ a partir "
+        "de las tareas (de todos los usuarios o de los indicados)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--owner",
+            action="append",
+            dest="owners",
+            help="Email del usuario a reconciliar (se puede repetir).",
+        )
+
+    def handle(self, *args, owners, **options):
+        owner_ids = None
+        if owners:
+            users = dict(
+                get_user_model()
+                .objects.filter(email__in=owners)
+                .values_list("email", "pk")
+            )
+            missing = set(owners) - set(users)
+            if missing:
+                raise CommandError(f"No existen usuarios: {', '.join(sorted(missing))}.")
+            owner_ids = list(users.values())
+        rows = rebuild_stats(owner_ids)
+        self.stdout.write(self.style.SUCCESS(f"{rows} contadores recalculados."))
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from tasks.search import install_search_schema, uninstall_search_schema
+
+
+def forwards(apps, schema_editor):
+    install_search_schema(schema_editor)
+
+
+def backwards(apps, schema_editor):
+    uninstall_search_schema(schema_editor)
+
+
+class Migration(migrations.Migration):
+    """Índice de texto completo: tsvector + GIN en Postgres, FTS5 en SQLite."""
+
+    dependencies = [
+        ("tasks", "0004_task_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
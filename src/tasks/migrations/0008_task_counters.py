@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    """Contadores iniciales a partir de las tareas existentes."""
+    Task = apps.get_model("tasks", "Task")
+    TaskCounter = apps.get_model("tasks", "TaskCounter")
+    TaskDueCounter = apps.get_model("tasks", "TaskDueCounter")
+    db = schema_editor.connection.alias
+    tasks = Task.objects.using(db).order_by()
+    TaskCounter.objects.using(db).bulk_create(
+        TaskCounter(**row)
+        for row in tasks.values("owner_id", "status", "priority").annotate(
+            count=Count("pk")
+        )
+    )
+    TaskDueCounter.objects.using(db).bulk_create(
+        TaskDueCounter(**row)
+        for row in tasks.filter(due_date__isnull=False)
+        .exclude(status="COMPLETED")
+        .values("owner_id", "due_date")
+        .annotate(count=Count("pk"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_tombstone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('IN_PROGRESS', 'En Progreso'), ('COMPLETED', 'Completada')], max_length=12)),
+                ('priority', models.CharField(choices=[('LOW', 'Baja'), ('MEDIUM', 'Media'), ('HIGH', 'Alta')], max_length=10)),
+                ('count', models.BigIntegerField(default=0)),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('owner', 'status', 'priority'), name='task_counter_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskDueCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('count', models.BigIntegerField(default=0)),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('owner', 'due_date'), name='task_due_counter_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from tasks.search import install_search_schema, uninstall_search_schema
+
+
+def rebuild_pg_search_column(apps, schema_editor):
+    # Solo Postgres: en SQLite FTS5 ya quita los acentos
+    if schema_editor.connection.vendor == "postgresql":
+        uninstall_search_schema(schema_editor)
+        install_search_schema(schema_editor)
+
+
+class Migration(migrations.Migration):
+    """Columna ``search_vector`` de Postgres con ``unaccent``, como FTS5."""
+
+    dependencies = [
+        ("tasks", "0010_task_change_seq"),
+    ]
+
+    operations = [
+        # Al volver atrás la columna queda con unaccent, que sigue funcionando
+        migrations.RunPython(rebuild_pg_search_column, migrations.RunPython.noop),
+    ]
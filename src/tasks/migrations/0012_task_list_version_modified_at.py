@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_search_unaccent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasklistversion',
+            name='modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
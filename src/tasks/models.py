@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class Priority(models.TextChoices):
@@ -8,6 +9,11 @@ class Priority(models.TextChoices):
     HIGH = "HIGH", "Alta"
 
 
+# Orden real de las prioridades: el texto de las choices ordena
+# alfabéticamente (MEDIUM > LOW > HIGH).
+PRIORITY_RANK = {Priority.LOW: 1, Priority.MEDIUM: 2, Priority.HIGH: 3}
+
+
 class Status(models.TextChoices):
     PENDING = "PENDING", "Pendiente"
     IN_PROGRESS = "IN_PROGRESS", "En Progreso"
@@ -24,18 +30,185 @@ class Task(models.Model):
         "Estado", max_length=12, choices=Status.choices, default=Status.PENDING
     )
     due_date = models.DateField("Fecha de Vencimiento", null=True, blank=True)
+    # Columna calculada por la base a partir de `priority`: se mantiene sola en
+    # todos los caminos de escritura (bulk, QuerySet.update, COPY). La API
+    # sigue exponiendo solo `priority`.
+    priority_rank = models.GeneratedField(
+        expression=models.Case(
+            *(
+                models.When(priority=priority, then=models.Value(rank))
+                for priority, rank in PRIORITY_RANK.items()
+            ),
+            default=models.Value(0),
+        ),
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=True,
+    )
 
     created_at = models.DateTimeField("Fecha de Creación", auto_now_add=True)
     updated_at = models.DateTimeField("Fecha de Actualización", auto_now=True)
+    # Número de cambio del dueño en la escritura más reciente (feed de
+    # cambios, ver tasks.changes)
+    change_seq = models.PositiveBigIntegerField(default=0, editable=False)
 
+    # Sin índice propio: todos los índices de `Meta.indexes` empiezan por owner.
     owner = models.ForeignKey(
-        settings.AUTH_USER_MODEL, related_name="tasks", on_delete=models.CASCADE
+        settings.AUTH_USER_MODEL,
+        related_name="tasks",
+        on_delete=models.CASCADE,
+        db_index=False,
     )
 
     class Meta:
         verbose_name = "Tarea"
         verbose_name_plural = "Tareas"
-        ordering = ["-priority", "-created_at"]
+        ordering = ["-priority_rank", "-created_at"]
+        # Índices alineados con los accesos reales del listado: siempre se
+        # filtra por owner y se ordena por un campo de `ordering_fields` con
+        # `id` como desempate (ver tasks.pagination), así que cada orden tiene
+        # su índice y la página se lee en orden, sin ordenar todo el conjunto.
+        indexes = [
+            models.Index(
+                fields=["owner", "created_at", "id"], name="task_owner_created_idx"
+            ),
+            models.Index(
+                fields=["owner", "updated_at", "id"], name="task_owner_updated_idx"
+            ),
+            # Feed de cambios
+            models.Index(
+                fields=["owner", "change_seq", "id"], name="task_owner_change_seq_idx"
+            ),
+            models.Index(fields=["owner", "due_date", "id"], name="task_owner_due_idx"),
+            models.Index(
+                fields=["owner", "priority", "id"], name="task_owner_priority_idx"
+            ),
+            # ?ordering=priority (ver TaskOrderingFilter)
+            models.Index(
+                fields=["owner", "priority_rank", "created_at", "id"],
+                name="task_owner_priority_rank_idx",
+            ),
+            models.Index(fields=["owner", "status", "id"], name="task_owner_status_idx"),
+            # ?status=X&due_date_before=...&ordering=due_date
+            models.Index(
+                fields=["owner", "status", "due_date", "id"],
+                name="task_owner_status_due_idx",
+            ),
+            # Tareas abiertas con vencimiento (vencidas / vencen hoy)
+            models.Index(
+                fields=["owner", "due_date"],
+                condition=~models.Q(status=Status.COMPLETED)
+                & models.Q(due_date__isnull=False),
+                name="task_owner_open_due_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class TaskListVersion(models.Model):
+    """Versión del listado de tareas de cada usuario.
+
+    Se incrementa en cada alta/modificación/baja (ver ``tasks.signals``) y
+    forma parte de la clave de la cache de respuestas (``tasks.cache``): al
+    cambiar, las entradas anteriores quedan huérfanas y expiran solas. Vive en
+    la base para que todos los workers vean la misma versión. Con
+    ``modified_at`` es también el validador (``ETag`` / ``Last-Modified``)
+    del listado, ver ``tasks.conditional``.
+    """
+
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    modified_at = models.DateTimeField(default=timezone.now)
+
+
+class TaskChangeSeq(models.Model):
+    """Último número de cambio de las tareas de cada usuario.
+
+    Cada transacción que escribe tareas incrementa el del dueño antes de
+    escribirlas (ver ``tasks.changes.next_change_seq``) y se lo asigna a las
+    filas y tombstones que escribe. La fila queda bloqueada hasta el final de
+    la transacción, así que los números de un usuario se confirman en orden:
+    el cursor del feed de cambios nunca pasa por encima de uno pendiente.
+    """
+
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+    )
+    value = models.PositiveBigIntegerField(default=0)
+
+
+class TaskTombstone(models.Model):
+    """Registro de una tarea borrada para el feed de cambios.
+
+    ``owner_id`` y ``task_id`` son enteros simples (sin FK) para que el
+    registro sobreviva al borrado de la tarea y del usuario. Se eliminan con
+    ``manage.py prune_task_tombstones``.
+    """
+
+    owner_id = models.BigIntegerField()
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # Número de cambio de la transacción que borró la tarea (ver TaskChangeSeq)
+    change_seq = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner_id", "change_seq", "id"], name="tombstone_owner_seq_idx"
+            ),
+        ]
+
+
+class TaskCounter(models.Model):
+    """Cantidad de tareas de un usuario por ``(status, priority)``.
+
+    A lo sumo nueve filas por usuario; las mantiene ``tasks.stats`` en cada
+    escritura y ``manage.py rebuild_task_stats`` las recalcula desde cero.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+    status = models.CharField(max_length=12, choices=Status.choices)
+    priority = models.CharField(max_length=10, choices=Priority.choices)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "status", "priority"], name="task_counter_uniq"
+            ),
+        ]
+
+
+class TaskDueCounter(models.Model):
+    """Cantidad de tareas abiertas (no completadas) de un usuario por fecha de
+    vencimiento, para calcular vencidas y que vencen hoy sin leer tareas."""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+    due_date = models.DateField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "due_date"], name="task_due_counter_uniq"
+            ),
+        ]
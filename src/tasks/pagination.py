@@ -0,0 +1,367 @@
+"""Paginación del listado de tareas.
+
+Por defecto se usa paginación por *keyset* (cursor): cada página se obtiene con
+``WHERE (orden) > (última posición) ORDER BY ... LIMIT n``, sin ``COUNT(*)`` ni
+``OFFSET``, por lo que el costo no crece con la profundidad de la página. El
+modo por número de página sigue disponible con ``?pagination=page`` (o al
+enviar ``?page=``) para clientes existentes.
+"""
+
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (
+    BasePagination,
+    PageNumberPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _max_page_size():
+    return getattr(settings, "TASKS_MAX_PAGE_SIZE", 1000)
+
+
+class TaskPageNumberPagination(PageNumberPagination):
+    """Paginación clásica por número de página (compatibilidad)."""
+
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return _max_page_size()
+
+
+class KeysetPagination(BasePagination):
+    """Paginación por keyset sobre el orden ya aplicado al queryset.
+
+    Soporta cualquier combinación de campos de orden (ascendente o
+    descendente, incluso con NULLs) y agrega ``id`` como desempate para que
+    la posición de cada fila sea única. El cursor es opaco: codifica la
+    posición de la última (o primera) fila y el orden con el que se generó.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    tie_breaker = "id"
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Versión ``async`` (sin ``?count=estimate``, que es síncrono)."""
+        queryset = self.page_queryset(queryset, request, view, count=False)
+        return self.set_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request, view=None, count=True):
+        """Queryset de la página pedida, con una fila extra para saber si hay
+        más."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset, view)
+        position, self.reverse = self.decode_cursor(request, queryset)
+        self.has_position = position is not None
+
+        self.count = None
+        self.count_is_estimate = False
+        if count and request.query_params.get(self.count_query_param) == "estimate":
+            self.count, self.count_is_estimate = self.estimate_count(queryset)
+
+        queryset = queryset.order_by(*self.get_order_by(self.reverse))
+        if position is not None:
+            queryset = queryset.filter(
+                self.after_position(queryset, position, self.reverse)
+            )
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, rows):
+        """Recorta las filas leídas de :meth:`page_queryset` y calcula los
+        cursores."""
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if self.reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, self.has_position
+
+        self.next_position = self.get_position(rows[-1]) if has_next and rows else None
+        self.previous_position = (
+            self.get_position(rows[0]) if has_previous and rows else None
+        )
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        payload = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        if self.count is not None:
+            payload["count"] = self.count
+            payload["count_is_estimate"] = self.count_is_estimate
+        payload["results"] = data
+        return payload
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {
+                    "type": "integer",
+                    "description": "Solo con ?count=estimate.",
+                },
+                "count_is_estimate": {"type": "boolean"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor opaco devuelto en `next`/`previous`.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cantidad de resultados por página.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "`estimate` agrega un total estimado (barato).",
+                "schema": {"type": "string", "enum": ["estimate"]},
+            },
+        ]
+
+    # Tamaño de página y conteo
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=_max_page_size(),
+            )
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+
+    def estimate_count(self, queryset):
+        """Total aproximado sin recorrer todo el conjunto.
+
+        En Postgres se usa la estimación del planificador; en el resto se
+        cuenta como máximo ``TASKS_ESTIMATED_COUNT_CAP`` filas.
+        """
+        queryset = queryset.order_by()
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql":
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"]), True
+
+        cap = getattr(settings, "TASKS_ESTIMATED_COUNT_CAP", 10000)
+        count = queryset[: cap + 1].count()
+        return min(count, cap), count > cap
+
+    # Orden y posición
+
+    def get_ordering(self, queryset, view):
+        ordering = [o for o in queryset.query.order_by if isinstance(o, str)]
+        if not ordering:
+            ordering = list(
+                getattr(view, "ordering", None) or queryset.model._meta.ordering
+            )
+        ordering = [
+            o for o in ordering if o.lstrip("-") not in {"pk", self.tie_breaker, "?"}
+        ]
+        descending = ordering[-1].startswith("-") if ordering else True
+        ordering.append(f"-{self.tie_breaker}" if descending else self.tie_breaker)
+        return ordering
+
+    def get_order_by(self, reverse):
+        if not reverse:
+            return self.ordering
+        return [o[1:] if o.startswith("-") else f"-{o}" for o in self.ordering]
+
+    def _field_names(self):
+        return [o.lstrip("-") for o in self.ordering]
+
+    def get_position(self, row):
+        if isinstance(row, dict):
+            return [row[name] for name in self._field_names()]
+        return [getattr(row, name) for name in self._field_names()]
+
+    def after_position(self, queryset, position, reverse):
+        """Condición "estrictamente después de ``position``" para el orden dado.
+
+        Se expande la comparación lexicográfica en términos ``OR`` y se agrega
+        una cota sobre el primer campo para que el motor pueda posicionarse
+        directamente en el índice en lugar de recorrerlo desde el inicio.
+        """
+        nulls_largest = connections[queryset.db].features.nulls_order_largest
+        prefix = Q()
+        terms = []
+        leading_bound = None
+        for index, (name, value) in enumerate(zip(self._field_names(), position)):
+            descending = self.get_order_by(reverse)[index].startswith("-")
+            nullable = self._is_nullable(queryset.model, name)
+            nulls_last = nullable and (not descending if nulls_largest else descending)
+            lookup = "lt" if descending else "gt"
+
+            if value is None:
+                after = Q(**{f"{name}__isnull": False}) if not nulls_last else None
+                equal = Q(**{f"{name}__isnull": True})
+            else:
+                after = Q(**{f"{name}__{lookup}": value})
+                if nulls_last:
+                    after |= Q(**{f"{name}__isnull": True})
+                equal = Q(**{name: value})
+                if index == 0 and not nulls_last:
+                    leading_bound = Q(**{f"{name}__{lookup}e": value})
+
+            if after is not None:
+                terms.append(prefix & after)
+            prefix &= equal
+
+        condition = Q()
+        for term in terms:
+            condition |= term
+        if leading_bound is not None:
+            condition = leading_bound & condition
+        return condition
+
+    @staticmethod
+    def _is_nullable(model, name):
+        try:
+            return model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return False
+
+    # Codificación del cursor
+
+    def encode_cursor(self, position, reverse):
+        values = [
+            v.isoformat() if isinstance(v, (datetime.date, datetime.datetime)) else v
+            for v in position
+        ]
+        token = {"p": values, "o": self.ordering}
+        if reverse:
+            token["r"] = 1
+        raw = json.dumps(token, separators=(",", ":"), default=str).encode()
+        encoded = urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            raw = urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            token = json.loads(raw)
+            values, reverse = token["p"], bool(token.get("r"))
+            if token["o"] != self.ordering or len(values) != len(self.ordering):
+                raise ValueError("ordering mismatch")
+            position = [
+                self._to_python(queryset.model, name, value)
+                for name, value in zip(self._field_names(), values)
+            ]
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    @staticmethod
+    def _to_python(model, name, value):
+        if value is None:
+            return None
+        try:
+            return model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            return value
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+
+class TaskPagination(BasePagination):
+    """Elige entre keyset (por defecto) y número de página.
+
+    ``?pagination=page`` (o la presencia de ``?page=``) mantiene la respuesta
+    clásica con ``count``; ``?pagination=cursor`` fuerza el modo keyset.
+    """
+
+    mode_query_param = "pagination"
+    keyset_class = KeysetPagination
+    page_number_class = TaskPageNumberPagination
+
+    def get_paginator(self, request):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode is None:
+            mode = "page" if "page" in request.query_params else "cursor"
+        if mode == "page":
+            return self.page_number_class()
+        if mode == "cursor":
+            return self.keyset_class()
+        raise ValidationError(
+            {self.mode_query_param: ["Valores válidos: 'cursor' o 'page'."]}
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.keyset_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "`cursor` (por defecto, keyset) o `page` (número de página).",
+                "schema": {"type": "string", "enum": ["cursor", "page"]},
+            }
+        ]
+        parameters += self.keyset_class().get_schema_operation_parameters(view)
+        parameters += [
+            p
+            for p in self.page_number_class().get_schema_operation_parameters(view)
+            if p["name"] != self.keyset_class.page_size_query_param
+        ]
+        return parameters
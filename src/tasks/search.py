@@ -0,0 +1,307 @@
+"""Búsqueda de texto completo sobre título y descripción de las tareas.
+
+Cada motor de base de datos tiene su backend:
+
+* Postgres: columna generada ``search_vector`` (``tsvector`` almacenado) con
+  índice GIN; ``ts_rank_cd`` para ordenar por relevancia. Texto y consulta
+  pasan por ``unaccent`` (extensión de contrib, envuelta en una función
+  ``IMMUTABLE`` para poder usarla en la columna generada).
+* SQLite: tabla FTS5 ``tasks_task_fts`` de contenido externo, sincronizada con
+  triggers; ``bm25`` para la relevancia. El tokenizer quita los acentos
+  (``remove_diacritics``).
+* Resto (o FTS5 no disponible): ``icontains`` como el ``SearchFilter`` de DRF.
+
+Así "reunion" encuentra "Reunión" tanto en Postgres como en SQLite.
+
+El backend se puede reemplazar con ``TASKS_SEARCH_BACKEND`` (ruta a una clase
+con la misma interfaz que :class:`BaseTaskSearchBackend`).
+
+Las estructuras (columna, tabla FTS5, triggers) no forman parte del modelo:
+las crea la migración ``0005_task_search`` con :func:`install_search_schema`
+(``0011_task_search_unaccent`` rehace la columna de Postgres con
+``unaccent``).
+En SQLite, cuando una migración reconstruye ``tasks_task`` los triggers se
+pierden; :func:`ensure_sqlite_search_triggers` los repone en ``post_migrate``.
+"""
+
+import re
+from functools import reduce
+from operator import and_, or_
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+SEARCH_MODES = ("prefix", "phrase", "ranked")
+DEFAULT_SEARCH_MODE = "prefix"
+RANK_ANNOTATION = "search_rank"
+
+# Se buscan palabras; cualquier otro carácter se descarta, lo que además deja
+# los términos libres de operadores de tsquery / FTS5.
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 16
+
+TASK_TABLE = "tasks_task"
+PG_SEARCH_COLUMN = "search_vector"
+PG_SEARCH_INDEX = "task_search_vector_idx"
+PG_SEARCH_CONFIG = "simple"
+PG_UNACCENT_FUNCTION = "tasks_unaccent"
+FTS_TABLE = "tasks_task_fts"
+FTS_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TASK_TABLE}
+        BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+    f"{FTS_TABLE}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TASK_TABLE}
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """,
+    f"{FTS_TABLE}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF title, description ON {TASK_TABLE}
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+}
+
+
+def search_terms(text):
+    return _TERM_RE.findall(text or "")[:MAX_TERMS]
+
+
+class BaseTaskSearchBackend:
+    """Interfaz común: filtra (y opcionalmente anota relevancia) un queryset."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def is_available(self):
+        return True
+
+    def search(self, queryset, terms, mode):
+        """Devuelve ``(queryset, ranked)``.
+
+        Si ``ranked`` es verdadero el queryset trae la anotación
+        ``search_rank`` (mayor es más relevante).
+        """
+        raise NotImplementedError
+
+
+class IContainsSearchBackend(BaseTaskSearchBackend):
+    """Respaldo sin índice: mismo comportamiento que ``SearchFilter``."""
+
+    fields = ("title", "description")
+
+    def _match(self, term):
+        return reduce(or_, (Q(**{f"{f}__icontains": term}) for f in self.fields))
+
+    def search(self, queryset, terms, mode):
+        if mode == "phrase":
+            return queryset.filter(self._match(" ".join(terms))), False
+        combine = or_ if mode == "ranked" else and_
+        return queryset.filter(reduce(combine, map(self._match, terms))), False
+
+
+class PostgresSearchBackend(BaseTaskSearchBackend):
+    def _tsquery(self, terms, mode):
+        if mode == "phrase":
+            return (
+                f"phraseto_tsquery(%s::regconfig, {PG_UNACCENT_FUNCTION}(%s))",
+                " ".join(terms),
+            )
+        joiner = " | " if mode == "ranked" else " & "
+        return (
+            f"to_tsquery(%s::regconfig, {PG_UNACCENT_FUNCTION}(%s))",
+            joiner.join(f"{t}:*" for t in terms),
+        )
+
+    def search(self, queryset, terms, mode):
+        function, query = self._tsquery(terms, mode)
+        column = f'"{TASK_TABLE}"."{PG_SEARCH_COLUMN}"'
+        params = (PG_SEARCH_CONFIG, query)
+        queryset = queryset.filter(
+            RawSQL(f"{column} @@ {function}", params, output_field=BooleanField())
+        )
+        if mode != "ranked":
+            return queryset, False
+        rank = RawSQL(f"ts_rank_cd({column}, {function})", params, FloatField())
+        return queryset.annotate(**{RANK_ANNOTATION: rank}), True
+
+
+class SQLiteFTS5SearchBackend(BaseTaskSearchBackend):
+    # Pesos de bm25 por columna (title, description)
+    weights = (2.0, 1.0)
+
+    def is_available(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [FTS_TABLE],
+            )
+            return cursor.fetchone() is not None
+
+    def _match(self, terms, mode):
+        if mode == "phrase":
+            return '"%s"' % " ".join(terms)
+        joiner = " OR " if mode == "ranked" else " "
+        return joiner.join(f'"{t}"*' for t in terms)
+
+    def search(self, queryset, terms, mode):
+        match = self._match(terms, mode)
+        queryset = queryset.filter(
+            RawSQL(
+                f'"{TASK_TABLE}"."id" IN '
+                f"(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+                (match,),
+                output_field=BooleanField(),
+            )
+        )
+        if mode != "ranked":
+            return queryset, False
+        weights = ", ".join(str(w) for w in self.weights)
+        rank = RawSQL(
+            f"(SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{TASK_TABLE}"."id")',
+            (match,),
+            FloatField(),
+        )
+        return queryset.annotate(**{RANK_ANNOTATION: rank}), True
+
+
+VENDOR_BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteFTS5SearchBackend,
+}
+
+_backends = {}
+
+
+def get_search_backend(using="default"):
+    """Backend de búsqueda para el alias de base de datos dado (cacheado)."""
+    backend = _backends.get(using)
+    if backend is None:
+        connection = connections[using]
+        path = getattr(settings, "TASKS_SEARCH_BACKEND", None)
+        backend_class = (
+            import_string(path)
+            if path
+            else VENDOR_BACKENDS.get(connection.vendor, IContainsSearchBackend)
+        )
+        backend = backend_class(connection)
+        if not backend.is_available():
+            backend = IContainsSearchBackend(connection)
+        _backends[using] = backend
+    return backend
+
+
+async def aget_search_backend(using="default"):
+    """Como :func:`get_search_backend`; solo la primera llamada por alias sale
+    del event loop (detectar el backend consulta la base)."""
+    backend = _backends.get(using)
+    if backend is None:
+        backend = await sync_to_async(get_search_backend)(using)
+    return backend
+
+
+# Esquema (migraciones)
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any("FTS5" in row[0] for row in cursor.fetchall())
+
+
+def install_pg_unaccent(schema_editor):
+    """Extensión ``unaccent`` y su envoltorio ``IMMUTABLE``.
+
+    ``unaccent(text)`` es ``STABLE`` (depende del ``search_path``), así que no
+    se puede usar en una columna generada; la versión de dos argumentos con
+    el diccionario y el esquema explícitos sí es inmutable en la práctica.
+    ``unaccent`` es una extensión "trusted": alcanza con ser dueño de la base.
+    """
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT extnamespace::regnamespace::text FROM pg_extension "
+            "WHERE extname = 'unaccent'"
+        )
+        schema = cursor.fetchone()[0]
+    schema_editor.execute(
+        f"CREATE OR REPLACE FUNCTION {PG_UNACCENT_FUNCTION}(text) RETURNS text "
+        f"AS $$ SELECT {schema}.unaccent('{schema}.unaccent'::regdictionary, $1) $$ "
+        f"LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+    )
+
+
+def install_search_schema(schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        install_pg_unaccent(schema_editor)
+        schema_editor.execute(
+            f"ALTER TABLE {TASK_TABLE} ADD COLUMN IF NOT EXISTS {PG_SEARCH_COLUMN} "
+            f"tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{PG_SEARCH_CONFIG}', "
+            f"{PG_UNACCENT_FUNCTION}(coalesce(title, ''))), 'A') || "
+            f"setweight(to_tsvector('{PG_SEARCH_CONFIG}', "
+            f"{PG_UNACCENT_FUNCTION}(coalesce(description, ''))), 'B')"
+            f") STORED"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PG_SEARCH_INDEX} "
+            f"ON {TASK_TABLE} USING GIN ({PG_SEARCH_COLUMN})"
+        )
+    elif connection.vendor == "sqlite" and _sqlite_has_fts5(connection):
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"title, description, content='{TASK_TABLE}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+        ensure_sqlite_search_triggers(connection)
+    _backends.clear()
+
+
+def uninstall_search_schema(schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {PG_SEARCH_INDEX}")
+        schema_editor.execute(
+            f"ALTER TABLE {TASK_TABLE} DROP COLUMN IF EXISTS {PG_SEARCH_COLUMN}"
+        )
+        schema_editor.execute(f"DROP FUNCTION IF EXISTS {PG_UNACCENT_FUNCTION}(text)")
+    elif connection.vendor == "sqlite":
+        for name in FTS_TRIGGERS:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    _backends.clear()
+
+
+def ensure_sqlite_search_triggers(connection):
+    """Crea los triggers FTS5 faltantes y reindexa si hizo falta alguno."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') "
+            "AND name LIKE %s",
+            [f"{FTS_TABLE}%"],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            return
+        missing = [name for name in FTS_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(FTS_TRIGGERS[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
@@ -1,13 +1,27 @@
-from rest_framework import serializers
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
 from .models import Task
 
 
 class TaskSerializer(serializers.ModelSerializer):
-    """Serializer para Task con owner solo lectura (id y email)."""
+    """Serializer para Task con owner solo lectura (id y email).
+
+    Las tareas del listado pertenecen siempre al usuario autenticado, así que
+    el email se toma de ``request.user`` en lugar de cargar ``owner`` por fila.
+    """
 
-    owner_id = serializers.ReadOnlyField(source="owner.id")
-    owner_email = serializers.ReadOnlyField(source="owner.email")
+    owner_id = serializers.ReadOnlyField()
+    owner_email = serializers.SerializerMethodField(
+        help_text="Correo electrónico del usuario"
+    )
 
     class Meta:
         model = Task
@@ -23,3 +37,199 @@ class TaskSerializer(serializers.ModelSerializer):
             "owner_id",
             "owner_email",
         )
+
+    @extend_schema_field(OpenApiTypes.EMAIL)
+    def get_owner_email(self, obj):
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        if user is not None and user.pk == obj.owner_id:
+            return user.email
+        return obj.owner.email
+
+
+class TaskRowSerializer:
+    """Serialización de solo lectura del listado a partir de tuplas.
+
+    Lee con ``values_list(named=True)`` exactamente las columnas que usa
+    ``TaskSerializer`` y las formatea con funciones precalculadas por campo,
+    sin instanciar ``Task`` ni recorrer los campos del serializer por fila.
+    La salida es idéntica a ``TaskSerializer(many=True).data``: los campos sin
+    formateador rápido usan el ``to_representation`` del propio campo y los
+    ``SerializerMethodField`` se implementan aquí como ``get_<campo>(row)``.
+    """
+
+    serializer_class = TaskSerializer
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        request = self.context.get("request")
+        self.user = getattr(request, "user", None)
+        serializer = self.serializer_class(context=self.context)
+        fields = [
+            (name, field)
+            for name, field in serializer.fields.items()
+            if not field.write_only
+        ]
+        self.columns = list(
+            dict.fromkeys(f.source for _, f in fields if f.source != "*")
+        )
+        # (nombre, índice de columna o None para métodos, formateador)
+        self.plan = [self._plan(name, field) for name, field in fields]
+        self._emails = {}
+
+    def prepare(self, queryset):
+        """``queryset`` como filas livianas, conservando las columnas de orden
+        que necesita la paginación por keyset (p. ej. ``search_rank``)."""
+        ordering = [
+            o.lstrip("-") for o in queryset.query.order_by if isinstance(o, str)
+        ]
+        extra = [name for name in ordering if name not in self.columns]
+        return queryset.values_list(*self.columns, *extra, named=True)
+
+    def serialize(self, rows):
+        rows = list(rows)
+        self._load_emails(rows)
+        data = []
+        for row in rows:
+            item = {}
+            for name, index, represent in self.plan:
+                if index is None:
+                    item[name] = represent(row)
+                else:
+                    value = row[index]
+                    item[name] = None if value is None else represent(value)
+            data.append(item)
+        return data
+
+    # Formateadores por campo
+
+    def _plan(self, name, field):
+        if isinstance(field, serializers.SerializerMethodField):
+            method = getattr(self, f"get_{name}", None)
+            if method is None:
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__} necesita get_{name}(row) para el "
+                    f"SerializerMethodField '{name}'."
+                )
+            return name, None, method
+        return name, self.columns.index(field.source), self._value_formatter(field)
+
+    @staticmethod
+    def _value_formatter(field):
+        represent = field.to_representation
+        if isinstance(field, serializers.ChoiceField):
+            choices = field.choice_strings_to_values
+            return lambda v: choices.get(v, v) if type(v) is str else represent(v)
+        if isinstance(field, (serializers.CharField, serializers.IntegerField)):
+            native = str if isinstance(field, serializers.CharField) else int
+            return lambda v: v if type(v) is native else represent(v)
+        if isinstance(field, serializers.ReadOnlyField):
+            return lambda v: v
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+            if hasattr(field, "timezone"):
+                tz = field.timezone
+            else:
+                tz = field.default_timezone()
+            if tz is None or not _is_iso(output_format):
+                return represent
+
+            def datetime_formatter(value):
+                if type(value) is str or value.tzinfo is None:
+                    return represent(value)
+                value = value.astimezone(tz).isoformat()
+                return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+            return datetime_formatter
+        if isinstance(field, serializers.DateField):
+            if _is_iso(getattr(field, "format", api_settings.DATE_FORMAT)):
+                date = datetime.date
+                return lambda v: v.isoformat() if type(v) is date else represent(v)
+        return represent
+
+    # SerializerMethodField
+
+    def _load_emails(self, rows):
+        user_pk = getattr(self.user, "pk", None)
+        missing = {row.owner_id for row in rows} - {user_pk} - set(self._emails)
+        if missing:
+            self._emails.update(
+                get_user_model()
+                .objects.filter(pk__in=missing)
+                .values_list("pk", "email")
+            )
+
+    def get_owner_email(self, row):
+        if self.user is not None and self.user.pk == row.owner_id:
+            return self.user.email
+        return self._emails.get(row.owner_id)
+
+
+def _is_iso(output_format):
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+class TaskBulkSerializer(serializers.Serializer):
+    """Lote de operaciones para ``POST /api/tasks/bulk/``.
+
+    Cada ítem de ``create``/``update`` tiene la forma de ``TaskSerializer``
+    (``update`` además requiere ``id``); ``delete`` es una lista de ids.
+    """
+
+    create = serializers.ListField(child=serializers.DictField(), default=list)
+    update = serializers.ListField(child=serializers.DictField(), default=list)
+    delete = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), default=list
+    )
+
+    def validate_update(self, items):
+        for item in items:
+            if not isinstance(item.get("id"), int) or isinstance(item["id"], bool):
+                raise serializers.ValidationError("Cada ítem requiere un `id` entero.")
+        return items
+
+    def validate(self, attrs):
+        size = sum(len(attrs[op]) for op in ("create", "update", "delete"))
+        max_size = settings.TASKS_BULK_MAX_BATCH_SIZE
+        if not size:
+            raise serializers.ValidationError("El lote está vacío.")
+        if size > max_size:
+            raise serializers.ValidationError(
+                f"El lote supera el máximo de {max_size} operaciones."
+            )
+        ids = [item["id"] for item in attrs["update"]] + attrs["delete"]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError(
+                "Cada id puede aparecer una sola vez entre update y delete."
+            )
+        return attrs
+
+
+class TaskBulkActionSerializer(serializers.Serializer):
+    """Acción para ``POST /api/tasks/bulk-action/`` sobre el listado filtrado."""
+
+    UPDATABLE_FIELDS = ("priority", "status", "due_date")
+
+    action = serializers.ChoiceField(choices=["update", "delete"])
+    values = serializers.DictField(default=dict)
+    dry_run = serializers.BooleanField(default=False)
+    # Sin filtros la acción alcanza a todas las tareas: hay que pedirlo
+    # explícitamente (ver TaskViewSet.bulk_action)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs["action"] == "delete":
+            attrs["values"] = {}
+            return attrs
+
+        values = attrs["values"]
+        unknown = set(values) - set(self.UPDATABLE_FIELDS)
+        if not values or unknown:
+            raise serializers.ValidationError(
+                {"values": f"Campos modificables: {', '.join(self.UPDATABLE_FIELDS)}."}
+            )
+        serializer = TaskSerializer(data=values, partial=True)
+        if not serializer.is_valid():
+            raise serializers.ValidationError({"values": serializer.errors})
+        attrs["values"] = serializer.validated_data
+        return attrs
@@ -0,0 +1,22 @@
+"""Señales propias de la app de tareas.
+
+``tasks_changed`` se envía después de cualquier escritura sobre las tareas
+hecha por la API (incluidos los caminos en lote) o por el admin, con los ids de
+los usuarios afectados. No se usan ``post_save``/``post_delete`` porque
+``bulk_create``, ``bulk_update`` y ``QuerySet.update`` no los disparan, y
+porque registrar receptores de borrado impide el ``DELETE`` directo de
+``QuerySet.delete``.
+"""
+
+from django.dispatch import Signal
+
+from .models import Task
+
+# kwargs: owner_ids (conjunto de ids de usuario), using (alias de la base)
+tasks_changed = Signal()
+
+
+def notify_tasks_changed(owner_ids, using="default"):
+    owner_ids = {pk for pk in owner_ids if pk is not None}
+    if owner_ids:
+        tasks_changed.send(sender=Task, owner_ids=owner_ids, using=using)
@@ -0,0 +1,207 @@
+"""Estadísticas por usuario (``GET /api/tasks/stats/``) mantenidas con
+contadores.
+
+:class:`TaskCounter` guarda la cantidad de tareas por ``(status, priority)``
+y :class:`TaskDueCounter` la de tareas abiertas por fecha de vencimiento. Cada
+camino de escritura (API, lotes, acción filtrada, importación, admin y
+:func:`tasks.changes.delete_tasks`) acumula la diferencia en un
+:class:`StatsDelta` y la aplica en la misma transacción con un ``INSERT ...
+ON CONFLICT DO UPDATE`` por tabla. Leer las estadísticas cuesta dos consultas
+sobre esas tablas (a lo sumo nueve filas más una por fecha de vencimiento
+pendiente hasta hoy, ver :func:`get_stats`), sin importar cuántas tareas
+tenga el usuario.
+
+Un ``Task.save()`` o ``QuerySet.update()`` hecho por fuera de esos caminos no
+actualiza los contadores; ``manage.py rebuild_task_stats`` los recalcula.
+"""
+
+import operator
+from collections import Counter
+from functools import reduce
+
+from django.db import connections, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Priority, Status, Task, TaskCounter, TaskDueCounter
+
+GROUP_FIELDS = ("owner_id", "status", "priority", "due_date")
+
+
+def lock_rows(queryset):
+    """``(pk, *GROUP_FIELDS)`` de cada tarea de ``queryset``, con las filas
+    bloqueadas (``SELECT ... FOR UPDATE``) hasta el final de la transacción.
+
+    Para lotes acotados (``TASKS_BULK_MAX_BATCH_SIZE``) que necesitan saber
+    qué ids existen. La diferencia se calcula sobre estas filas y la escritura
+    se limita a ellas: una modificación concurrente no puede cambiarlas en el
+    medio y descuadrar los contadores.
+    """
+    return list(
+        queryset.select_for_update(of=("self",))
+        .order_by("pk")
+        .values_list("pk", *GROUP_FIELDS)
+    )
+
+
+def lock_groups(queryset):
+    """Bloquea las filas de ``queryset`` (``SELECT ... FOR UPDATE``) hasta el
+    final de la transacción y devuelve ``(GROUP_FIELDS, cantidad)`` por grupo.
+
+    Para conjuntos sin tope (acción filtrada, borrado desde el admin): el
+    bloqueo no trae las filas, la base devuelve solo cuántas bloqueó, y la
+    diferencia sale de un ``GROUP BY`` sobre las mismas filas, que ya no
+    pueden cambiar. El llamador escribe después con ``queryset`` tal cual, en
+    una sola sentencia.
+    """
+    connection = connections[queryset.db]
+    if connection.features.has_select_for_update:
+        locking = queryset.select_for_update(of=("self",)).order_by("pk").values("pk")
+        sql, params = locking.query.get_compiler(queryset.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM ({sql}) AS locked_tasks", params)
+    return [
+        (tuple(row[f] for f in GROUP_FIELDS), row["n"])
+        for row in queryset.order_by().values(*GROUP_FIELDS).annotate(n=Count("pk"))
+    ]
+
+
+class StatsDelta:
+    """Diferencias pendientes de aplicar a los contadores."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.due = Counter()
+
+    def add(self, owner_id, status, priority, due_date, n=1):
+        self.counts[owner_id, status, priority] += n
+        if due_date is not None and status != Status.COMPLETED:
+            self.due[owner_id, due_date] += n
+
+    def add_task(self, task, n=1):
+        self.add(task.owner_id, task.status, task.priority, task.due_date, n)
+
+    def add_groups(self, groups, n=1, changes=None):
+        """Suma ``n`` veces los grupos ``groups`` (``(GROUP_FIELDS,
+        cantidad)``, ver :func:`lock_groups`; ``-1`` para bajas). Con
+        ``changes`` registra en cambio el efecto de aplicarles
+        ``update(**changes)``."""
+        for key, count in groups:
+            if changes is None:
+                self.add(*key, n * count)
+                continue
+            self.add(*key, -count)
+            row = dict(zip(GROUP_FIELDS, key), **changes)
+            self.add(*(row[f] for f in GROUP_FIELDS), count)
+
+    def apply(self, using="default"):
+        connection = connections[using]
+        with transaction.atomic(using=using, savepoint=False):
+            _upsert(
+                connection,
+                TaskCounter,
+                ("owner_id", "status", "priority"),
+                [(*key, n) for key, n in self.counts.items() if n],
+            )
+            adapt = connection.ops.adapt_datefield_value
+            _upsert(
+                connection,
+                TaskDueCounter,
+                ("owner_id", "due_date"),
+                [(owner, adapt(due), n) for (owner, due), n in self.due.items() if n],
+            )
+            # Sin filas en cero: get_stats recorre una por fecha pendiente
+            emptied = [key for key, n in self.due.items() if n < 0]
+            if emptied:
+                TaskDueCounter.objects.using(using).filter(
+                    reduce(
+                        operator.or_,
+                        (Q(owner_id=owner, due_date=due) for owner, due in emptied),
+                    ),
+                    count__lte=0,
+                ).delete()
+        self.counts.clear()
+        self.due.clear()
+
+
+def _upsert(connection, model, key_columns, rows):
+    """Suma ``count`` a cada fila (clave..., count), creándola si no existe."""
+    if not rows:
+        return
+    qn = connection.ops.quote_name
+    table, count = qn(model._meta.db_table), qn("count")
+    keys = ", ".join(map(qn, key_columns))
+    placeholder = "(%s)" % ", ".join(["%s"] * (len(key_columns) + 1))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({keys}, {count}) "
+            f"VALUES {', '.join([placeholder] * len(rows))} "
+            f"ON CONFLICT ({keys}) "
+            f"DO UPDATE SET {count} = {table}.{count} + excluded.{count}",
+            [value for row in rows for value in row],
+        )
+
+
+def rebuild_stats(owner_ids=None, using="default"):
+    """Recalcula los contadores desde ``Task`` (de todos los usuarios o de
+    ``owner_ids``). Devuelve la cantidad de filas de contadores creadas."""
+    tasks = Task.objects.using(using)
+    counters = TaskCounter.objects.using(using)
+    due_counters = TaskDueCounter.objects.using(using)
+    if owner_ids is not None:
+        tasks = tasks.filter(owner_id__in=owner_ids)
+        counters = counters.filter(owner_id__in=owner_ids)
+        due_counters = due_counters.filter(owner_id__in=owner_ids)
+
+    with transaction.atomic(using=using):
+        counters.delete()
+        due_counters.delete()
+        created = TaskCounter.objects.using(using).bulk_create(
+            TaskCounter(**row)
+            for row in tasks.order_by()
+            .values("owner_id", "status", "priority")
+            .annotate(count=Count("pk"))
+        )
+        created += TaskDueCounter.objects.using(using).bulk_create(
+            TaskDueCounter(**row)
+            for row in tasks.order_by()
+            .filter(due_date__isnull=False)
+            .exclude(status=Status.COMPLETED)
+            .values("owner_id", "due_date")
+            .annotate(count=Count("pk"))
+        )
+    return len(created)
+
+
+def get_stats(owner_id, using="default"):
+    """Estadísticas de ``owner_id`` leídas de los contadores.
+
+    ``by_status``/``by_priority`` leen a lo sumo nueve filas. ``overdue`` y
+    ``due_today`` suman en la base una fila de :class:`TaskDueCounter` por
+    cada fecha (hasta hoy) con tareas abiertas: no dependen de la cantidad de
+    tareas pero sí de cuántas fechas de vencimiento distintas siguen
+    pendientes. No se guarda un total de vencidas porque cambia solo con el
+    paso de los días; las filas que quedan en cero se borran al aplicar cada
+    :class:`StatsDelta`.
+    """
+    today = timezone.localdate()
+    by_status = dict.fromkeys(Status.values, 0)
+    by_priority = dict.fromkeys(Priority.values, 0)
+    rows = TaskCounter.objects.using(using).filter(owner_id=owner_id)
+    for status, priority, count in rows.values_list("status", "priority", "count"):
+        by_status[status] = by_status.get(status, 0) + count
+        by_priority[priority] = by_priority.get(priority, 0) + count
+    due = (
+        TaskDueCounter.objects.using(using)
+        .filter(owner_id=owner_id, due_date__lte=today)
+        .aggregate(
+            overdue=Sum("count", filter=Q(due_date__lt=today), default=0),
+            due_today=Sum("count", filter=Q(due_date=today), default=0),
+        )
+    )
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_priority": by_priority,
+        **due,
+    }
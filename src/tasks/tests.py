@@ -1,8 +1,67 @@
+import csv
+import datetime
+import json
+import logging
+import os
+import threading
+import tempfile
+import uuid
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import skipUnless
+from types import ModuleType, SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib import admin
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.http import StreamingHttpResponse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, resolve
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.logging_utils import (
+    AccessLogSampler,
+    JSONFormatter,
+    QueuedStreamHandler,
+    RequestIDFilter,
+    request_id_var,
+)
+from config import db_instrumentation, metrics, throttling
+from config.db_router import ReplicaHealth, current_route, get_replica_health
+from config.middleware import ReplicaRoutingMiddleware
+from config.renderers import FastJSONParser, FastJSONRenderer
+from config.testing import APITestCase, CaptureStatementsContext
 
-from .models import Priority, Status
+from .admin import TaskAdmin
+from .async_views import TaskListAsyncView
+from .cache import LocalLRUListCache, get_list_cache
+from .importer import IMPORT_FORMATS, TaskRowValidator, copy_data
+from .models import (
+    Priority,
+    Status,
+    Task,
+    TaskDueCounter,
+    TaskListVersion,
+    TaskTombstone,
+)
+from .serializers import TaskRowSerializer, TaskSerializer
+from .signals import notify_tasks_changed
+from .stats import get_stats, rebuild_stats
+from .urls import async_urlpatterns, router
 
 
 class TestTaskAPI(APITestCase):
@@ -33,8 +92,8 @@ class TestTaskAPI(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         task_id = res.data["id"]
 
-        # List returns the created task
-        res = self.client.get(self.list_url)
+        # List returns the created task (page-number mode keeps `count`)
+        res = self.client.get(self.list_url, {"pagination": "page"})
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(res.data["count"], 1)
 
@@ -51,3 +110,2008 @@ class TestTaskAPI(APITestCase):
         # Delete
         res = self.client.delete(detail_url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class TestTaskKeysetPagination(APITestCase):
+    list_url = "/api/tasks/"
+    aliases = {"priority": ["priority_rank", "created_at"]}
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="keyset@example.com", username="keyset", password="pass1234"
+        )
+        self.client.force_authenticate(user=self.user)
+        priorities = list(Priority.values)
+        statuses = list(Status.values)
+        today = datetime.date(2025, 1, 1)
+        Task.objects.bulk_create(
+            Task(
+                title=f"Task {i}",
+                owner=self.user,
+                priority=priorities[i % 3],
+                status=statuses[i % 3],
+                # Fechas repetidas y NULLs para ejercitar desempates
+                due_date=None if i % 4 == 0 else today + datetime.timedelta(days=i % 5),
+            )
+            for i in range(23)
+        )
+
+    def walk(self, params):
+        """Recorre todas las páginas siguiendo `next` y devuelve los ids."""
+        ids, url, query = [], self.list_url, dict(params, page_size=5)
+        while url:
+            res = self.client.get(url, query)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids += [row["id"] for row in res.data["results"]]
+            url, query = res.data["next"], None
+        return ids
+
+    def test_walks_every_ordering_without_gaps_or_duplicates(self):
+        for field in ["created_at", "updated_at", "due_date", "priority", "status"]:
+            for ordering in (field, f"-{field}"):
+                with self.subTest(ordering=ordering):
+                    sign = "-" if ordering.startswith("-") else ""
+                    # `priority` ordena por el rank real (TaskOrderingFilter)
+                    fields = self.aliases.get(field, [field])
+                    expected = list(
+                        Task.objects.order_by(
+                            *(f"{sign}{name}" for name in [*fields, "id"])
+                        ).values_list("id", flat=True)
+                    )
+                    self.assertEqual(self.walk({"ordering": ordering}), expected)
+
+    def test_priority_orders_by_rank_not_text(self):
+        res = self.client.get(self.list_url, {"ordering": "-priority", "page_size": 23})
+        priorities = [row["priority"] for row in res.data["results"]]
+        self.assertEqual(
+            list(dict.fromkeys(priorities)),
+            [Priority.HIGH, Priority.MEDIUM, Priority.LOW],
+        )
+        self.assertNotIn("priority_rank", res.data["results"][0])
+        # Meta.ordering (admin) también
+        default = Task.objects.values_list("priority", flat=True)
+        self.assertEqual(
+            list(dict.fromkeys(default)), [Priority.HIGH, Priority.MEDIUM, Priority.LOW]
+        )
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(self.list_url, {"page_size": 5, "ordering": "due_date"})
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertIsNone(first.data["previous"])
+
+    def test_estimated_count_and_invalid_cursor(self):
+        planner = connection.vendor == "postgresql"
+        if planner:
+            # La estimación sale de las estadísticas de la tabla
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Task._meta.db_table}")
+        res = self.client.get(self.list_url, {"count": "estimate"})
+        self.assertEqual(res.data["count"], 23)
+        self.assertEqual(res.data["count_is_estimate"], planner)
+
+        next_url = res.data["next"]
+        cursor = parse_qs(urlparse(next_url).query)["cursor"][0]
+        res = self.client.get(self.list_url, {"cursor": cursor, "ordering": "status"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.get(self.list_url, {"cursor": "not-a-cursor"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestTaskQueryPlans(APITestCase):
+    """Verifica con EXPLAIN que cada acceso documentado usa un índice.
+
+    Se siembra una tabla grande con varios usuarios y se inspecciona el plan
+    de la consulta real que ejecuta el listado (incluido el filtro del
+    cursor), tanto en SQLite como en Postgres.
+    """
+
+    list_url = "/api/tasks/"
+    users = 4
+    tasks_per_user = 2500
+
+    # (descripción, query params, índices aceptables)
+    access_paths = [
+        ("listado por defecto", {}, {"task_owner_created_idx"}),
+        ("ordering=updated_at", {"ordering": "updated_at"}, {"task_owner_updated_idx"}),
+        ("ordering=-due_date", {"ordering": "-due_date"}, {"task_owner_due_idx"}),
+        ("ordering=priority", {"ordering": "priority"}, {"task_owner_priority_rank_idx"}),
+        (
+            "ordering=-priority",
+            {"ordering": "-priority"},
+            {"task_owner_priority_rank_idx"},
+        ),
+        ("ordering=status", {"ordering": "status"}, {"task_owner_status_idx"}),
+        (
+            "status con orden por defecto",
+            {"status": Status.PENDING},
+            {"task_owner_created_idx", "task_owner_status_idx"},
+        ),
+        (
+            "priority con orden por defecto",
+            {"priority": Priority.HIGH},
+            {"task_owner_created_idx", "task_owner_priority_idx"},
+        ),
+        (
+            "rango de creación",
+            {"created_at_after": "2020-01-01T00:00:00Z"},
+            {"task_owner_created_idx"},
+        ),
+        (
+            "status + vencimiento ordenado por due_date",
+            {
+                "status": Status.PENDING,
+                "due_date_before": "2025-06-30",
+                "ordering": "due_date",
+            },
+            {"task_owner_status_due_idx"},
+        ),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        start = datetime.date(2025, 1, 1)
+        for u in range(cls.users):
+            user = User.objects.create_user(
+                email=f"plan{u}@example.com", username=f"plan{u}", password="x"
+            )
+            Task.objects.bulk_create(
+                (
+                    Task(
+                        title=f"Task {i}",
+                        owner=user,
+                        priority=Priority.values[i % 3],
+                        status=Status.values[i % 3],
+                        due_date=None
+                        if i % 7 == 0
+                        else start + datetime.timedelta(days=i % 365),
+                    )
+                    for i in range(cls.tasks_per_user)
+                ),
+                batch_size=500,
+            )
+        cls.user = user
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("EXPLAIN " + sql)
+            else:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+    def page_query_plan(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        page_sql = [q["sql"] for q in ctx.captured_queries if "tasks_task" in q["sql"]]
+        return res, self.explain(page_sql[-1])
+
+    def assertUsesIndex(self, plan, indexes):
+        self.assertTrue(any(name in plan for name in indexes), plan)
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Sort", plan)
+            self.assertNotIn("Seq Scan", plan)
+        else:
+            self.assertNotIn("TEMP B-TREE", plan)
+            self.assertNotRegex(plan, r"SCAN (tasks_task|T\d*)\s*$")
+
+    def test_access_paths_use_indexes(self):
+        for name, params, indexes in self.access_paths:
+            with self.subTest(name):
+                res, plan = self.page_query_plan(self.list_url, params)
+                self.assertUsesIndex(plan, indexes)
+                # La página siguiente (filtro por cursor) también
+                if res.data["next"]:
+                    _, plan = self.page_query_plan(res.data["next"])
+                    self.assertUsesIndex(plan, indexes)
+
+    def test_open_tasks_by_due_date_use_partial_index(self):
+        qs = (
+            Task.objects.filter(owner=self.user, due_date__lt=datetime.date(2025, 3, 1))
+            .exclude(status=Status.COMPLETED)
+            # Sin el orden de Meta.ordering, que usaría el índice de priority_rank
+            .order_by()
+            .values("id")
+        )
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            prefix = "EXPLAIN " if connection.vendor == "postgresql" else "EXPLAIN QUERY PLAN "
+            cursor.execute(prefix + sql, params)
+            plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("task_owner_open_due_idx", plan)
+
+
+class TestTaskListQueryCount(APITestCase):
+    list_url = "/api/tasks/"
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="owner@example.com", username="owner", password="pass1234"
+        )
+        Task.objects.bulk_create(
+            Task(title=f"Task {i}", owner=self.user) for i in range(1000)
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_query_count_is_constant(self):
+        counts = {}
+        for size in (10, 100, 1000):
+            with CaptureStatementsContext(connection) as ctx:
+                res = self.client.get(self.list_url, {"page_size": size})
+            self.assertEqual(len(res.data["results"]), size)
+            self.assertEqual(res.data["results"][0]["owner_email"], self.user.email)
+            counts[size] = len(ctx.captured_queries)
+        # versión del listado (ETag) + página
+        self.assertEqual(counts[10], 2)
+        self.assertEqual(counts[100], counts[10])
+        self.assertEqual(counts[1000], counts[10])
+
+    def test_serializer_reuses_request_user(self):
+        request = APIRequestFactory().get(self.list_url)
+        request.user = self.user
+        tasks = list(Task.objects.filter(owner_id=self.user.pk)[:100])
+        with self.assertNumQueries(0):
+            data = TaskSerializer(tasks, many=True, context={"request": request}).data
+        self.assertEqual({row["owner_email"] for row in data}, {self.user.email})
+
+
+class TestTaskSearch(APITestCase):
+    list_url = "/api/tasks/"
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            email="search@example.com", username="search", password="pass1234"
+        )
+        other = User.objects.create_user(
+            email="other@example.com", username="other", password="pass1234"
+        )
+        self.planning = Task.objects.create(
+            owner=self.user, title="Planificación del proyecto", description="Reunión"
+        )
+        self.report = Task.objects.create(
+            owner=self.user,
+            title="Informe mensual",
+            description="Incluye la planificación del proyecto anterior",
+        )
+        self.groceries = Task.objects.create(owner=self.user, title="Comprar pan")
+        Task.objects.create(owner=other, title="Planificación ajena")
+        self.client.force_authenticate(user=self.user)
+
+    def search(self, text, **params):
+        res = self.client.get(self.list_url, {"search": text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in res.data["results"]]
+
+    def test_prefix_mode_matches_all_term_prefixes(self):
+        ids = self.search("planif proy")
+        self.assertCountEqual(ids, [self.planning.id, self.report.id])
+        # Sin acentos también coincide
+        self.assertEqual(self.search("reunion"), [self.planning.id])
+        self.assertEqual(self.search("planif pan"), [])
+
+    def test_phrase_mode(self):
+        ids = self.search("planificación del proyecto", search_mode="phrase")
+        self.assertCountEqual(ids, [self.planning.id, self.report.id])
+        self.assertEqual(self.search("proyecto del", search_mode="phrase"), [])
+
+    def test_ranked_mode_orders_by_relevance(self):
+        ids = self.search("planificación pan", search_mode="ranked")
+        self.assertCountEqual(ids, [self.planning.id, self.report.id, self.groceries.id])
+        # La coincidencia en el título pesa más que en la descripción
+        self.assertLess(ids.index(self.planning.id), ids.index(self.report.id))
+
+        # Con ?ordering= explícito se respeta ese orden
+        ids = self.search("planificación pan", search_mode="ranked", ordering="created_at")
+        self.assertEqual(ids, [self.planning.id, self.report.id, self.groceries.id])
+
+        # La paginación por cursor también funciona sobre la relevancia
+        res = self.client.get(
+            self.list_url, {"search": "planificación pan", "search_mode": "ranked", "page_size": 1}
+        )
+        walked = [row["id"] for row in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            walked += [row["id"] for row in res.data["results"]]
+        self.assertEqual(walked, self.search("planificación pan", search_mode="ranked"))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.groceries.title = "Comprar leche"
+        self.groceries.save()
+        self.assertEqual(self.search("pan"), [])
+        self.assertEqual(self.search("leche"), [self.groceries.id])
+        self.groceries.delete()
+        self.assertEqual(self.search("leche"), [])
+
+    def test_invalid_mode(self):
+        res = self.client.get(self.list_url, {"search": "x", "search_mode": "fuzzy"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestTaskBulkAPI(APITestCase):
+    bulk_url = "/api/tasks/bulk/"
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            email="bulk@example.com", username="bulk", password="pass1234"
+        )
+        self.other = Task.objects.create(
+            owner=User.objects.create_user(
+                email="bulk2@example.com", username="bulk2", password="pass1234"
+            ),
+            title="Ajena",
+        )
+        self.tasks = Task.objects.bulk_create(
+            Task(owner=self.user, title=f"Task {i}") for i in range(3)
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_mixed_batch_reports_per_item_results(self):
+        payload = {
+            "create": [{"title": "Nueva", "priority": Priority.HIGH}, {"priority": "X"}],
+            "update": [
+                {"id": self.tasks[0].id, "status": Status.COMPLETED},
+                {"id": self.other.id, "status": Status.COMPLETED},
+            ],
+            "delete": [self.tasks[1].id, 999999],
+        }
+        with CaptureStatementsContext(connection) as ctx:
+            res = self.client.post(self.bulk_url, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        # Cantidad fija, no por ítem (incluye el upsert de tasks.stats y el
+        # número de cambio de tasks.changes)
+        self.assertLess(len(ctx.captured_queries), 12)
+
+        created, invalid = res.data["create"]
+        self.assertEqual(created["status"], 201)
+        self.assertEqual(created["data"]["owner_email"], self.user.email)
+        self.assertTrue(Task.objects.filter(pk=created["data"]["id"]).exists())
+        self.assertEqual(invalid["status"], 400)
+        self.assertIn("title", invalid["errors"])
+
+        updated, foreign = res.data["update"]
+        self.assertEqual(updated["data"]["status"], Status.COMPLETED)
+        self.tasks[0].refresh_from_db()
+        self.assertEqual(self.tasks[0].status, Status.COMPLETED)
+        self.assertGreater(self.tasks[0].updated_at, self.tasks[0].created_at)
+        self.assertEqual(foreign["status"], 404)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.status, Status.PENDING)
+
+        self.assertEqual([r["status"] for r in res.data["delete"]], [204, 404])
+        self.assertFalse(Task.objects.filter(pk=self.tasks[1].id).exists())
+
+    def test_all_valid_batch_returns_200(self):
+        payload = {"create": [{"title": f"T{i}"} for i in range(50)]}
+        res = self.client.post(self.bulk_url, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user.tasks.count(), 53)
+
+    def test_batch_limits(self):
+        with self.settings(TASKS_BULK_MAX_BATCH_SIZE=2):
+            res = self.client.post(
+                self.bulk_url, {"delete": [1, 2, 3]}, format="json"
+            )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(self.bulk_url, {}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(
+            self.bulk_url,
+            {"update": [{"id": self.tasks[0].id}], "delete": [self.tasks[0].id]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestTaskBulkActionAPI(APITestCase):
+    url = "/api/tasks/bulk-action/"
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            email="action@example.com", username="action", password="pass1234"
+        )
+        other = User.objects.create_user(
+            email="action2@example.com", username="action2", password="pass1234"
+        )
+        due = datetime.date(2025, 1, 10)
+        Task.objects.bulk_create(
+            [
+                Task(owner=self.user, title="Vencida", due_date=due),
+                Task(owner=self.user, title="Vencida 2", due_date=due),
+                Task(owner=self.user, title="Futura", due_date=datetime.date(2030, 1, 1)),
+                Task(owner=self.user, title="Lista", status=Status.COMPLETED),
+                Task(owner=other, title="Ajena", due_date=due),
+            ]
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, query, payload):
+        return self.client.post(f"{self.url}?{query}", payload, format="json")
+
+    def test_update_matching_tasks_in_one_statement(self):
+        query = "status=PENDING&due_date_before=2025-01-31"
+        payload = {"action": "update", "values": {"status": Status.COMPLETED}}
+
+        res = self.post(query, {**payload, "dry_run": True})
+        self.assertEqual(res.data["affected"], 2)
+        self.assertEqual(Task.objects.filter(status=Status.COMPLETED).count(), 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.post(query, payload)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"action": "update", "dry_run": False, "affected": 2})
+        updates = [
+            q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "tasks_task"')
+        ]
+        self.assertEqual(len(updates), 1)
+        done = self.user.tasks.filter(status=Status.COMPLETED)
+        self.assertCountEqual(
+            done.values_list("title", flat=True), ["Vencida", "Vencida 2", "Lista"]
+        )
+        self.assertTrue(all(t.updated_at > t.created_at for t in done))
+        # La tarea del otro usuario no se toca
+        self.assertTrue(Task.objects.filter(title="Ajena", status=Status.PENDING).exists())
+
+    def test_delete_with_search(self):
+        res = self.post("search=vencida&search_mode=ranked", {"action": "delete"})
+        self.assertEqual(res.data["affected"], 2)
+        self.assertCountEqual(
+            self.user.tasks.values_list("title", flat=True), ["Futura", "Lista"]
+        )
+
+    def test_requires_filters_or_all(self):
+        for query in ("", "status=&search=%20&ordering=title&page_size=5"):
+            res = self.post(query, {"action": "delete"})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("all", res.data)
+        self.assertEqual(self.user.tasks.count(), 4)
+
+        res = self.post("", {"action": "delete", "all": True})
+        self.assertEqual(res.data["affected"], 4)
+        self.assertFalse(self.user.tasks.exists())
+        self.assertTrue(Task.objects.filter(title="Ajena").exists())
+
+    def test_rejects_invalid_values(self):
+        res = self.post("", {"action": "update", "values": {"title": "x"}})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.post("", {"action": "update", "values": {"status": "NOPE"}})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestTaskConditionalRequests(APITestCase):
+    list_url = "/api/tasks/"
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="etag@example.com", username="etag", password="pass1234"
+        )
+        self.tasks = Task.objects.bulk_create(
+            Task(title=f"Task {i}", owner=self.user) for i in range(5)
+        )
+        notify_tasks_changed({self.user.pk})
+        # Cambios de un segundo ya cerrado: con Last-Modified
+        earlier = timezone.now() - datetime.timedelta(minutes=1)
+        TaskListVersion.objects.filter(owner=self.user).update(modified_at=earlier)
+        Task.objects.filter(owner=self.user).update(updated_at=earlier)
+        self.client.force_authenticate(user=self.user)
+
+    def detail_url(self, task):
+        return f"{self.list_url}{task.pk}/"
+
+    def test_list_not_modified_runs_single_query(self):
+        res = self.client.get(self.list_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etag = res["ETag"]
+        self.assertIn("Last-Modified", res)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        res = self.client.get(
+            self.list_url, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_no_last_modified_within_the_current_second(self):
+        res = self.client.get(self.list_url)
+        last_modified = res["Last-Modified"]
+        self.client.patch(self.detail_url(self.tasks[0]), {"title": "x"})
+
+        # Otro cambio en este segundo tendría la misma fecha
+        res = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", res)
+        self.assertNotIn("Last-Modified", res)
+        self.assertNotIn("Last-Modified", self.client.get(self.detail_url(self.tasks[0])))
+
+    def test_list_etag_changes_with_data_and_query(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        self.assertNotEqual(
+            self.client.get(self.list_url, {"page_size": 2})["ETag"], etag
+        )
+
+        self.client.delete(self.detail_url(self.tasks[0]))
+        res = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 4)
+
+        etag = res["ETag"]
+        self.client.patch(self.detail_url(self.tasks[1]), {"title": "x"})
+        res = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_not_modified(self):
+        url = self.detail_url(self.tasks[0])
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="pass1234"
+        )
+        self.client.force_authenticate(user=other)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_if_match_on_update(self):
+        url = self.detail_url(self.tasks[0])
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.patch(url, {"title": "Primera"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(self.client.get(url)["ETag"], res["ETag"])
+
+        # El ETag viejo ya no corresponde: la segunda escritura se rechaza,
+        # con un solo log del 412.
+        with self.assertLogs("django.request", level="WARNING") as logs:
+            res = self.client.put(
+                url, {"title": "Segunda", "priority": "low"}, HTTP_IF_MATCH=etag
+            )
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(len(logs.records), 1)
+        res = self.client.patch(
+            url, {"title": "Tercera"}, HTTP_IF_UNMODIFIED_SINCE="Sat, 01 Jan 2000 00:00:00 GMT"
+        )
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.tasks[0].refresh_from_db()
+        self.assertEqual(self.tasks[0].title, "Primera")
+
+
+@override_settings(TASKS_LIST_CACHE_BACKEND="tasks.cache.LocalLRUListCache")
+class TestTaskListCache(APITestCase):
+    list_url = "/api/tasks/"
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="cache@example.com", username="cache", password="pass1234"
+        )
+        self.tasks = Task.objects.bulk_create(
+            Task(title=f"Task {i}", owner=self.user) for i in range(5)
+        )
+        self.client.force_authenticate(user=self.user)
+        # Los ids de usuario se reutilizan entre tests
+        get_list_cache().clear()
+
+    def test_hit_skips_task_queries(self):
+        hits = get_list_cache().stats()["hits"]
+        first = self.client.get(self.list_url, {"page_size": 2, "ordering": "id"})
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        # Solo se lee la versión del usuario; mismo contenido y validadores.
+        with self.assertNumQueries(1):
+            res = self.client.get(self.list_url, {"ordering": "id", "page_size": 2})
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(res.content, first.content)
+        self.assertEqual(res["ETag"], first["ETag"])
+
+        # El 304 sale de la versión, sin mirar la cache
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                self.list_url,
+                {"page_size": 2, "ordering": "id"},
+                HTTP_IF_NONE_MATCH=first["ETag"],
+            )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(self.list_url, {"page_size": 3, "ordering": "id"})
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(get_list_cache().stats()["hits"], hits + 1)
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "api.example.com"])
+    def test_links_follow_the_request_host(self):
+        params = {"page_size": 2, "ordering": "id"}
+        self.client.get(self.list_url, params)
+        res = self.client.get(self.list_url, params, HTTP_HOST="api.example.com")
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertTrue(res.data["next"].startswith("http://api.example.com/"))
+        res = self.client.get(self.list_url, params, secure=True)
+        self.assertTrue(res.data["next"].startswith("https://testserver/"))
+
+    def test_writes_invalidate(self):
+        self.client.get(self.list_url)
+        self.client.post(self.list_url, {"title": "Nueva"})
+        res = self.client.get(self.list_url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertIn("Nueva", [t["title"] for t in res.data["results"]])
+
+        self.client.post(
+            f"{self.list_url}bulk-action/",
+            {"action": "delete", "all": True},
+            format="json",
+        )
+        res = self.client.get(self.list_url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"], [])
+
+    def test_admin_writes_invalidate(self):
+        self.client.get(self.list_url)
+        request = APIRequestFactory().post("/admin/")
+        request.user = self.user
+        TaskAdmin(Task, admin.site).delete_queryset(
+            request, Task.objects.filter(pk=self.tasks[0].pk)
+        )
+        res = self.client.get(self.list_url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(len(res.data["results"]), 4)
+
+    def test_users_do_not_share_entries(self):
+        self.client.get(self.list_url)
+        other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="pass1234"
+        )
+        self.client.force_authenticate(user=other)
+        res = self.client.get(self.list_url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"], [])
+
+    @override_settings(TASKS_LIST_CACHE_MAX_BYTES=10)
+    def test_lru_is_bounded(self):
+        cache = LocalLRUListCache()
+        for key in ("a", "b", "c"):
+            cache.set(key, {"content": b"12345"})
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("b"))
+        cache.set("d", {"content": b"12345"})
+        self.assertIsNone(cache.get("c"))
+        self.assertIsNotNone(cache.get("b"))
+        self.assertEqual(cache.stats()["bytes"], 10)
+
+
+class TestTaskChangeFeed(APITestCase):
+    url = "/api/tasks/changes/"
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="sync@example.com", username="sync", password="pass1234"
+        )
+        self.other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="pass1234"
+        )
+        self.tasks = Task.objects.bulk_create(
+            Task(title=f"Task {i}", owner=self.user) for i in range(5)
+        )
+        Task.objects.create(title="Ajena", owner=self.other)
+        self.client.force_authenticate(user=self.user)
+
+    def sync(self, since=None, page_size=2):
+        """Recorre el feed hasta el final; devuelve (changed, deleted, cursor)."""
+        changed, deleted = [], []
+        while True:
+            params = {"page_size": page_size}
+            if since:
+                params["since"] = since
+            res = self.client.get(self.url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            changed += [t["id"] for t in res.data["changed"]]
+            deleted += res.data["deleted"]
+            since = res.data["next"]
+            if not res.data["has_more"]:
+                return changed, deleted, since
+
+    def test_initial_sync_then_delta(self):
+        changed, deleted, cursor = self.sync()
+        self.assertEqual(changed, [t.pk for t in self.tasks])
+        self.assertEqual(deleted, [])
+
+        self.assertEqual(self.sync(cursor)[:2], ([], []))
+
+        first, second = self.tasks[:2]
+        self.client.patch(f"/api/tasks/{first.pk}/", {"title": "Editada"})
+        self.client.delete(f"/api/tasks/{second.pk}/")
+        created = self.client.post("/api/tasks/", {"title": "Nueva"}).data["id"]
+
+        changed, deleted, _ = self.sync(cursor)
+        self.assertEqual(changed, [first.pk, created])
+        self.assertEqual(deleted, [second.pk])
+
+    def test_order_does_not_depend_on_the_clock(self):
+        _, _, cursor = self.sync()
+        first, second = self.tasks[:2]
+        self.client.patch(f"/api/tasks/{second.pk}/", {"title": "Antes"})
+        self.client.patch(f"/api/tasks/{first.pk}/", {"title": "Después"})
+        # Como una transacción lenta: la fecha es de mucho antes del cursor
+        Task.objects.filter(pk=first.pk).update(
+            updated_at=timezone.now() - datetime.timedelta(hours=1)
+        )
+        changed, _, cursor = self.sync(cursor)
+        self.assertEqual(changed, [second.pk, first.pk])
+        self.assertEqual(self.sync(cursor)[:2], ([], []))
+
+    def test_bulk_and_cascade_deletes_leave_tombstones(self):
+        _, _, cursor = self.sync()
+        self.client.post(
+            "/api/tasks/bulk/", {"delete": [self.tasks[0].pk]}, format="json"
+        )
+        self.client.post(
+            "/api/tasks/bulk-action/?search=1",
+            {"action": "delete"},
+            format="json",
+        )
+        self.assertEqual(
+            self.sync(cursor)[1], [self.tasks[0].pk, self.tasks[1].pk]
+        )
+
+        owner_id = self.user.pk
+        remaining = set(self.user.tasks.values_list("pk", flat=True))
+        self.user.delete()
+        tombstones = TaskTombstone.objects.filter(owner_id=owner_id)
+        self.assertEqual(
+            set(tombstones.values_list("task_id", flat=True)),
+            remaining | {self.tasks[0].pk, self.tasks[1].pk},
+        )
+
+    def test_invalid_and_expired_cursor(self):
+        res = self.client.get(self.url, {"since": "nope"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        _, _, cursor = self.sync()
+        with override_settings(TASKS_TOMBSTONE_RETENTION_DAYS=0):
+            res = self.client.get(self.url, {"since": cursor})
+            self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+            self.client.delete(f"/api/tasks/{self.tasks[0].pk}/")
+            call_command("prune_task_tombstones", stdout=StringIO())
+        self.assertFalse(TaskTombstone.objects.exists())
+
+
+class TestTaskRowSerializer(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="rows@example.com", username="rows", password="pass1234"
+        )
+        other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="pass1234"
+        )
+        Task.objects.bulk_create(
+            [
+                Task(
+                    owner=self.user,
+                    title="Completa",
+                    description='á é ñ "x"',
+                    priority=Priority.HIGH,
+                    status=Status.COMPLETED,
+                    due_date=datetime.date(2025, 1, 31),
+                ),
+                Task(owner=self.user, title="Mínima"),
+                Task(owner=other, title="Ajena", priority=Priority.LOW),
+            ]
+        )
+        request = APIRequestFactory().get("/api/tasks/")
+        request.user = self.user
+        self.context = {"request": request}
+
+    def render_both(self):
+        queryset = Task.objects.order_by("id")
+        expected = TaskSerializer(list(queryset), many=True, context=self.context)
+        rows = TaskRowSerializer(context=self.context)
+        with self.assertNumQueries(2):  # filas + email del otro owner
+            data = rows.serialize(rows.prepare(queryset))
+        renderer = JSONRenderer()
+        return renderer.render(expected.data), renderer.render(data)
+
+    def test_output_is_byte_identical(self):
+        expected, fast = self.render_both()
+        self.assertEqual(fast, expected)
+
+    def test_output_is_byte_identical_in_other_timezone(self):
+        with timezone.override("America/Argentina/Buenos_Aires"):
+            expected, fast = self.render_both()
+        self.assertIn(b"-03:00", fast)
+        self.assertEqual(fast, expected)
+
+    def test_list_endpoint_uses_rows(self):
+        self.client.force_authenticate(user=self.user)
+        res = self.client.get("/api/tasks/", {"ordering": "created_at"})
+        tasks = Task.objects.filter(owner=self.user).order_by("created_at", "id")
+        expected = TaskSerializer(tasks, many=True, context=self.context).data
+        self.assertEqual(res.data["results"], expected)
+
+
+class TestFastJSON(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="json@example.com", username="json", password="pass1234"
+        )
+        Task.objects.create(
+            owner=self.user, title="Línea\u2028rara", description='"comillas" ñ'
+        )
+        Task.objects.create(
+            owner=self.user, title="Con fecha", due_date=datetime.date(2025, 3, 1)
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_renderer_matches_drf(self):
+        tasks = Task.objects.order_by("id")
+        data = {
+            "results": TaskSerializer(tasks, many=True).data,
+            "errors": {"title": [ErrorDetail("Requerido.", code="required")]},
+            "raw": {
+                "when": timezone.now(),
+                "micro": datetime.datetime(2025, 1, 1, 8, 30, 0, 123456),
+                "day": datetime.date(2025, 1, 1),
+                "hour": datetime.time(8, 30, 0, 5),
+                "id": uuid.uuid4(),
+            },
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        self.assertIn(b"\\u2028", expected)
+
+    @override_settings(REST_FRAMEWORK={"DATETIME_FORMAT": "%d/%m/%Y %H:%M"})
+    def test_datetime_format_matches_drf(self):
+        data = TaskSerializer(Task.objects.order_by("id"), many=True).data
+        rendered = FastJSONRenderer().render(data)
+        self.assertEqual(rendered, JSONRenderer().render(data))
+        self.assertRegex(rendered.decode(), r'"created_at":"\d\d/\d\d/\d{4} \d\d:\d\d"')
+
+    def test_timedelta_is_iso_duration(self):
+        # Diferencia documentada en config.renderers
+        delta = {"wait": datetime.timedelta(seconds=90)}
+        self.assertEqual(FastJSONRenderer().render(delta), b'{"wait":"PT90S"}')
+        self.assertEqual(JSONRenderer().render(delta), b'{"wait":"90.0"}')
+
+    def test_decimal_is_exact_number(self):
+        rendered = FastJSONRenderer().render({"amount": Decimal("0.10")})
+        self.assertEqual(rendered, b'{"amount":0.10}')
+
+    def test_parser_round_trip(self):
+        payload = {"title": "ñandú", "nested": [1, 2.5, None, True]}
+        body = JSONRenderer().render(payload)
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), payload)
+        self.assertEqual(JSONParser().parse(BytesIO(body)), payload)
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"title": '))
+
+    def test_api_uses_fast_json(self):
+        res = self.client.post(
+            "/api/tasks/",
+            data='{"title": "Nueva"}',
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIsInstance(res.accepted_renderer, FastJSONRenderer)
+        res = self.client.post(
+            "/api/tasks/", data="{", content_type="application/json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(res.data["detail"].startswith("JSON parse error"))
+
+
+class TestTaskExport(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="export@example.com", username="export", password="pass1234"
+        )
+        other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="pass1234"
+        )
+        Task.objects.bulk_create(
+            [
+                Task(
+                    owner=self.user,
+                    title=f"Tarea {i}",
+                    description='con "comillas", comas\ny saltos' if i == 0 else "",
+                    priority=Priority.HIGH if i % 2 else Priority.LOW,
+                    due_date=datetime.date(2025, 1, 1) if i == 1 else None,
+                )
+                for i in range(5)
+            ]
+            + [Task(owner=other, title="Ajena")]
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def expected(self, **filters):
+        request = APIRequestFactory().get("/api/tasks/")
+        request.user = self.user
+        tasks = Task.objects.filter(owner=self.user, **filters).order_by("-created_at")
+        return TaskSerializer(tasks, many=True, context={"request": request}).data
+
+    @override_settings(TASKS_EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_streams_filtered_tasks_in_chunks(self):
+        res = self.client.get("/api/tasks/export/", {"priority": Priority.HIGH})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        chunks = list(res.streaming_content)
+        self.assertEqual(len(chunks), 1)
+        lines = b"".join(chunks).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            self.expected(priority=Priority.HIGH),
+        )
+
+    @override_settings(TASKS_EXPORT_CHUNK_SIZE=2)
+    def test_csv_has_header_and_quoted_rows(self):
+        res = self.client.get("/api/tasks/export/", {"file_format": "csv"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('filename="tasks.csv"', res["Content-Disposition"])
+        chunks = list(res.streaming_content)
+        self.assertEqual(len(chunks), 4)  # header + 3 bloques
+        reader = csv.DictReader(StringIO(b"".join(chunks).decode()))
+        rows = list(reader)
+        expected = self.expected()
+        self.assertEqual(reader.fieldnames, list(expected[0]))
+        self.assertEqual(
+            rows,
+            [
+                {k: "" if v is None else str(v) for k, v in item.items()}
+                for item in expected
+            ],
+        )
+
+    def test_invalid_format(self):
+        res = self.client.get("/api/tasks/export/", {"file_format": "xml"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file_format", res.data)
+
+    async def test_asgi_streams_async_iterator(self):
+        token = str(AccessToken.for_user(self.user))
+        res = await self.async_client.get(
+            "/api/tasks/export/", headers={"authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+        body = b"".join([chunk async for chunk in res.streaming_content])
+        lines = body.decode().splitlines()
+        expected = await sync_to_async(self.expected)()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+
+class TestTaskImport(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="import@example.com", username="import", password="pass1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, body, file_format="ndjson"):
+        return self.client.generic(
+            "POST",
+            f"/api/tasks/import/?file_format={file_format}",
+            body if isinstance(body, bytes) else body.encode(),
+            content_type=IMPORT_FORMATS[file_format],
+        )
+
+    @override_settings(TASKS_IMPORT_BATCH_SIZE=2)
+    def test_ndjson_imports_valid_rows_and_reports_errors(self):
+        body = "\n".join(
+            [
+                '{"title": "Uno", "priority": "HIGH", "due_date": "2025-01-31"}',
+                '{"title": "Dos"}',
+                "",
+                '{"title": "Mala", "priority": "URGENTE"}',
+                "no es json",
+                "[1, 2]",
+                json.dumps({"title": "x" * 201}),
+                '{"title": "Tres", "status": "COMPLETED", "owner_id": 999}',
+            ]
+        )
+        res = self.post(body)
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data["processed"], 7)
+        self.assertEqual(res.data["created"], 3)
+        self.assertEqual(res.data["failed"], 4)
+        self.assertEqual([e["line"] for e in res.data["errors"]], [4, 5, 6, 7])
+        self.assertIn("priority", res.data["errors"][0]["errors"])
+        self.assertIn("title", res.data["errors"][3]["errors"])
+
+        tasks = Task.objects.filter(owner=self.user).order_by("id")
+        self.assertEqual([t.title for t in tasks], ["Uno", "Dos", "Tres"])
+        self.assertEqual(tasks[0].priority, Priority.HIGH)
+        self.assertEqual(tasks[0].due_date, datetime.date(2025, 1, 31))
+        self.assertEqual(tasks[1].priority, Priority.MEDIUM)
+        self.assertEqual(tasks[2].status, Status.COMPLETED)
+
+    def test_csv_round_trips_export(self):
+        Task.objects.create(owner=self.user, title="A", description='con "x",\ny más')
+        Task.objects.create(
+            owner=self.user, title="B", due_date=datetime.date(2025, 2, 1)
+        )
+        res = self.client.get("/api/tasks/export/", {"file_format": "csv"})
+        exported = b"".join(res.streaming_content)
+        Task.objects.all().delete()
+
+        res = self.post(exported.decode(), "csv")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        tasks = Task.objects.order_by("title")
+        self.assertEqual(tasks[0].description, 'con "x",\ny más')
+        self.assertIsNone(tasks[0].due_date)
+        self.assertEqual(tasks[1].due_date, datetime.date(2025, 2, 1))
+
+    def test_csv_unreadable_rows_are_reported_and_skipped(self):
+        body = b"\n".join(
+            [
+                b"title,priority",
+                b"Uno,HIGH",
+                b"Mala \xff,LOW",
+                b"x" * (csv.field_size_limit() + 1) + b",LOW",
+                b"Dos,LOW",
+            ]
+        )
+        res = self.post(body, "csv")
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual([e["line"] for e in res.data["errors"]], [3, 4])
+        self.assertEqual(
+            sorted(Task.objects.values_list("title", flat=True)), ["Dos", "Uno"]
+        )
+
+    def test_copy_data_keeps_null_apart_from_text(self):
+        task = Task(
+            owner=self.user, title='\\N', description='"", y\nmás', due_date=None
+        )
+        fields = [
+            Task._meta.get_field(name) for name in ("title", "description", "due_date")
+        ]
+        data = copy_data([task], fields)
+        self.assertEqual(data, '"\\N",""""", y\nmás",\n')
+        # Postgres lee el CSV igual que el módulo csv; NULL = campo vacío sin comillas
+        self.assertEqual(next(csv.reader(StringIO(data))), ["\\N", '"", y\nmás', ""])
+
+    def test_validation_matches_task_serializer(self):
+        validator = TaskRowValidator()
+        for record in (
+            {"title": "Ok", "status": "PENDING", "due_date": None},
+            {"title": "", "priority": "LOW"},
+            {"description": "sin título", "due_date": "31/01/2025"},
+        ):
+            serializer = TaskSerializer(data=record)
+            data, errors = validator.validate(record)
+            if serializer.is_valid():
+                self.assertEqual(data, serializer.validated_data)
+            else:
+                self.assertEqual(errors, serializer.errors)
+
+    def test_import_invalidates_list_cache_version(self):
+        res = self.post('{"title": "Nueva"}')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(TaskListVersion.objects.get(owner=self.user).version, 1)
+        self.assertEqual(self.client.get("/api/tasks/stats/").data["total"], 1)
+
+    def test_import_runs_outside_atomic_requests(self):
+        # Cada lote confirma su propia transacción aun con ATOMIC_REQUESTS
+        view = resolve("/api/tasks/import/").func
+        self.assertEqual(view._non_atomic_requests, set(connections))
+        self.assertFalse(hasattr(resolve("/api/tasks/bulk/").func, "_non_atomic_requests"))
+
+    def test_invalid_format(self):
+        res = self.client.post("/api/tasks/import/?file_format=xlsx")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_tasks_command(self):
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / "t.ndjson"
+        path.write_text('{"title": "Uno"}\n{"title": ""}\n{"title": "Dos"}\n')
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_tasks",
+            str(path),
+            owner=self.user.email,
+            batch_size=1,
+            stdout=out,
+            stderr=err,
+        )
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 2)
+        self.assertIn("2 tareas creadas, 1 filas con errores de 3", out.getvalue())
+        self.assertIn("línea 2", err.getvalue())
+
+
+class TestTaskStats(APITestCase):
+    url = "/api/tasks/stats/"
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="stats@example.com", username="stats", password="pass1234"
+        )
+        self.other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="pass1234"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.localdate()
+        self.yesterday = self.today - datetime.timedelta(days=1)
+
+    def create(self, **data):
+        res = self.client.post("/api/tasks/", {"title": "T", **data}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data["id"]
+
+    def stats(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def assert_matches_tasks(self):
+        """Los contadores coinciden con recalcular desde las tareas."""
+        current = self.stats()
+        rebuild_stats()
+        self.assertEqual(current, self.stats())
+        return current
+
+    def test_counts_follow_every_write_path(self):
+        first = self.create(priority=Priority.HIGH, due_date=str(self.yesterday))
+        second = self.create(due_date=str(self.today))
+        self.create(status=Status.COMPLETED, due_date=str(self.yesterday))
+        stats = self.assert_matches_tasks()
+        self.assertEqual(stats["total"], 3)
+        self.assertEqual(stats["by_status"][Status.PENDING], 2)
+        self.assertEqual(stats["by_priority"][Priority.HIGH], 1)
+        self.assertEqual(stats["by_priority"][Priority.LOW], 0)
+        self.assertEqual((stats["overdue"], stats["due_today"]), (1, 1))
+
+        self.client.patch(
+            f"/api/tasks/{first}/", {"status": Status.COMPLETED}, format="json"
+        )
+        self.client.delete(f"/api/tasks/{second}/")
+        self.client.post(
+            "/api/tasks/bulk/",
+            {
+                "create": [{"title": "Lote", "due_date": str(self.yesterday)}],
+                "update": [{"id": first, "status": Status.PENDING}],
+            },
+            format="json",
+        )
+        stats = self.assert_matches_tasks()
+        self.assertEqual((stats["total"], stats["overdue"]), (3, 2))
+
+        self.client.post(
+            "/api/tasks/bulk-action/?status=PENDING",
+            {"action": "update", "values": {"due_date": str(self.today)}},
+            format="json",
+        )
+        stats = self.assert_matches_tasks()
+        self.assertEqual((stats["overdue"], stats["due_today"]), (0, 2))
+
+        self.client.post(
+            "/api/tasks/bulk-action/?status=COMPLETED", {"action": "delete"}, format="json"
+        )
+        stats = self.assert_matches_tasks()
+        self.assertEqual(stats["by_status"][Status.COMPLETED], 0)
+        self.assertEqual(stats["total"], 2)
+
+    def test_due_counters_without_open_tasks_are_removed(self):
+        first = self.create(due_date=str(self.yesterday))
+        self.create(due_date=str(self.yesterday))
+        self.client.patch(
+            f"/api/tasks/{first}/", {"status": Status.COMPLETED}, format="json"
+        )
+        self.assertEqual(TaskDueCounter.objects.get(owner=self.user).count, 1)
+        self.client.post(
+            "/api/tasks/bulk-action/?status=PENDING",
+            {"action": "update", "values": {"due_date": None}},
+            format="json",
+        )
+        self.assertFalse(TaskDueCounter.objects.filter(owner=self.user).exists())
+        self.assertEqual(self.assert_matches_tasks()["overdue"], 0)
+
+    def test_filtered_action_is_one_statement(self):
+        for priority in (Priority.LOW, Priority.LOW, Priority.HIGH, Priority.LOW):
+            self.create(priority=priority, due_date=str(self.yesterday))
+
+        def writes(ctx, statement):
+            return [
+                q for q in ctx.captured_queries if q["sql"].startswith(statement)
+            ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(
+                "/api/tasks/bulk-action/?priority=LOW",
+                {"action": "update", "values": {"status": Status.COMPLETED}},
+                format="json",
+            )
+        self.assertEqual(res.data["affected"], 3)
+        self.assertEqual(len(writes(ctx, 'UPDATE "tasks_task"')), 1)
+        stats = self.assert_matches_tasks()
+        self.assertEqual((stats["by_status"][Status.COMPLETED], stats["overdue"]), (3, 1))
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(
+                "/api/tasks/bulk-action/?status=COMPLETED",
+                {"action": "delete"},
+                format="json",
+            )
+        self.assertEqual(res.data["affected"], 3)
+        self.assertEqual(len(writes(ctx, 'DELETE FROM "tasks_task"')), 1)
+        self.assertEqual(self.assert_matches_tasks()["total"], 1)
+
+    def test_admin_edit_moves_counts_between_owners(self):
+        task = Task.objects.get(pk=self.create(priority=Priority.LOW))
+        task.owner = self.other
+        task.priority = Priority.HIGH
+        form = SimpleNamespace(
+            changed_data=["owner", "priority"], initial={"owner": self.user.pk}
+        )
+        TaskAdmin(Task, admin.site).save_model(None, task, form, change=True)
+        self.assertEqual(self.assert_matches_tasks()["total"], 0)
+
+        self.client.force_authenticate(user=self.other)
+        stats = self.assert_matches_tasks()
+        self.assertEqual(stats["by_priority"], {"LOW": 0, "MEDIUM": 0, "HIGH": 1})
+
+    def test_rebuild_command(self):
+        Task.objects.create(owner=self.user, title="Sin contador")
+        self.assertEqual(self.stats()["total"], 0)
+        out = StringIO()
+        call_command("rebuild_task_stats", owner=[self.user.email], stdout=out)
+        self.assertIn("1 contadores recalculados", out.getvalue())
+        self.assertEqual(self.stats()["total"], 1)
+
+
+# URLconf con las vistas async activadas (TASKS_ASYNC_VIEWS)
+async_urlconf = ModuleType("async_urlconf")
+async_urlconf.urlpatterns = [path("api/", include(async_urlpatterns + router.urls))]
+
+
+class TestTaskAsyncViews(APITestCase):
+    list_url = "/api/tasks/"
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="async@example.com", username="async", password="pass1234"
+        )
+        other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="pass1234"
+        )
+        self.tasks = Task.objects.bulk_create(
+            [
+                Task(
+                    owner=self.user,
+                    title=f"Tarea {i}",
+                    priority=Priority.HIGH if i % 2 else Priority.LOW,
+                    due_date=datetime.date(2025, 1, i + 1) if i % 3 else None,
+                )
+                for i in range(5)
+            ]
+            + [Task(owner=other, title="Ajena")]
+        )
+        rebuild_stats()
+        self.client.force_authenticate(user=self.user)
+        self.headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    async def aget(self, url, data=None, **headers):
+        with self.settings(ROOT_URLCONF=async_urlconf):
+            res = await self.async_client.get(
+                url, data, headers={**self.headers, **headers}
+            )
+            # resolver_match es lazy: se resuelve con el URLconf async
+            res.url_name = res.resolver_match.url_name
+        return res
+
+    async def asend(self, method, url, data=None, **headers):
+        with self.settings(ROOT_URLCONF=async_urlconf):
+            return await getattr(self.async_client, method)(
+                url,
+                json.dumps(data) if data is not None else "",
+                content_type="application/json",
+                headers={**self.headers, **headers},
+            )
+
+    async def test_list_matches_viewset(self):
+        for params in (
+            {},
+            {"priority": Priority.HIGH},
+            {"ordering": "due_date"},
+            {"ordering": "-priority", "page_size": 2},
+            {"search": "tarea", "search_mode": "ranked"},
+        ):
+            with self.subTest(params=params):
+                expected = await sync_to_async(self.client.get)(self.list_url, params)
+                res = await self.aget(self.list_url, params)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.url_name, "task-list-async")
+                self.assertEqual(res.json(), expected.json())
+                self.assertEqual(res["ETag"], expected["ETag"])
+
+    async def test_list_cursor_walk_and_not_modified(self):
+        res = await self.aget(self.list_url, {"page_size": 2})
+        ids = [item["id"] for item in res.json()["results"]]
+        while res.json()["next"]:
+            res = await self.aget(res.json()["next"])
+            ids += [item["id"] for item in res.json()["results"]]
+        expected = await sync_to_async(self.client.get)(self.list_url)
+        self.assertEqual(ids, [item["id"] for item in expected.json()["results"]])
+
+        res = await self.aget(self.list_url)
+        res = await self.aget(self.list_url, **{"If-None-Match": res["ETag"]})
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_create_update_delete(self):
+        res = await self.asend(
+            "post", self.list_url, {"title": "Nueva", "priority": Priority.HIGH}
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json()["owner_email"], self.user.email)
+        url = f"{self.list_url}{res.json()['id']}/"
+
+        res = await self.asend("patch", url, {"status": Status.COMPLETED})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["status"], Status.COMPLETED)
+        res = await self.aget(url, **{"If-None-Match": res["ETag"]})
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = await self.asend("put", url, {"title": "Otra"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        stats = await sync_to_async(get_stats)(self.user.pk)
+        self.assertEqual(stats["total"], 6)
+        self.assertEqual(stats["by_priority"][Priority.HIGH], 3)
+
+        res = await self.asend("delete", url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual((await self.aget(url)).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(await TaskTombstone.objects.filter(owner_id=self.user.pk).aexists())
+        stats = await sync_to_async(get_stats)(self.user.pk)
+        self.assertEqual(stats["total"], 5)
+
+    async def test_atomic_requests(self):
+        # Postgres activa ATOMIC_REQUESTS por defecto (DB_ATOMIC_REQUESTS)
+        db_settings = connections.settings[DEFAULT_DB_ALIAS]
+        self.addCleanup(
+            db_settings.__setitem__, "ATOMIC_REQUESTS", db_settings["ATOMIC_REQUESTS"]
+        )
+        db_settings["ATOMIC_REQUESTS"] = True
+
+        res = await self.aget(self.list_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = await self.asend("post", self.list_url, {"title": "Nueva"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        url = f"{self.list_url}{res.json()['id']}/"
+        self.assertEqual((await self.aget(url)).status_code, status.HTTP_200_OK)
+        # Delegada en el viewset
+        res = await self.aget(self.list_url, {"pagination": "page"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["count"], 6)
+
+    async def test_errors_match_viewset(self):
+        data = {"title": "x", "priority": "URGENT"}
+        expected = await sync_to_async(self.client.post)(
+            self.list_url, data, format="json"
+        )
+        res = await self.asend("post", self.list_url, data)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.json(), expected.json())
+
+        foreign = self.tasks[-1]
+        res = await self.aget(f"{self.list_url}{foreign.pk}/")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.headers = {}
+        res = await self.aget(self.list_url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res["WWW-Authenticate"], 'Bearer realm="api"')
+        self.headers = {"authorization": "Bearer invalido"}
+        res = await self.aget(self.list_url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.json()["code"], "token_not_valid")
+
+    async def test_unsupported_requests_use_viewset(self):
+        res = await self.aget(self.list_url, {"pagination": "page"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["count"], 5)
+
+        url = f"{self.list_url}{self.tasks[0].pk}/"
+        res = await self.asend("patch", url, {"title": "x"}, **{"If-Match": '"viejo"'})
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        request = SimpleNamespace(
+            method="GET", GET={}, headers={"Accept": "text/html"}
+        )
+        self.assertFalse(TaskListAsyncView().is_native(request))
+
+    async def test_access_log_middleware_runs_async(self):
+        res = await self.aget(self.list_url, **{"X-Request-ID": "abc-123"})
+        self.assertEqual(res["X-Request-ID"], "abc-123")
+
+
+class _BlockingStream(StringIO):
+    """Stream cuya primera escritura espera a ``release``."""
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.writing.set()
+        self.release.wait(5)
+        return super().write(text)
+
+
+class TestLoggingPipeline(APITestCase):
+    def make_logger(self, handler):
+        logger = logging.getLogger(f"test.{uuid.uuid4().hex}")
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        return logger
+
+    def test_json_formatter_includes_request_id_and_extras(self):
+        stream = StringIO()
+        handler = QueuedStreamHandler(stream)
+        handler.setFormatter(JSONFormatter())
+        handler.addFilter(RequestIDFilter())
+        logger = self.make_logger(handler)
+
+        token = request_id_var.set("req-1")
+        try:
+            logger.info("hola %s", "mundo", extra={"status": 201, "path": "/x"})
+        finally:
+            request_id_var.reset(token)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("falló")
+        handler.close()
+
+        first, second = map(json.loads, stream.getvalue().splitlines())
+        self.assertEqual(first["message"], "hola mundo")
+        self.assertEqual(first["request_id"], "req-1")
+        self.assertEqual((first["status"], first["path"]), (201, "/x"))
+        self.assertEqual(first["level"], "INFO")
+        self.assertIn("ValueError: boom", second["exc"])
+
+    def test_full_queue_drops_and_reports(self):
+        stream = _BlockingStream()
+        handler = QueuedStreamHandler(stream, maxsize=1)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = self.make_logger(handler)
+
+        logger.warning("uno")
+        self.assertTrue(stream.writing.wait(5))  # el listener quedó escribiendo
+        logger.warning("dos")
+        logger.warning("tres")  # cola llena
+        self.assertEqual(handler.stats(), {"queued": 1, "dropped": 1})
+        stream.release.set()
+        handler.close()
+
+        self.assertEqual(
+            stream.getvalue().splitlines(),
+            ["uno", "log queue full: 1 records dropped", "dos"],
+        )
+
+    def test_access_sampler_keeps_errors(self):
+        sampler = AccessLogSampler(rate=0)
+        record = logging.makeLogRecord({"status": 200})
+        self.assertFalse(sampler.filter(record))
+        record.status = 404
+        self.assertTrue(sampler.filter(record))
+        self.assertTrue(sampler.filter(logging.makeLogRecord({})))
+        self.assertTrue(AccessLogSampler(rate=1).filter(record))
+
+    def test_access_line_has_structured_fields(self):
+        user = get_user_model().objects.create_user(
+            email="log@example.com", username="log", password="pass1234"
+        )
+        self.client.force_authenticate(user=user)
+        with self.assertLogs("access", level="INFO") as logs:
+            self.client.get("/api/tasks/", HTTP_X_REQUEST_ID="abc")
+        record = logs.records[0]
+        self.assertEqual(record.status, 200)
+        self.assertEqual(record.method, "GET")
+        self.assertEqual(record.path, "/api/tasks/")
+        self.assertIsInstance(record.duration_ms, float)
+
+
+class TestQueryInstrumentation(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="db@example.com", username="db", password="pass1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_access_line_has_query_count_and_time(self):
+        with self.assertLogs("access", level="INFO") as logs:
+            self.client.get("/api/tasks/")
+        record = logs.records[0]
+        self.assertGreater(record.db_queries, 0)
+        self.assertIsInstance(record.db_ms, float)
+        self.assertIn(f"db_queries={record.db_queries} ", record.getMessage())
+
+    def test_async_orm_queries_are_counted(self):
+        async def query():
+            return await Task.objects.filter(owner=self.user).acount()
+
+        with db_instrumentation.track_queries() as stats:
+            async_to_sync(query)()
+        self.assertEqual(stats.count, 1)
+
+    @override_settings(DB_SLOW_QUERY_MS=0.000001)
+    def test_slow_query_logged(self):
+        with self.assertLogs("db.slow", level="WARNING") as logs:
+            Task.objects.filter(owner=self.user).count()
+        self.assertIn("SELECT COUNT(*)", logs.records[0].getMessage())
+
+    @override_settings(DB_N_PLUS_ONE_THRESHOLD=3)
+    def test_repeated_query_shape_flagged(self):
+        tasks = [
+            Task.objects.create(owner=self.user, title=f"T{i}") for i in range(3)
+        ]
+        with db_instrumentation.track_queries() as stats:
+            for task in tasks:
+                Task.objects.filter(pk=task.pk).first()
+            Task.objects.filter(pk__in=[t.pk for t in tasks]).count()
+            Task.objects.filter(pk__in=[tasks[0].pk]).count()
+        self.assertEqual(stats.count, 5)
+        with self.assertLogs("db.n_plus_one", level="WARNING") as logs:
+            db_instrumentation.report(stats, "GET", "/x")
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].repeats, 3)
+        # Los IN (...) de distinto largo son la misma forma
+        shapes = {sql: n for sql, n in stats.shapes.items() if "IN (" in sql}
+        self.assertEqual(list(shapes.values()), [2])
+
+    def test_streamed_body_queries_are_counted(self):
+        Task.objects.create(owner=self.user, title="T")
+        # La exportación consulta mientras se envía el cuerpo
+        with CaptureQueriesContext(connection) as ctx:
+            with self.assertNoLogs("access"):
+                res = self.client.get("/api/tasks/export/")
+            self.assertIn("X-Request-ID", res)
+            with self.assertLogs("access", level="INFO") as logs:
+                b"".join(res.streaming_content)
+        # Todo lo ejecutado (con ATOMIC_REQUESTS, también los savepoints del
+        # test); la única consulta real es la del cuerpo
+        self.assertEqual(logs.records[0].db_queries, len(ctx.captured_queries))
+        self.assertEqual(
+            [q["sql"].split()[0] for q in ctx.captured_queries].count("SELECT"), 1
+        )
+        self.assertIn(f"request_id={res['X-Request-ID']}", logs.records[0].getMessage())
+
+    @override_settings(DB_QUERY_BUDGET=1, DB_QUERY_STRICT=True)
+    def test_strict_query_budget(self):
+        with self.assertRaises(db_instrumentation.QueryBudgetExceeded):
+            self.client.get("/api/tasks/")
+        with override_settings(DB_QUERY_STRICT=False):
+            with self.assertLogs("db.budget", level="WARNING"):
+                self.client.get("/api/tasks/")
+
+
+class TestBenchAPICommand(APITestCase):
+    def test_measures_every_scenario_and_compares(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bench.json")
+            args = ["--users", "2", "--tasks", "40", "--requests", "2", "--warmup", "0"]
+            call_command("bench_api", *args, "--output", output, stdout=StringIO())
+            with open(output) as fh:
+                report = json.load(fh)
+
+            scenarios = report["scenarios"]
+            self.assertIn("ordering_priority", scenarios)
+            self.assertIn("login", scenarios)
+            self.assertTrue(all(r["errors"] == 0 for r in scenarios.values()))
+            self.assertGreater(scenarios["list"]["queries_per_request"], 0)
+            # Los datos sembrados se revierten
+            self.assertFalse(Task.objects.exists())
+
+            scenarios["retrieve"]["queries_per_request"] = 0
+            with open(output, "w") as fh:
+                json.dump(report, fh)
+            with self.assertRaisesMessage(CommandError, "retrieve: consultas"):
+                call_command(
+                    "bench_api",
+                    *args,
+                    *("--scenario", "retrieve", "--baseline", output),
+                    stdout=StringIO(),
+                )
+
+
+class TestHealthProbes(APITestCase):
+    def test_liveness_skips_the_stack(self):
+        with self.assertNumQueries(0), self.assertNoLogs("access"):
+            res = self.client.get("/health/live/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {"status": "ok"})
+        self.assertNotIn("X-Request-ID", res)
+
+    @override_settings(HEALTH_READY_CACHE_TTL=60)
+    def test_readiness_is_cached(self):
+        with self.assertNoLogs("access"):
+            res = self.client.get("/health/ready/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Sin "pool": contadores en vivo del pool (DB_POOL), no se cachean
+        body = res.json()
+        body.pop("pool", None)
+        self.assertTrue(body["ready"])
+        self.assertEqual(body["pending_migrations"], 0)
+        self.assertTrue(body["database"]["ok"])
+        with self.assertNumQueries(0):
+            again = self.client.get("/health/ready/").json()
+            again.pop("pool", None)
+            self.assertEqual(again, body)
+            # /health/ usa el mismo resultado
+            self.assertEqual(self.client.get("/health/").json()["database"], body["database"])
+
+    def test_diagnostics_only_for_staff(self):
+        internals = {"readiness", "database_pool", "replicas", "auth_user_cache", "logging"}
+        res = self.client.get("/health/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(internals & set(res.json()))
+
+        staff = get_user_model().objects.create_user(
+            email="staff@example.com", username="staff", password="pass1234", is_staff=True
+        )
+        self.client.force_authenticate(user=staff)
+        self.assertTrue(internals <= set(self.client.get("/health/").json()))
+
+    @override_settings(HEALTH_READY_CACHE_TTL=0, HEALTH_READY_MAX_DB_LATENCY_MS=1e-9)
+    def test_readiness_fails_on_slow_database(self):
+        with self.assertLogs("health", level="WARNING"):
+            res = self.client.get("/health/ready/")
+            self.assertEqual(self.client.get("/health/").json()["status"], "degraded")
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertTrue(res.json()["database"]["slow"])
+
+
+@skipUnless("replica" in settings.DATABASES, "réplica de prueba: config.settings.test")
+@override_settings(DATABASE_REPLICAS=["replica"], DATABASE_REPLICA_PIN_CACHE="pins")
+class TestReplicaRouting(APITestCase):
+    # Sin la réplica (otros settings) la clase se saltea
+    databases = {"default", "replica"} & set(settings.DATABASES)
+
+    def setUp(self):
+        # Las marcas necesitan una cache compartida entre workers
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            CACHES={
+                **settings.CACHES,
+                "pins": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": directory.name,
+                },
+            }
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.pins = caches["pins"]
+        self.user = get_user_model().objects.create_user(
+            email="replica@example.com", username="replica", password="pass1234"
+        )
+        # La "réplica" es otra base: mismo usuario, otras tareas
+        get_user_model().objects.using("replica").create(
+            pk=self.user.pk,
+            email=self.user.email,
+            username=self.user.username,
+            password=self.user.password,
+        )
+        Task.objects.create(owner=self.user, title="primaria")
+        Task.objects.using("replica").create(owner_id=self.user.pk, title="réplica")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def titles(self):
+        res = self.client.get("/api/tasks/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sorted(task["title"] for task in res.json()["results"])
+
+    def test_reads_use_replica_until_client_writes(self):
+        self.assertEqual(self.titles(), ["réplica"])
+        res = self.client.post("/api/tasks/", {"title": "nueva"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        # Lee lo que escribió
+        self.assertEqual(self.titles(), ["nueva", "primaria"])
+        self.pins.clear()  # vence la marca
+        self.assertEqual(self.titles(), ["réplica"])
+
+    def test_streamed_body_keeps_the_route(self):
+        # El cuerpo (p. ej. el cursor de la exportación) se itera fuera del middleware
+        def body():
+            yield current_route.get().read_alias.encode()
+
+        middleware = ReplicaRoutingMiddleware(lambda request: StreamingHttpResponse(body()))
+        request = APIRequestFactory().get("/api/tasks/export/")
+        response = middleware(request)
+        self.assertEqual(b"".join(response.streaming_content), b"replica")
+
+    def test_change_feed_reads_from_primary(self):
+        # El cursor de una réplica atrasada saltearía lo que aún no replicó
+        res = self.client.get("/api/tasks/changes/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([task["title"] for task in res.json()["changed"]], ["primaria"])
+        self.assertEqual(self.titles(), ["réplica"])
+
+    def test_postgres_check_has_connect_timeout(self):
+        # Conexión propia, fuera del pool y con timeout corto
+        connects = []
+
+        def connect(**params):
+            connects.append(params)
+            raise OSError("timeout expired")
+
+        replica = SimpleNamespace(
+            get_connection_params=lambda: {"host": "10.255.255.1"},
+            Database=SimpleNamespace(connect=connect),
+        )
+        health = ReplicaHealth(interval=5, max_lag=5, timeout=1)
+        with self.assertRaises(OSError):
+            health.pg_lag(replica)
+        self.assertEqual(connects, [{"host": "10.255.255.1", "connect_timeout": 1}])
+
+    def test_failed_write_does_not_pin(self):
+        res = self.client.post("/api/tasks/", {}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.titles(), ["réplica"])
+
+    @override_settings(DATABASE_REPLICAS=["missing"])
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        with self.assertLogs("db.replicas", level="WARNING"):
+            self.assertEqual(self.titles(), ["primaria"])
+        self.assertFalse(get_replica_health().status()["missing"]["healthy"])
+        # Fuera de una petición todo va a default
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_per_process_pin_cache_refused(self):
+        with override_settings(DATABASE_REPLICA_PIN_CACHE="default"):
+            with self.assertRaisesMessage(ImproperlyConfigured, "LocMemCache"):
+                ReplicaRoutingMiddleware(lambda request: None)
+            with override_settings(DATABASE_REPLICA_PIN_SECONDS=0):
+                ReplicaRoutingMiddleware(lambda request: None)
+
+
+class TestMetrics(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        settings_override = override_settings(METRICS_DIR=self.dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def scrape(self, **headers):
+        res = self.client.get("/metrics", **headers)
+        return res, res.content.decode()
+
+    def test_requests_recorded_by_route(self):
+        user = get_user_model().objects.create_user(
+            email="metrics@example.com", username="metrics", password="pass1234"
+        )
+        self.client.force_authenticate(user=user)
+        self.client.get("/api/tasks/")
+        self.client.get("/api/tasks/")
+        self.client.get("/api/tasks/999999/")
+
+        res, text = self.scrape()
+        self.assertEqual(res["Content-Type"], metrics.CONTENT_TYPE)
+        self.assertIn(
+            'http_requests_total{method="GET",route="task-list",status="2xx"} 2', text
+        )
+        self.assertIn(
+            'http_requests_total{method="GET",route="task-detail",status="4xx"} 1',
+            text,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",route="task-list"} 2',
+            text,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{method="GET",route="task-list",'
+            'le="+Inf"} 2',
+            text,
+        )
+        self.assertRegex(text, r'http_request_db_queries_sum\{route="task-list"\} [1-9]')
+        self.assertIn("# TYPE http_response_size_bytes histogram", text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        for value in (0.003, 0.02, 0.02, 30):
+            metrics.observe("http_request_duration_seconds", value, {"route": "x"})
+        text = metrics.render(metrics.collect(self.dir))
+        name = "http_request_duration_seconds"
+        self.assertIn(f'{name}_bucket{{route="x",le="0.005"}} 1', text)
+        self.assertIn(f'{name}_bucket{{route="x",le="0.01"}} 1', text)
+        self.assertIn(f'{name}_bucket{{route="x",le="0.025"}} 3', text)
+        self.assertIn(f'{name}_bucket{{route="x",le="10"}} 3', text)
+        self.assertIn(f'{name}_bucket{{route="x",le="+Inf"}} 4', text)
+        self.assertIn(f'{name}_sum{{route="x"}} 30.043', text)
+        self.assertIn(f'{name}_count{{route="x"}} 4', text)
+
+    def test_files_of_all_workers_are_summed(self):
+        # Otro worker (otro archivo), que además crece más allá del tamaño inicial
+        other = metrics.MmapValues(os.path.join(self.dir, "1.db"))
+        for i in range(3000):
+            other.inc(f'http_requests_total{{route="r{i}"}}')
+        other.inc('http_requests_total{route="r0"}', 4)
+        other.close()
+        metrics.inc("http_requests_total", {"route": "r0"})
+
+        totals = metrics.collect(self.dir)
+        self.assertEqual(totals['http_requests_total{route="r0"}'], 6)
+        self.assertEqual(totals['http_requests_total{route="r2999"}'], 1)
+        # Reabrir el archivo conserva los valores
+        reopened = metrics.MmapValues(os.path.join(self.dir, "1.db"))
+        self.addCleanup(reopened.close)
+        reopened.inc('http_requests_total{route="r0"}')
+        self.assertEqual(
+            metrics.read_values(reopened.path)['http_requests_total{route="r0"}'], 6
+        )
+
+    def test_token_and_disabled(self):
+        with override_settings(METRICS_TOKEN="secreto"):
+            res, _ = self.scrape()
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+            res, _ = self.scrape(HTTP_AUTHORIZATION="Bearer secreto")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with override_settings(METRICS_DIR=""):
+            res, _ = self.scrape()
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestThrottling(APITestCase):
+    rates = {"read": "3/min", "write": "2/min", "search": "1/min", "auth": "2/min", "bulk": "1/min"}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "throttle.bin")
+        settings_override = override_settings(
+            THROTTLE_ENABLED=True,
+            THROTTLE_STORE_PATH=self.path,
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": self.rates,
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = get_user_model().objects.create_user(
+            email="throttle@example.com", username="throttle", password="pass1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_bucket_refills_over_time(self):
+        store = throttling.TokenBucketStore("", 16)
+        self.addCleanup(store.close)
+        self.assertEqual(store.consume("k", 2, 1, now=100), 0)
+        self.assertEqual(store.consume("k", 2, 1, now=100), 0)
+        self.assertAlmostEqual(store.consume("k", 2, 1, now=100.25), 0.75)
+        self.assertEqual(store.consume("k", 2, 1, now=101), 0)
+        # Otra clave, otro bucket
+        self.assertEqual(store.consume("otra", 2, 1, now=101), 0)
+
+    def test_workers_share_the_file(self):
+        # Dos workers = dos mapeos del mismo archivo
+        first = throttling.TokenBucketStore(self.path, 64)
+        second = throttling.TokenBucketStore(self.path, 1024)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+        self.assertEqual(second.slots, 64)
+        self.assertEqual(first.consume("k", 1, 0.1, now=100), 0)
+        self.assertGreater(second.consume("k", 1, 0.1, now=100), 0)
+
+    def test_full_probe_window_evicts_idle_bucket(self):
+        store = throttling.TokenBucketStore("", 1)
+        self.addCleanup(store.close)
+        store.consume("a", 1, 1, now=100)
+        # Un solo slot: "b" se queda con el de "a", que vuelve con el bucket lleno
+        self.assertEqual(store.consume("b", 1, 1, now=100), 0)
+        self.assertEqual(store.consume("a", 1, 1, now=100), 0)
+
+    def test_scopes_have_separate_buckets(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get("/api/tasks/").status_code, status.HTTP_200_OK)
+        res = self.client.get("/api/tasks/")
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(res["Retry-After"]), 1)
+
+        res = self.client.get("/api/tasks/", {"search": "x"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get("/api/tasks/", {"search": "x"})
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.post("/api/tasks/", {"title": "Nueva"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.get("/api/tasks/export/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.post("/api/tasks/bulk/", {"create": []}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_buckets_are_per_user(self):
+        for _ in range(4):
+            self.client.get("/api/tasks/")
+        other = get_user_model().objects.create_user(
+            email="otro@example.com", username="otro", password="pass1234"
+        )
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get("/api/tasks/").status_code, status.HTTP_200_OK)
+
+    def test_login_throttled_by_ip(self):
+        self.client.force_authenticate(user=None)
+        data = {"email": "throttle@example.com", "password": "mala"}
+        for _ in range(2):
+            res = self.client.post("/api/auth/jwt/create/", data, format="json")
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.client.post("/api/auth/jwt/create/", data, format="json")
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Desde otra IP sigue respondiendo
+        res = self.client.post(
+            "/api/auth/jwt/create/", data, format="json", REMOTE_ADDR="10.0.0.2"
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_spoofed_forwarded_for_shares_the_bucket(self):
+        self.client.force_authenticate(user=None)
+        data = {"email": "throttle@example.com", "password": "mala"}
+        # Sin proxies: cuenta REMOTE_ADDR, el header se ignora
+        for i in range(2):
+            res = self.client.post(
+                "/api/auth/jwt/create/", data, format="json",
+                HTTP_X_FORWARDED_FOR=f"198.51.100.{i}",
+            )
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.client.post(
+            "/api/auth/jwt/create/", data, format="json",
+            HTTP_X_FORWARDED_FOR="198.51.100.99",
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Detrás de nginx: cuenta la IP que agregó nginx, no lo que mandó el cliente
+        with override_settings(
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}
+        ):
+            statuses = [
+                self.client.post(
+                    "/api/auth/jwt/create/", data, format="json",
+                    REMOTE_ADDR="172.18.0.5",
+                    HTTP_X_FORWARDED_FOR=f"198.51.100.{i}, 203.0.113.7",
+                ).status_code
+                for i in range(3)
+            ]
+        self.assertEqual(
+            statuses,
+            [
+                status.HTTP_401_UNAUTHORIZED,
+                status.HTTP_401_UNAUTHORIZED,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+
+    def test_async_views_share_the_buckets(self):
+        headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        with self.settings(ROOT_URLCONF=async_urlconf):
+            for _ in range(3):
+                res = async_to_sync(self.async_client.get)("/api/tasks/", headers=headers)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get("/api/tasks/")
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with self.settings(ROOT_URLCONF=async_urlconf):
+            res = async_to_sync(self.async_client.get)("/api/tasks/", headers=headers)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+    def test_disabled(self):
+        with override_settings(THROTTLE_ENABLED=False):
+            for _ in range(5):
+                self.assertEqual(
+                    self.client.get("/api/tasks/").status_code, status.HTTP_200_OK
+                )
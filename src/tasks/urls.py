@@ -1,5 +1,8 @@
+from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import TaskDetailAsyncView, TaskListAsyncView
 from .views import TaskViewSet
 
 # Creamos un router
@@ -9,3 +12,12 @@ router.register(r"tasks", TaskViewSet, basename="task")
 
 # Las URLs de la API son generadas automáticamente por el router.
 urlpatterns = router.urls
+
+# Bajo ASGI, listado y detalle con vistas async nativas (ver tasks.async_views).
+# Van antes que las del router, que siguen atendiendo las acciones.
+async_urlpatterns = [
+    path("tasks/", TaskListAsyncView.as_view(), name="task-list-async"),
+    path("tasks/<int:pk>/", TaskDetailAsyncView.as_view(), name="task-detail-async"),
+]
+if settings.TASKS_ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
@@ -1,3 +1,6 @@
+from io import BytesIO
+
+from django.db import connections, transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import (
     OpenApiParameter,
@@ -5,11 +8,78 @@ from drf_spectacular.utils import (
     extend_schema,
     extend_schema_view,
 )
-from rest_framework import filters, permissions, viewsets
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from config.db_router import read_from_primary
 
-from .filters import TaskFilter
+from .bulk import apply_filtered_action, bulk_write, has_errors
+from .cache import (
+    CACHE_HEADER,
+    cached_response,
+    get_list_cache,
+    get_list_version,
+    list_cache_key,
+    store_on_render,
+)
+from .changes import delete_tasks, get_changes, next_change_seq
+from .conditional import (
+    detail_validators,
+    evaluate_preconditions,
+    has_preconditions,
+    list_validators,
+    set_validator_headers,
+)
+from .export import DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, stream_tasks
+from .importer import DEFAULT_IMPORT_FORMAT, IMPORT_FORMATS, import_tasks
+from .filters import TaskFilter, TaskOrderingFilter, TaskSearchFilter
 from .models import Task
-from .serializers import TaskSerializer
+from .pagination import KeysetPagination, TaskPagination
+from .search import search_terms
+from .serializers import (
+    TaskBulkActionSerializer,
+    TaskBulkSerializer,
+    TaskRowSerializer,
+    TaskSerializer,
+)
+from .signals import notify_tasks_changed
+from .stats import StatsDelta, get_stats
+
+
+# Escrituras de una tarea, compartidas con tasks.async_views
+
+
+def create_task(serializer, owner):
+    with transaction.atomic():
+        seq = next_change_seq({owner.pk})[owner.pk]
+        instance = serializer.save(owner=owner, change_seq=seq)
+        delta = StatsDelta()
+        delta.add_task(instance)
+        delta.apply()
+    notify_tasks_changed({owner.pk})
+    return instance
+
+
+def update_task(serializer):
+    instance = serializer.instance
+    delta = StatsDelta()
+    with transaction.atomic():
+        seq = next_change_seq({instance.owner_id})[instance.owner_id]
+        # Valores actuales con la fila bloqueada: `instance` pudo leerse antes
+        # de otra modificación.
+        delta.add_task(Task.objects.select_for_update().get(pk=instance.pk), -1)
+        serializer.save(change_seq=seq)
+        delta.add_task(instance)
+        delta.apply()
+    notify_tasks_changed({instance.owner_id})
+    return instance
+
+
+def destroy_task(instance):
+    delete_tasks(Task.objects.filter(pk=instance.pk), owner_ids={instance.owner_id})
+    notify_tasks_changed({instance.owner_id})
 
 
 @extend_schema(tags=["Tasks"])  # tag global
@@ -44,18 +114,42 @@ class TaskViewSet(viewsets.ModelViewSet):
     # 2. Los permisos requeridos. `IsAuthenticated` solo permite el acceso
     # a usuarios que hayan iniciado sesión (que tengan un token JWT válido).
     permission_classes = [permissions.IsAuthenticated]
+    # Las lecturas solo usan el id y el email del usuario: con
+    # AUTH_TRUST_TOKEN_CLAIMS salen del token (ver users.authentication)
+    trust_token_claims = True
+
+    # Keyset por defecto; `?pagination=page` conserva el formato con `count`.
+    pagination_class = TaskPagination
 
-    # Filtros, búsquedas y orden
+    # Filtros, búsquedas y orden. La búsqueda va al final para poder ordenar
+    # por relevancia con `?search_mode=ranked`.
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        TaskOrderingFilter,
+        TaskSearchFilter,
     ]
     filterset_class = TaskFilter
     search_fields = ["title", "description"]
     ordering_fields = ["created_at", "updated_at", "due_date", "priority", "status"]
     ordering = ["-created_at"]
 
+    # Scope de throttling (config.throttling); las acciones masivas usan "bulk".
+    # Sin definir: "read", "search" o "write" según el método.
+    throttle_scope = None
+
+    # Acciones que manejan sus propias transacciones (un lote por transacción):
+    # con ATOMIC_REQUESTS (activo por defecto en Postgres) la petición entera
+    # sería una sola transacción y cada lote apenas un savepoint.
+    non_atomic_actions = {"import_"}
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if actions and cls.non_atomic_actions & set(actions.values()):
+            for alias in connections:
+                view = transaction.non_atomic_requests(using=alias)(view)
+        return view
+
     # Modificamos este método
     def get_queryset(self):
         """
@@ -68,5 +162,293 @@ class TaskViewSet(viewsets.ModelViewSet):
         # Para peticiones reales, mantenemos la lógica original.
         return self.request.user.tasks.all()
 
+    def has_filters(self, request):
+        """Si la petición trae algún filtro del listado (búsqueda incluida)."""
+        search = request.query_params.get(TaskSearchFilter.search_param, "")
+        return (
+            self.filterset_class(request.query_params).has_values()
+            or bool(search_terms(search))
+        )
+
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        create_task(serializer, self.request.user)
+
+    def perform_destroy(self, instance):
+        destroy_task(instance)
+
+    # Peticiones condicionales (ETag / Last-Modified). Los validadores de la
+    # respuesta se guardan en `conditional_validators` y se agregan como
+    # headers en `finalize_response`.
+
+    conditional_validators = None
+
+    def list(self, request, *args, **kwargs):
+        # La versión del listado da el ETag y la clave de la cache de
+        # respuestas (ver tasks.cache): un 304 o un acierto no consultan
+        # ninguna tarea.
+        version, modified_at = get_list_version(request.user.pk)
+        self.conditional_validators = list_validators(request, version, modified_at)
+        not_modified = evaluate_preconditions(request, *self.conditional_validators)
+        if not_modified is not None:
+            return not_modified
+        cache_key = list_cache_key(request, version)
+        if cache_key is not None:
+            entry = get_list_cache().get(cache_key)
+            if entry is not None:
+                response = cached_response(entry)
+                response[CACHE_HEADER] = "HIT"
+                return response
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # Camino de lectura rápido: tuplas en lugar de instancias de Task.
+        rows = TaskRowSerializer(context=self.get_serializer_context())
+        queryset = rows.prepare(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(rows.serialize(page))
+        else:
+            response = Response(rows.serialize(queryset))
+        if cache_key is not None:
+            store_on_render(response, cache_key)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        updated_at = self._current_updated_at(pk)
+        if updated_at is not None:
+            self.conditional_validators = detail_validators(request, pk, updated_at)
+            not_modified = evaluate_preconditions(
+                request, *self.conditional_validators
+            )
+            if not_modified is not None:
+                return not_modified
+        return super().retrieve(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        if not has_preconditions(request):
+            return super().update(request, *args, **kwargs)
+        # If-Match: se bloquea la fila para que nadie la modifique entre la
+        # comprobación y la escritura.
+        with transaction.atomic():
+            pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            updated_at = self._current_updated_at(pk, lock=True)
+            if updated_at is not None:
+                evaluate_preconditions(
+                    request, *detail_validators(request, pk, updated_at)
+                )
+            return super().update(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        instance = update_task(serializer)
+        self.conditional_validators = detail_validators(
+            self.request, instance.pk, instance.updated_at
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.conditional_validators and status.is_success(response.status_code):
+            set_validator_headers(response, *self.conditional_validators)
+        return response
+
+    def _current_updated_at(self, pk, lock=False):
+        try:
+            queryset = self.get_queryset().filter(pk=pk)
+        except (TypeError, ValueError):
+            return None  # get_object() responde el 404
+        if lock:
+            queryset = queryset.select_for_update()
+        return queryset.values_list("updated_at", flat=True).first()
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Cursor devuelto en `next` por la llamada anterior. Sin "
+                    "él se devuelven todas las tareas (sincronización inicial)."
+                ),
+                required=False,
+            ),
+            OpenApiParameter(
+                name="page_size",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Máximo de tareas y de borrados por página.",
+                required=False,
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+        description=(
+            "Tareas creadas/modificadas (`changed`) e ids borrados (`deleted`) "
+            "desde el cursor `since`. Mientras `has_more` sea verdadero hay que "
+            "seguir pidiendo con `next`; al terminar, `next` es el cursor a "
+            "guardar para la próxima sincronización. 410 si el cursor es "
+            "anterior a la retención de borrados."
+        ),
+    )
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        # El cursor tiene que salir de la primaria (ver config.db_router)
+        read_from_primary()
+        changed, deleted, cursor, has_more = get_changes(
+            self.get_queryset(),
+            request.user.pk,
+            request.query_params.get("since"),
+            KeysetPagination().get_page_size(request),
+        )
+        return Response(
+            {
+                "changed": self.get_serializer(changed, many=True).data,
+                "deleted": deleted,
+                "next": cursor,
+                "has_more": has_more,
+            }
+        )
+
+    @extend_schema(
+        responses=OpenApiTypes.OBJECT,
+        description=(
+            "Cantidad de tareas del usuario por estado y prioridad, vencidas y "
+            "que vencen hoy (tareas no completadas). Se lee de contadores "
+            "mantenidos en cada escritura: el costo no depende de la cantidad "
+            "de tareas."
+        ),
+    )
+    @action(detail=False, methods=["get"], url_path="stats")
+    def stats(self, request):
+        return Response(get_stats(request.user.pk))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=tuple(EXPORT_FORMATS),
+                description="Formato del archivo (por defecto `ndjson`).",
+                required=False,
+            ),
+        ],
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR},
+        description=(
+            "Exporta en streaming todas las tareas que coinciden con los mismos "
+            "filtros, búsqueda y orden del listado, en NDJSON (una tarea JSON por "
+            "línea) o CSV. Sin paginación."
+        ),
+    )
+    @action(detail=False, methods=["get"], url_path="export", throttle_scope="bulk")
+    def export(self, request):
+        export_format = request.query_params.get("file_format", DEFAULT_EXPORT_FORMAT)
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"file_format": [f"Valores válidos: {', '.join(EXPORT_FORMATS)}."]}
+            )
+        return stream_tasks(
+            request._request,
+            self.filter_queryset(self.get_queryset()),
+            export_format,
+            self.get_serializer_context(),
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=tuple(IMPORT_FORMATS),
+                description="Formato del cuerpo (por defecto `ndjson`).",
+                required=False,
+            ),
+        ],
+        request={
+            "application/x-ndjson": OpenApiTypes.BINARY,
+            "text/csv": OpenApiTypes.BINARY,
+        },
+        responses={200: OpenApiTypes.OBJECT, 207: OpenApiTypes.OBJECT},
+        description=(
+            "Importa tareas desde el cuerpo de la petición: NDJSON (un objeto "
+            "por línea) o CSV con encabezado, con los mismos campos que el alta. "
+            "Las filas inválidas se informan por línea sin detener la carga "
+            "(207 si hubo alguna)."
+        ),
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        url_name="import",
+        throttle_scope="bulk",
+        # El cuerpo se lee como stream en import_tasks, sin parsearlo entero.
+        parser_classes=[],
+    )
+    def import_(self, request):
+        import_format = request.query_params.get("file_format", DEFAULT_IMPORT_FORMAT)
+        if import_format not in IMPORT_FORMATS:
+            raise ValidationError(
+                {"file_format": [f"Valores válidos: {', '.join(IMPORT_FORMATS)}."]}
+            )
+        summary = import_tasks(request.stream or BytesIO(), request.user, import_format)
+        code = status.HTTP_207_MULTI_STATUS if summary["failed"] else status.HTTP_200_OK
+        return Response(summary, status=code)
+
+    @extend_schema(
+        request=TaskBulkSerializer,
+        responses={200: OpenApiTypes.OBJECT, 207: OpenApiTypes.OBJECT},
+        description=(
+            "Crea, modifica y elimina tareas en una sola transacción. "
+            "Devuelve el resultado por ítem (200 si todo fue válido, 207 si "
+            "algún ítem falló)."
+        ),
+    )
+    @action(detail=False, methods=["post"], url_path="bulk", throttle_scope="bulk")
+    def bulk(self, request):
+        payload = TaskBulkSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        results = bulk_write(
+            self.get_queryset(),
+            request.user,
+            payload.validated_data,
+            self.get_serializer_context(),
+        )
+        notify_tasks_changed({request.user.pk})
+        code = status.HTTP_207_MULTI_STATUS if has_errors(results) else status.HTTP_200_OK
+        return Response(results, status=code)
+
+    @extend_schema(
+        request=TaskBulkActionSerializer,
+        responses=OpenApiTypes.OBJECT,
+        description=(
+            "Aplica `update` o `delete` a todas las tareas que coinciden con los "
+            "mismos filtros del listado (query params), en una transacción y "
+            "sin cargar las tareas como objetos. Con `dry_run` solo cuenta las "
+            "filas afectadas. Sin ningún filtro responde 400, salvo que se envíe "
+            "`all: true` para aplicarla a todas las tareas."
+        ),
+    )
+    @action(
+        detail=False, methods=["post"], url_path="bulk-action", throttle_scope="bulk"
+    )
+    def bulk_action(self, request):
+        payload = TaskBulkActionSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+        if not data["all"] and not self.has_filters(request):
+            raise ValidationError(
+                {"all": ["Se requiere al menos un filtro, o `all: true` para todas."]}
+            )
+        affected = apply_filtered_action(
+            self.filter_queryset(self.get_queryset()),
+            request.user,
+            data["action"],
+            data["values"],
+            dry_run=data["dry_run"],
+        )
+        if affected and not data["dry_run"]:
+            notify_tasks_changed({request.user.pk})
+        return Response(
+            {"action": data["action"], "dry_run": data["dry_run"], "affected": affected}
+        )
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from . import schema  # noqa: F401 (registra la extensión de drf-spectacular)
+        from .authentication import invalidate_cached_user
+
+        # Cambios de contraseña o is_active y bajas (admin, djoser)
+        user_model = self.get_model("User")
+        post_save.connect(invalidate_cached_user, sender=user_model)
+        post_delete.connect(invalidate_cached_user, sender=user_model)
@@ -0,0 +1,330 @@
+"""Autenticación JWT sin consultar ``users_user`` en cada petición.
+
+:class:`CachedJWTAuthentication` resuelve el usuario del token desde una
+cache en memoria por proceso (:class:`UserCache`), acotada a
+``AUTH_USER_CACHE_SIZE`` usuarios (0 la desactiva) y con TTL
+``AUTH_USER_CACHE_TIMEOUT``.
+
+Guardar o borrar un usuario (cambio de contraseña, ``is_active``, admin,
+djoser) renueva su sello en :class:`UserStamps`, un archivo mapeado en memoria
+(``AUTH_USER_CACHE_STAMPS_PATH``) que comparten los workers: cada acierto
+compara el sello guardado con el actual, así que la baja o el cambio de
+contraseña se ven en todos los workers en la petición siguiente, sin
+consultas ni red. Procesos que no comparten ese archivo (otros contenedores,
+o la ruta vacía, por defecto fuera de prod) solo lo ven al vencer el TTL: es
+la demora máxima de revocación y conviene mantenerlo corto.
+
+:meth:`CachedJWTAuthentication.aauthenticate` es la versión ``async`` para
+las vistas nativas de ``tasks.async_views``: en un acierto de la cache no hay
+ninguna consulta ni salto a un hilo.
+
+Con ``AUTH_TRUST_TOKEN_CLAIMS`` las peticiones de solo lectura (``GET``,
+``HEAD``, ``OPTIONS``) a vistas con ``trust_token_claims = True`` (las de
+tareas, que solo usan el id y el email del usuario) con un token que trae
+``email`` (ver ``users.serializers.TokenObtainPairSerializer``) usan
+directamente los claims, sin cache ni base: un usuario desactivado sigue
+leyendo hasta que vence su token. El resto de las vistas resuelve siempre el
+usuario completo.
+"""
+
+import copy
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config import metrics
+
+
+class UserStamps:
+    """Sello por usuario (``time.time_ns()`` de su último cambio) en una
+    tabla de ``slots`` enteros mapeada en memoria, compartida entre procesos.
+
+    El slot sale de un hash del id: dos usuarios en el mismo slot solo causan
+    fallos de cache de más. Sin locks: basta con que el sello cambie, y dos
+    workers que lo renuevan a la vez escriben ambos uno distinto del anterior.
+    Sin ``path`` la tabla es memoria anónima del proceso.
+    """
+
+    slot = struct.Struct("<Q")
+
+    def __init__(self, path, slots):
+        self.slots = slots
+        size = slots * self.slot.size
+        if not path:
+            self._map = mmap.mmap(-1, size)
+            return
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def _offset(self, user_id):
+        # No hash(): cambia entre procesos
+        digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.slots * self.slot.size
+
+    def get(self, user_id):
+        return self.slot.unpack_from(self._map, self._offset(user_id))[0]
+
+    def renew(self, user_id):
+        offset = self._offset(user_id)
+        # Distinto del anterior aunque el reloj no avance
+        stamp = max(time.time_ns(), self.slot.unpack_from(self._map, offset)[0] + 1)
+        self.slot.pack_into(self._map, offset, stamp)
+
+    def close(self):
+        self._map.close()
+
+
+class UserCache:
+    """LRU con TTL de usuarios por id, con contadores por proceso.
+
+    Las claves son ``str(id)``: el claim del token trae el id como texto.
+    Cada entrada guarda el sello de :class:`UserStamps` leído *antes* de
+    consultar el usuario; si cambió, la entrada ya no vale.
+    """
+
+    def __init__(self, max_entries, timeout, stamps):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.stamps = stamps
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.trusted = 0
+
+    def stamp(self, user_id):
+        return self.stamps.get(user_id)
+
+    def get(self, user_id):
+        user_id, now = str(user_id), time.monotonic()
+        stamp = self.stamps.get(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now and entry[2] == stamp:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                metrics.inc("auth_user_cache_requests_total", {"result": "hit"})
+                # Copia: cada petición puede modificar su request.user
+                return copy.copy(entry[1])
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            metrics.inc("auth_user_cache_requests_total", {"result": "miss"})
+            return None
+
+    def set(self, user_id, user, stamp):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries[user_id] = (
+                time.monotonic() + self.timeout,
+                copy.copy(user),
+                stamp,
+            )
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.trusted = 0
+
+    def count_trusted(self):
+        with self._lock:
+            self.trusted += 1
+        metrics.inc("auth_user_cache_requests_total", {"result": "trusted"})
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "trusted_claims": self.trusted,
+            # Cada acierto o token confiado es un SELECT menos sobre users_user
+            "queries_saved": self.hits + self.trusted,
+        }
+
+
+_user_cache = None
+_user_stamps = None
+
+
+def get_user_stamps():
+    global _user_stamps
+    if _user_stamps is None:
+        _user_stamps = UserStamps(
+            getattr(settings, "AUTH_USER_CACHE_STAMPS_PATH", ""),
+            getattr(settings, "AUTH_USER_CACHE_STAMPS_SLOTS", 65536),
+        )
+    return _user_stamps
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = UserCache(
+            getattr(settings, "AUTH_USER_CACHE_SIZE", 0),
+            getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60),
+            get_user_stamps(),
+        )
+    return _user_cache
+
+
+def _reset_user_cache(setting, **kwargs):
+    global _user_cache, _user_stamps
+    if setting.startswith("AUTH_USER_CACHE_"):
+        _user_cache = None
+    if setting.startswith("AUTH_USER_CACHE_STAMPS_") and _user_stamps is not None:
+        _user_stamps.close()
+        _user_stamps = None
+
+
+setting_changed.connect(_reset_user_cache)
+
+
+def invalidate_cached_user(sender, instance, using="default", **kwargs):
+    """``post_save``/``post_delete`` del usuario."""
+    stamps = get_user_stamps()
+    stamps.renew(instance.pk)
+    # Otra vez al confirmar: un worker pudo leer la fila vieja entre medio
+    transaction.on_commit(lambda: stamps.renew(instance.pk), using=using)
+    get_user_cache().invalidate(instance.pk)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` que resuelve el usuario con :class:`UserCache`."""
+
+    claim_fields = ("email", "username")
+
+    def authenticate(self, request):
+        view = getattr(request, "parser_context", {}).get("view")
+        self.trust_claims = self.trusts_claims(request, view)
+        return super().authenticate(request)
+
+    def trusts_claims(self, request, view):
+        """Si el usuario puede salir de los claims: lectura, en una vista que
+        lo acepta (``trust_token_claims``) y con ``AUTH_TRUST_TOKEN_CLAIMS``."""
+        return (
+            request.method in SAFE_METHODS
+            and getattr(view, "trust_token_claims", False)
+            and getattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", False)
+        )
+
+    def get_user(self, validated_token):
+        if self.trust_claims:
+            user = self.get_user_from_claims(validated_token)
+            if user is not None:
+                get_user_cache().count_trusted()
+                return user
+
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            # super() informa el error
+            return super().get_user(validated_token)
+        cache = get_user_cache()
+        if cache.max_entries <= 0:
+            return super().get_user(validated_token)
+        user = cache.get(user_id)
+        if user is None:
+            stamp = cache.stamp(user_id)
+            user = super().get_user(validated_token)
+            cache.set(user_id, user, stamp)
+            return user
+        self.check_user(user, validated_token)
+        return user
+
+    def check_user(self, user, validated_token):
+        """Mismas comprobaciones que ``JWTAuthentication.get_user``."""
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+
+    # Vistas nativas async (tasks.async_views)
+
+    async def aauthenticate(self, request, view=None):
+        """Versión ``async`` de :meth:`authenticate` sobre un ``HttpRequest``."""
+        self.trust_claims = self.trusts_claims(request, view)
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if self.trust_claims:
+            user = self.get_user_from_claims(validated_token)
+            if user is not None:
+                get_user_cache().count_trusted()
+                return user
+
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        cache = get_user_cache()
+        cached = cache.max_entries > 0
+        user = cache.get(user_id) if cached else None
+        if user is None:
+            stamp = cache.stamp(user_id)
+            try:
+                user = await self.user_model.objects.aget(
+                    **{jwt_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            self.check_user(user, validated_token)
+            if cached:
+                cache.set(user_id, user, stamp)
+            return user
+        self.check_user(user, validated_token)
+        return user
+
+    def get_user_from_claims(self, validated_token):
+        """Usuario sin guardar armado con los claims del token (solo lectura):
+        solo trae id, ``email`` y ``username``."""
+        if not all(name in validated_token for name in self.claim_fields):
+            return None
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        user = self.user_model(
+            **{jwt_settings.USER_ID_FIELD: user_id},
+            **{name: validated_token[name] for name in self.claim_fields},
+            is_active=True,
+        )
+        user._state.adding = False
+        user._state.db = "default"
+        return user
@@ -0,0 +1,9 @@
+"""Extensiones de drf-spectacular para la autenticación de ``users``."""
+
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """``CachedJWTAuthentication`` documentada como el ``jwtAuth`` de simplejwt."""
+
+    target_class = "users.authentication.CachedJWTAuthentication"
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
 
 from .models import User
 
@@ -11,3 +12,15 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "email", "first_name", "last_name"]
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """Agrega ``email`` y ``username`` al token para que
+    ``AUTH_TRUST_TOKEN_CLAIMS`` pueda resolver el usuario sin la base."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["email"] = user.email
+        token["username"] = user.username
+        return token
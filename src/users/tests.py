@@ -1,6 +1,13 @@
+import os
+import tempfile
+
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from rest_framework import status
-from rest_framework.test import APITestCase
+
+from config.testing import APITestCase
+
+from .authentication import UserCache, UserStamps, get_user_cache
 
 
 class TestUserAuthAPI(APITestCase):
@@ -54,3 +61,85 @@ class TestUserAuthAPI(APITestCase):
         res = self.client.post(self.base_url + "users/", payload, format="json")
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("email", res.data)
+
+
+@override_settings(AUTH_USER_CACHE_SIZE=10)
+class TestCachedJWTAuthentication(APITestCase):
+    me_url = "/api/auth/users/me/"
+
+    def setUp(self):
+        get_user_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email="cached@example.com", username="cached", password="StrongPass123"
+        )
+        res = self.client.post(
+            "/api/auth/jwt/create/",
+            {"email": self.user.email, "password": "StrongPass123"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+
+    def test_second_request_skips_user_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.me_url)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.me_url)
+        self.assertEqual(res.data["email"], self.user.email)
+        stats = get_user_cache().stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["queries_saved"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_user_changes_invalidate_entry(self):
+        self.client.get(self.me_url)
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(self.me_url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.save()
+        self.client.get(self.me_url)
+        self.user.delete()
+        res = self.client.get(self.me_url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_changes_reach_other_workers(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "stamps.bin")
+        settings = override_settings(AUTH_USER_CACHE_STAMPS_PATH=path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Otro worker: su propia cache y su propio mapeo del archivo
+        stamps = UserStamps(path, 65536)
+        self.addCleanup(stamps.close)
+        other = UserCache(10, 60, stamps)
+        other.set(self.user.pk, self.user, other.stamp(self.user.pk))
+        self.assertIsNotNone(other.get(self.user.pk))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(other.get(self.user.pk))
+
+    @override_settings(AUTH_TRUST_TOKEN_CLAIMS=True)
+    def test_trusted_claims_only_for_safe_methods(self):
+        # Solo las consultas de los contadores (tasks.stats), no la del usuario
+        with self.assertNumQueries(2):
+            res = self.client.get("/api/tasks/stats/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_user_cache().stats()["trusted_claims"], 1)
+
+        res = self.client.patch(self.me_url, {"first_name": "Ana"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Ana")
+        self.assertTrue(self.user.check_password("StrongPass123"))
+
+    @override_settings(AUTH_TRUST_TOKEN_CLAIMS=True)
+    def test_other_views_resolve_the_full_user(self):
+        self.user.first_name, self.user.last_name = "Ana", "Gómez"
+        self.user.save()
+        res = self.client.get(self.me_url)
+        self.assertEqual((res.data["first_name"], res.data["last_name"]), ("Ana", "Gómez"))
+        self.assertEqual(get_user_cache().stats()["trusted_claims"], 0)